@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import time
+from collections import Counter
+from email_pipeline import process_emails, DEFAULT_CONCURRENCY, DEFAULT_LLM_TIMEOUT
+from mailbox_reader import read_emails, completed_count
+from response_tiers import tier_stats
+from metrics import metrics, profile, start_metrics_server
+
+# Emails read, processed and written per window; bounds memory for arbitrarily large mailboxes
+DEFAULT_WINDOW_SIZE = 64
+
+def _json_default(value):
+    """Converts NumPy scalars in results to plain Python values."""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+async def _process_windows(emails, out, first_index, window_size, concurrency, llm_timeout):
+    """Processes emails window by window on one event loop, writing each window's results as it completes."""
+    start_time = time.time()
+    processed = 0
+    escalated = 0
+    truncated = 0
+    categories = Counter()
+
+    while True:
+        window = list(itertools.islice(emails, window_size))
+        if not window:
+            break
+
+        results = await process_emails(window, concurrency=concurrency, llm_timeout=llm_timeout)
+        for index, result in enumerate(results, start=first_index + processed):
+            out.write(json.dumps({"id": index, **result}, default=_json_default, ensure_ascii=False) + "\n")
+            escalated += bool(result["escalation"])
+            truncated += result["truncated"]
+            categories[str(result["category"])] += 1
+        out.flush()  # Everything written so far survives a crash and counts towards --resume
+
+        processed += len(results)
+        elapsed = time.time() - start_time
+        print(f"Processed {processed} emails ({processed / elapsed * 60:.1f} emails/min)")
+
+    return processed, escalated, truncated, categories
+
+def run_batch(input_path, output_path, resume=False, window_size=DEFAULT_WINDOW_SIZE,
+              concurrency=DEFAULT_CONCURRENCY, llm_timeout=DEFAULT_LLM_TIMEOUT, limit=None,
+              text_field=None, subject_field=None):
+    """Streams emails from input_path through the full pipeline, appending one JSON result per line."""
+    start_time = time.time()
+
+    # Results are written in input order, so the number of complete output lines is the checkpoint
+    skip = completed_count(output_path) if resume else 0
+    if skip:
+        print(f"Resuming after {skip} already processed emails")
+
+    emails = itertools.islice(read_emails(input_path, text_field, subject_field), skip, None)
+    if limit is not None:
+        emails = itertools.islice(emails, limit)
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+        processed, escalated, truncated, categories = asyncio.run(
+            _process_windows(emails, out, skip, window_size, concurrency, llm_timeout)
+        )
+
+    elapsed = time.time() - start_time
+    summary = {
+        "processed": processed,
+        "skipped": skip,
+        "escalated": escalated,
+        "truncated": truncated,
+        "elapsed_sec": round(elapsed, 2),
+        "emails_per_min": round(processed / elapsed * 60, 1) if elapsed > 0 else 0.0,
+        "categories": dict(categories.most_common()),
+        "tiers": tier_stats.report(),
+        "stages": metrics.report()["stages"],
+    }
+    print(json.dumps(summary, indent=2))
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process a mailbox (CSV, JSONL or mbox) without the Streamlit UI.")
+    parser.add_argument("input", help="CSV, JSONL or mbox file with the emails to process")
+    parser.add_argument("output", help="JSONL file the results are streamed to")
+    parser.add_argument("--resume", action="store_true", help="Continue after the results already in the output file")
+    parser.add_argument("--window-size", type=int, default=DEFAULT_WINDOW_SIZE, help="Emails held in memory at once")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="Emails processed concurrently")
+    parser.add_argument("--llm-timeout", type=float, default=DEFAULT_LLM_TIMEOUT, help="Seconds before falling back to a canned reply")
+    parser.add_argument("--limit", type=int, default=None, help="Process at most this many emails")
+    parser.add_argument("--text-field", default=None, help="Column/field holding the email body")
+    parser.add_argument("--subject-field", default=None, help="Column/field holding the email subject")
+    parser.add_argument("--profile", nargs="?", const="", default=None, metavar="PATH",
+                        help="Run under cProfile; write the stats to PATH, or print the top functions if no PATH is given")
+    args = parser.parse_args()
+
+    start_metrics_server()  # Only if METRICS_PORT is set
+    with profile(args.profile) if args.profile is not None else contextlib.nullcontext():
+        run_batch(
+            args.input, args.output, resume=args.resume, window_size=args.window_size,
+            concurrency=args.concurrency, llm_timeout=args.llm_timeout, limit=args.limit,
+            text_field=args.text_field, subject_field=args.subject_field,
+        )
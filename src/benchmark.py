@@ -0,0 +1,279 @@
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# Stored results of a reference run, compared against with --baseline
+BASELINE_PATH = "../data/benchmark_baseline.json"
+POLICY_FOLDER = "../data/company policies/"
+
+DEFAULT_EMAILS = 200
+DEFAULT_SEED = 42
+REGRESSION_TOLERANCE = 0.2  # A component regresses if p95 grows or throughput drops by more than this fraction
+MEMORY_SAMPLE = 50  # Items per component re-run under tracemalloc to measure peak memory
+EMBEDDING_DIM = 384
+
+# Building blocks of the synthetic corpus: one request per category, plus openers, details and tones
+SYNTHETIC_REQUESTS = {
+    "REFUND": ["I want a refund for my damaged product.", "When will I get my refund after returning the item?"],
+    "CANCEL": ["How can I cancel my order before it ships?", "Please cancel my order, I no longer need it."],
+    "ORDER": ["Where is my order?", "I placed an order last week and have no update."],
+    "PAYMENT": ["My payment was deducted twice.", "Which payment methods do you accept?"],
+    "DELIVERY": ["My package has not been delivered yet.", "Can I change the delivery date?"],
+    "INVOICE": ["Please send me the invoice for my purchase.", "I cannot download my invoice."],
+    "ACCOUNT": ["I cannot log in to my account.", "How do I delete my account and personal data?"],
+    "CONTACT": ["How can I contact customer support?", "Who is the grievance officer?"],
+    "FEEDBACK": ["I want to share feedback about your app.", "Your delivery team was very helpful."],
+}
+OPENERS = ["Hi,", "Hello team,", "Dear support,", ""]
+DETAILS = ["My order number is {n}.", "I ordered it on the {d}th.", "This is my second email about this.", ""]
+TONES = ["Thanks in advance!", "This is really frustrating.", "Please help as soon as possible.", "Regards."]
+
+def synthetic_emails(count, seed=DEFAULT_SEED):
+    """Returns `count` deterministic (subject, email_text) pairs spread over the support categories."""
+    rng = random.Random(seed)
+    categories = sorted(SYNTHETIC_REQUESTS)
+    emails = []
+    for i in range(count):
+        category = categories[i % len(categories)]
+        parts = [
+            rng.choice(OPENERS),
+            rng.choice(SYNTHETIC_REQUESTS[category]),
+            rng.choice(DETAILS).format(n=rng.randint(100000, 999999), d=rng.randint(1, 28)),
+            rng.choice(TONES),
+        ]
+        emails.append((category.title(), " ".join(part for part in parts if part)))
+    return emails
+
+class HashingEncoder:
+    """Deterministic bag-of-words embedder with the same encode() interface as SentenceTransformer.
+
+    Needs no model download, so retrieval and ingestion can be benchmarked offline; its vectors carry
+    no semantic meaning, so only timings (not retrieval quality) are comparable with the real model.
+    """
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        self.vectorizer = HashingVectorizer(n_features=dim, alternate_sign=False, norm="l2", ngram_range=(1, 2))
+
+    def encode(self, sentences, batch_size=32):
+        single = isinstance(sentences, str)
+        vectors = self.vectorizer.transform([sentences] if single else list(sentences)).toarray().astype(np.float32)
+        return vectors[0] if single else vectors
+
+def summarize(latencies, elapsed):
+    """Returns throughput and latency percentiles (ms) for per-item latencies (sec) measured over `elapsed` seconds."""
+    latencies = np.asarray(latencies, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) if len(latencies) else (0.0, 0.0, 0.0)
+    return {
+        "items": len(latencies),
+        "throughput_per_sec": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(float(latencies.mean()), 3) if len(latencies) else 0.0,
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+    }
+
+def peak_memory_mb(fn, items):
+    """Returns the peak Python memory (MiB) allocated while calling fn on each item, traced with tracemalloc."""
+    tracemalloc.start()
+    try:
+        for item in items:
+            fn(item)
+        return round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+    finally:
+        tracemalloc.stop()
+
+def run_component(fn, items, memory_sample=MEMORY_SAMPLE):
+    """Times fn on every item, then re-runs a sample under tracemalloc (kept separate so tracing does not skew timings)."""
+    items = list(items)
+    latencies = []
+    start_time = time.perf_counter()
+    for item in items:
+        item_start = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - item_start)
+    report = summarize(latencies, time.perf_counter() - start_time)
+    report["peak_memory_mb"] = peak_memory_mb(fn, items[:memory_sample])
+    return report
+
+def compare_to_baseline(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Compares component results with a baseline, returning {component: {...ratios, "regressed"}}."""
+    comparison = {}
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        p95_ratio = current["p95_ms"] / reference["p95_ms"] if reference["p95_ms"] else 1.0
+        throughput_ratio = (
+            current["throughput_per_sec"] / reference["throughput_per_sec"] if reference["throughput_per_sec"] else 1.0
+        )
+        comparison[name] = {
+            "p95_ratio": round(p95_ratio, 3),
+            "throughput_ratio": round(throughput_ratio, 3),
+            "regressed": p95_ratio > 1 + tolerance or throughput_ratio < 1 - tolerance,
+        }
+    return comparison
+
+@contextlib.contextmanager
+def configure_offline(work_dir, encoder="hashing", llm_latency=0.0):
+    """Points the shared registry at throwaway, offline artifacts: an in-memory ChromaDB, temporary index files,
+    a memory-only query cache, a stub LLM without rate limits and (by default) the hashing embedder.
+
+    The previous registry loaders, loaded artifacts and index paths are restored on exit.
+    """
+    import chromadb
+    import policy_retriever
+    import response_generator
+    from embedding_cache import QueryEmbeddingCache
+    from llm_client import ResilientLLM, StubLLM
+    from model_registry import registry
+
+    saved_registry = registry.snapshot()
+    saved_paths = policy_retriever.INDEX_MANIFEST_PATH, policy_retriever.LEXICAL_INDEX_PATH
+    policy_retriever.INDEX_MANIFEST_PATH = os.path.join(work_dir, "index_manifest.json")
+    policy_retriever.LEXICAL_INDEX_PATH = os.path.join(work_dir, "bm25_index.json")
+
+    if encoder == "hashing":
+        registry.register("embedding_model", HashingEncoder)
+    registry.register("chroma_client", chromadb.EphemeralClient)
+    registry.register("query_cache", lambda: QueryEmbeddingCache(max_size=policy_retriever.QUERY_CACHE_SIZE))
+    registry.register("llm", lambda: ResilientLLM(StubLLM(latency=llm_latency)))
+    # Anything already loaded from the real index is dropped, so ingestion and search use the throwaway one
+    registry.unload(
+        "embedding_model", "chroma_client", "policy_collection", "indexing_collection", "retrieval_backend", "lexical_backend",
+        "query_cache", "llm",
+    )
+    response_generator.response_cache.clear()
+    try:
+        yield
+    finally:
+        registry.restore(saved_registry)
+        policy_retriever.INDEX_MANIFEST_PATH, policy_retriever.LEXICAL_INDEX_PATH = saved_paths
+        response_generator.response_cache.clear()  # Drops the stub LLM's answers
+
+def ingest_policies(pdf_paths, lexical_index_path):
+    """Times parsing, chunking, embedding and storing each PDF, then builds the BM25 index over the stored chunks.
+
+    Raises if nothing was indexed, since retrieval timings over an empty index would be meaningless.
+    """
+    from pdf_processor import extract_sections, build_lexical_index
+
+    report = run_component(extract_sections, pdf_paths)
+    report["chunks"] = build_lexical_index(lexical_index_path)
+    if not report["chunks"]:
+        raise RuntimeError(f"No policy chunks were indexed from {len(pdf_paths)} PDFs")
+    return report
+
+def run_benchmarks(emails, pdf_folder=POLICY_FOLDER, concurrency=8, encoder="hashing", llm_latency=0.0):
+    """Runs every component over the corpus in pipeline order and returns their reports."""
+    from classification import classify_email
+    from sentiment_analysis import analyze_sentiment
+    from pdf_processor import save_manifest
+    from policy_retriever import retrieve_policy
+    import policy_retriever
+    from response_generator import generate_response
+    from email_pipeline import process_emails
+    from metrics import metrics
+    from model_registry import registry
+
+    texts = [email_text for _, email_text in emails]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as work_dir, configure_offline(work_dir, encoder, llm_latency):
+        # Load every model up front, so first calls do not count their load time as latency
+        registry.warm_up(
+            "embedding_model", "indexing_collection", "email_classifier", "email_vectorizer",
+            "sentiment_model", "sentiment_vectorizer", "responses", "llm",
+        )
+
+        pdf_paths = sorted(os.path.join(pdf_folder, name) for name in os.listdir(pdf_folder) if name.endswith(".pdf"))
+        results["ingest"] = ingest_policies(pdf_paths, policy_retriever.LEXICAL_INDEX_PATH)
+        save_manifest({"files": {}}, policy_retriever.INDEX_MANIFEST_PATH)  # Makes retrievers load the new index
+        registry.warm_up("policy_collection")  # Only exists once ingestion has created it
+
+        results["classify"] = run_component(classify_email, texts)
+        results["sentiment"] = run_component(analyze_sentiment, texts)
+        results["retrieve"] = run_component(retrieve_policy, texts)
+        categories = [str(classify_email(text)[0]) for text in texts]
+        results["respond"] = run_component(lambda pair: generate_response(*pair), list(zip(categories, texts)))
+
+        metrics.reset()
+        start_time = time.perf_counter()
+        pipeline_results = asyncio.run(process_emails(emails, concurrency=concurrency))
+        results["pipeline"] = summarize([result["time"] for result in pipeline_results], time.perf_counter() - start_time)
+        results["pipeline"]["stages"] = metrics.report()["stages"]
+
+    return results
+
+def environment(args):
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "emails": args.emails,
+        "seed": args.seed,
+        "encoder": args.encoder,
+        "llm_latency": args.llm_latency,
+        "concurrency": args.concurrency,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark each pipeline component offline against a stub LLM.")
+    parser.add_argument("--emails", type=int, default=DEFAULT_EMAILS, help="Synthetic emails to generate")
+    parser.add_argument("--input", default=None, help="Sample emails from a CSV, JSONL or mbox file instead")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed of the synthetic corpus")
+    parser.add_argument("--encoder", choices=["hashing", "model"], default="hashing",
+                        help="Offline hashing embedder, or the configured embedding model (must be downloaded)")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the stub LLM takes per reply")
+    parser.add_argument("--concurrency", type=int, default=8, help="Emails processed concurrently in the pipeline run")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE, help="Allowed slowdown before flagging")
+    parser.add_argument("--output", default=None, help="Also write the full report to this JSON file")
+    args = parser.parse_args()
+
+    if args.input:
+        from mailbox_reader import read_emails
+        emails = list(itertools.islice(read_emails(args.input), args.emails))
+    else:
+        emails = synthetic_emails(args.emails, args.seed)
+
+    from model_registry import registry
+    report = {"environment": environment(args), "components": run_benchmarks(
+        emails, concurrency=args.concurrency, encoder=args.encoder, llm_latency=args.llm_latency
+    )}
+    report["load"] = registry.report()  # Model load times and memory, kept out of the per-item latencies
+
+    for name, stats in report["components"].items():
+        print(f"{name}: {({key: value for key, value in stats.items() if key != 'stages'})}")
+
+    regressed = False
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if baseline.get("environment", {}).get("encoder") != args.encoder:
+            print("Warning: the baseline was recorded with a different encoder")
+        report["comparison"] = compare_to_baseline(report["components"], baseline["components"], args.tolerance)
+        for name, comparison in report["comparison"].items():
+            print(f"{name}: {'REGRESSED ' if comparison['regressed'] else ''}{comparison}")
+        regressed = any(comparison["regressed"] for comparison in report["comparison"].values())
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if regressed else 0)
@@ -1,41 +1,50 @@
-import os
-import pickle
 import numpy as np
+from model_registry import registry
+from metrics import metrics
 
-# Get absolute paths
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
-MODEL_PATH = os.path.join(BASE_DIR, "models/email_classifier.pkl")
-VECTORIZER_PATH = os.path.join(BASE_DIR, "models/vectorizer_email.pkl")
+# Trained model & vectorizer are loaded on first use and shared through the model registry
+def get_model():
+    return registry.get("email_classifier")
 
-# Load trained model
-try:
-    with open(MODEL_PATH, "rb") as f:
-        model = pickle.load(f)
-
-    with open(VECTORIZER_PATH, "rb") as f:
-        vectorizer = pickle.load(f)
-
-
-except Exception as e:
-    print(f"Error loading model/vectorizer: {e}")
-    exit()
+def get_vectorizer():
+    return registry.get("email_vectorizer")
 
 # Function to classify user query 
 def classify_email(user_query):
     """Classify customer query into predefined categories with confidence score."""
-    try:
-        query_vec = vectorizer.transform([user_query])
-        prediction = model.predict(query_vec)[0]
+    predictions, confidences = classify_emails([user_query])
+    return predictions[0], confidences[0]
 
-        proba = model.predict_proba(query_vec)[0]
-        confidence = np.max(proba) 
+def classify_emails(user_queries):
+    """Classify a batch of customer queries, returning arrays of categories and confidence scores."""
+    user_queries = list(user_queries)
+    if not user_queries:
+        return np.array([], dtype=object), np.array([], dtype=float)
 
-        return prediction, confidence
+    try:
+        query_vecs = get_vectorizer().transform(user_queries)  # One sparse transform for the whole batch
+        return predict_categories(query_vecs)
     except Exception as e:
-        print(f"Error classifying query: {e}")
-        return None, 0.0
+        print(f"Error classifying queries: {e}")
+        return np.full(len(user_queries), None, dtype=object), np.zeros(len(user_queries))
+
+@metrics.traced("classify")
+def predict_categories(query_vecs):
+    """Predict categories and confidence scores from already vectorized queries."""
+    # Take the label from the probability argmax instead of a second predict() pass
+    model = get_model()
+    proba = model.predict_proba(query_vecs)
+    best = np.argmax(proba, axis=1)
+    return model.classes_[best], proba[np.arange(len(best)), best]
 
 if __name__ == "__main__":
     sample_query = "I want to cancel my subscription. How can I do that?"
     category, confidence = classify_email(sample_query)
     print(f"Predicted Category: {category} (Confidence: {confidence:.2f})")
+
+    batch_categories, batch_confidences = classify_emails([
+        "Where is my package?",
+        "I need a refund for my damaged product.",
+    ])
+    for category, confidence in zip(batch_categories, batch_confidences):
+        print(f"Predicted Category: {category} (Confidence: {confidence:.2f})")
@@ -0,0 +1,184 @@
+import json
+import os
+import re
+
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+
+# Compact artifact layout (one directory per task):
+#   config.json   analyzer settings, TF-IDF settings, class labels and output link
+#   vocab.npy     sorted vocabulary as fixed-width UTF-8 bytes
+#   columns.npy   feature column of each sorted vocabulary entry
+#   idf.npy       IDF weight per feature column
+#   weights.npy   (n_features, n_classes) linear weights
+#   bias.npy      (n_classes,) bias
+# Arrays are memory-mapped on load, so every process on a host shares the same pages.
+
+def normalize_rows(matrix, norm="l2"):
+    """Scales each row of a CSR matrix to unit l1 or l2 norm (all-zero rows are left as is)."""
+    if norm == "l2":
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    elif norm == "l1":
+        norms = np.asarray(abs(matrix).sum(axis=1)).ravel()
+    else:
+        raise ValueError(f"Unsupported norm: {norm}")
+    norms[norms == 0] = 1.0
+    return diags(1.0 / norms) @ matrix
+
+def export_compact(vectorizer, model, directory):
+    """Exports a fitted TfidfVectorizer and a MultinomialNB / LogisticRegression model to the compact format."""
+    params = vectorizer.get_params()
+    if params["analyzer"] != "word" or params["tokenizer"] or params["preprocessor"] or params["strip_accents"]:
+        raise ValueError("Only word analyzers without custom tokenizer, preprocessor or accent stripping can be exported.")
+
+    # Linear scores per class: NB joint log-likelihood or LR decision function
+    if hasattr(model, "feature_log_prob_"):
+        weights, bias, link = model.feature_log_prob_.T, model.class_log_prior_, "softmax"
+    elif hasattr(model, "coef_"):
+        weights, bias = model.coef_.T, model.intercept_
+        link = "ovr" if getattr(model, "multi_class", None) == "ovr" else "softmax"
+        if weights.shape[1] == 1:
+            # Binary LR: sigmoid(z) == softmax([0, z])
+            weights = np.hstack([np.zeros_like(weights), weights])
+            bias = np.concatenate([[0.0], bias])
+            link = "softmax"
+    else:
+        raise ValueError(f"Unsupported model type: {type(model).__name__}")
+
+    terms = sorted(vectorizer.vocabulary_, key=lambda term: term.encode("utf-8"))
+    stop_words = vectorizer.get_stop_words()
+
+    os.makedirs(directory, exist_ok=True)
+    np.save(os.path.join(directory, "vocab.npy"), np.array([term.encode("utf-8") for term in terms]))
+    np.save(os.path.join(directory, "columns.npy"), np.array([vectorizer.vocabulary_[term] for term in terms], dtype=np.int32))
+    np.save(os.path.join(directory, "idf.npy"), np.asarray(vectorizer.idf_ if params["use_idf"] else np.ones(len(terms)), dtype=np.float64))
+    np.save(os.path.join(directory, "weights.npy"), np.ascontiguousarray(weights, dtype=np.float64))
+    np.save(os.path.join(directory, "bias.npy"), np.asarray(bias, dtype=np.float64))
+
+    config = {
+        "classes": [str(label) for label in model.classes_],
+        "link": link,
+        "lowercase": params["lowercase"],
+        "token_pattern": params["token_pattern"],
+        "ngram_range": list(params["ngram_range"]),
+        "stop_words_param": params["stop_words"] if isinstance(params["stop_words"], str) else None,
+        "stop_words": sorted(stop_words) if stop_words else [],
+        "binary": params["binary"],
+        "sublinear_tf": params["sublinear_tf"],
+        "norm": params["norm"],
+    }
+    with open(os.path.join(directory, "config.json"), "w") as f:
+        json.dump(config, f, indent=2)
+
+def _load_config(directory):
+    with open(os.path.join(directory, "config.json")) as f:
+        return json.load(f)
+
+class CompactVectorizer:
+    """TF-IDF vectorizer served from a memory-mapped compact artifact, without sklearn."""
+
+    def __init__(self, directory):
+        self.config = _load_config(directory)
+        self.vocab = np.load(os.path.join(directory, "vocab.npy"), mmap_mode="r")
+        self.columns = np.load(os.path.join(directory, "columns.npy"), mmap_mode="r")
+        self.idf_ = np.load(os.path.join(directory, "idf.npy"), mmap_mode="r")
+        self.n_features = len(self.idf_)
+
+        self._token_pattern = re.compile(self.config["token_pattern"])
+        self._stop_words = frozenset(self.config["stop_words"])
+        self._min_n, self._max_n = self.config["ngram_range"]
+
+    def get_params(self):
+        """Returns the analyzer settings under the same names TfidfVectorizer uses."""
+        return {
+            "input": "content", "encoding": "utf-8", "decode_error": "strict", "strip_accents": None,
+            "lowercase": self.config["lowercase"], "preprocessor": None, "tokenizer": None, "analyzer": "word",
+            "stop_words": self.config["stop_words_param"] or (sorted(self._stop_words) or None),
+            "token_pattern": self.config["token_pattern"], "ngram_range": tuple(self.config["ngram_range"]),
+        }
+
+    def analyze(self, text):
+        """Splits text into the word n-grams TfidfVectorizer would produce."""
+        if self.config["lowercase"]:
+            text = text.lower()
+        tokens = [token for token in self._token_pattern.findall(text) if token not in self._stop_words]
+
+        terms = list(tokens) if self._min_n == 1 else []
+        for n in range(max(self._min_n, 2), min(self._max_n, len(tokens)) + 1):
+            terms.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+
+    def build_analyzer(self):
+        return self.analyze
+
+    def transform_analyzed(self, term_lists):
+        """Turns per-document term lists into a normalized TF-IDF CSR matrix."""
+        width = self.vocab.dtype.itemsize
+        doc_ids, encoded = [], []
+        for i, terms in enumerate(term_lists):
+            for term in terms:
+                term = term.encode("utf-8")
+                if len(term) <= width:  # Longer terms cannot be in the vocabulary (and would be truncated)
+                    doc_ids.append(i)
+                    encoded.append(term)
+
+        doc_ids = np.array(doc_ids, dtype=np.int64)
+        encoded = np.array(encoded, dtype=self.vocab.dtype)
+
+        # Vectorized binary search in the sorted, memory-mapped vocabulary
+        positions = np.searchsorted(self.vocab, encoded)
+        positions[positions == len(self.vocab)] = 0
+        found = self.vocab[positions] == encoded
+
+        counts = csr_matrix(
+            (np.ones(int(found.sum())), (doc_ids[found], self.columns[positions[found]])),
+            shape=(len(term_lists), self.n_features),
+        )
+        counts.sum_duplicates()
+
+        if self.config["binary"]:
+            counts.data.fill(1)
+        if self.config["sublinear_tf"]:
+            np.log(counts.data, counts.data)
+            counts.data += 1
+        tfidf = counts @ diags(np.asarray(self.idf_))
+        return normalize_rows(tfidf, self.config["norm"]) if self.config["norm"] else tfidf.tocsr()
+
+    def transform(self, texts):
+        return self.transform_analyzed([self.analyze(text) for text in texts])
+
+class CompactLinearModel:
+    """MultinomialNB / LogisticRegression served as a sparse dot product over memory-mapped weights."""
+
+    def __init__(self, directory):
+        self.config = _load_config(directory)
+        self.classes_ = np.array(self.config["classes"], dtype=object)
+        self.weights = np.load(os.path.join(directory, "weights.npy"), mmap_mode="r")
+        self.bias = np.load(os.path.join(directory, "bias.npy"), mmap_mode="r")
+
+    def predict_proba(self, features):
+        scores = np.asarray(features @ self.weights) + self.bias
+        if self.config["link"] == "ovr":
+            proba = 1.0 / (1.0 + np.exp(-scores))
+        else:
+            proba = np.exp(scores - scores.max(axis=1, keepdims=True))
+        return proba / proba.sum(axis=1, keepdims=True)
+
+if __name__ == "__main__":
+    # Convert the current pickled models into the compact format
+    import pickle
+    from model_registry import (
+        EMAIL_MODEL_PATH, EMAIL_VECTORIZER_PATH, EMAIL_COMPACT_DIR,
+        SENTIMENT_MODEL_PATH, SENTIMENT_VECTORIZER_PATH, SENTIMENT_COMPACT_DIR,
+    )
+
+    for vectorizer_path, model_path, directory in [
+        (EMAIL_VECTORIZER_PATH, EMAIL_MODEL_PATH, EMAIL_COMPACT_DIR),
+        (SENTIMENT_VECTORIZER_PATH, SENTIMENT_MODEL_PATH, SENTIMENT_COMPACT_DIR),
+    ]:
+        with open(vectorizer_path, "rb") as f:
+            vectorizer = pickle.load(f)
+        with open(model_path, "rb") as f:
+            model = pickle.load(f)
+        export_compact(vectorizer, model, directory)
+        print(f"Exported compact model to {directory}")
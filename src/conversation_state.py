@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+
+from metrics import metrics
+from prompt_builder import split_sentences
+
+TOPIC_SIMILARITY = 0.7  # Cosine similarity above which a turn continues an earlier topic and reuses its policy
+MAX_TOPICS = 8  # Retrieved topics remembered per conversation
+RECENT_TURNS = 4  # Turns kept verbatim; older ones are folded into the rolling summary
+MAX_SUMMARY_TOPICS = 8  # Questions kept in the rolling summary (oldest dropped first)
+MAX_CONVERSATIONS = 256
+CONVERSATION_TTL = 2 * 60 * 60  # Seconds an idle conversation's state is kept
+
+def _unit(embedding):
+    embedding = np.asarray(embedding, dtype=np.float32).ravel()
+    norm = np.linalg.norm(embedding)
+    return embedding / norm if norm > 0 else embedding
+
+class ConversationState:
+    """What one chat conversation has retrieved and said so far.
+
+    Each retrieved policy chunk is remembered with the embedding of the question that found it (a topic).
+    A new turn close enough to a remembered topic reuses its chunk instead of searching again, so
+    follow-ups ("how long does that take?") stay grounded in the policy under discussion. Turns beyond
+    the most recent few are folded into a compact summary as they age out, instead of being re-sent.
+    """
+
+    def __init__(self, retrieve=None, embed=None, recent_turns=RECENT_TURNS):
+        self.retrieve = retrieve  # match_policy-like: query -> (chunk_id, document, query_embedding or None)
+        self.embed = embed  # embed_query-like: query -> embedding
+        self.recent = deque()
+        self.recent_limit = recent_turns
+        self.summary = deque(maxlen=MAX_SUMMARY_TOPICS)
+        self.topics = OrderedDict()  # chunk_id -> (unit question embedding, document), least recently used first
+        self.reuses = 0
+        self.searches = 0
+        self._lock = threading.Lock()
+
+    def _retrieve(self, query):
+        if self.retrieve is not None:
+            return self.retrieve(query)
+        from policy_retriever import match_policy
+        return match_policy(query)
+
+    def _embed(self, query):
+        if self.embed is not None:
+            return self.embed(query)
+        from policy_retriever import embed_query
+        return embed_query(query)
+
+    def match(self, query):
+        """Returns (chunk_id, document, query_embedding) like match_policy, reusing a close earlier topic if there is one."""
+        with self._lock:
+            topics = list(self.topics.items())
+
+        if topics:
+            embedding = self._embed(query)
+            similarities = np.stack([topic_embedding for _, (topic_embedding, _) in topics]) @ _unit(embedding)
+            best = int(np.argmax(similarities))
+            if similarities[best] >= TOPIC_SIMILARITY:
+                chunk_id, (_, document) = topics[best]
+                with self._lock:
+                    if chunk_id in self.topics:
+                        self.topics.move_to_end(chunk_id)
+                    self.reuses += 1
+                metrics.increment("chat_topics", path="reused")
+                return chunk_id, document, embedding
+
+        chunk_id, document, embedding = self._retrieve(query)
+        metrics.increment("chat_topics", path="searched")
+        with self._lock:
+            self.searches += 1
+        if chunk_id is not None:
+            if embedding is None:  # Answered lexically; the embedding is needed to recognize follow-ups
+                embedding = self._embed(query)
+            with self._lock:
+                self.topics[chunk_id] = (_unit(embedding), document)
+                self.topics.move_to_end(chunk_id)
+                while len(self.topics) > MAX_TOPICS:
+                    self.topics.popitem(last=False)
+        return chunk_id, document, embedding
+
+    def add_turn(self, user, ai):
+        """Records a finished turn, folding the oldest verbatim turn into the summary once there are too many."""
+        with self._lock:
+            self.recent.append({"user": user, "ai": ai})
+            while len(self.recent) > self.recent_limit:
+                old_turn = self.recent.popleft()
+                self.summary.append((split_sentences(old_turn["user"]) or [""])[0])
+
+    def recent_turns(self):
+        with self._lock:
+            return list(self.recent)
+
+    def summary_topics(self):
+        with self._lock:
+            return list(self.summary)
+
+class ConversationStore:
+    """Bounded, expiring map of conversation id -> ConversationState."""
+
+    def __init__(self, max_conversations=MAX_CONVERSATIONS, ttl=CONVERSATION_TTL, factory=ConversationState, clock=time.monotonic):
+        self.max_conversations = max_conversations
+        self.ttl = ttl
+        self.factory = factory
+        self.clock = clock
+        self._states = OrderedDict()  # conversation id -> (last used, state)
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id, chat_history=None):
+        """Returns the conversation's state, creating it (seeded with stored chat_history turns) if needed."""
+        now = self.clock()
+        with self._lock:
+            entry = self._states.get(conversation_id)
+            if entry is not None and now - entry[0] < self.ttl:
+                state = entry[1]
+            else:
+                state = self.factory()
+                for turn in chat_history or []:  # e.g. a conversation resumed after a restart
+                    state.add_turn(turn["user"], turn["ai"])
+            self._states[conversation_id] = (now, state)
+            self._states.move_to_end(conversation_id)
+            while len(self._states) > self.max_conversations:
+                self._states.popitem(last=False)
+            return state
+
+    def drop(self, conversation_id):
+        with self._lock:
+            self._states.pop(conversation_id, None)
+
+conversations = ConversationStore()
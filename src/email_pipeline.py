@@ -0,0 +1,132 @@
+import asyncio
+import time
+from triage import TriagePipeline
+from policy_retriever import match_policy, match_policies
+from response_generator import astream_response, stream_response
+from response_tiers import select_tier, fast_response, tier_stats
+from metrics import metrics
+
+# Defaults for draining a mailbox backlog
+DEFAULT_CONCURRENCY = 8
+DEFAULT_LLM_TIMEOUT = 30  # seconds
+
+triage_pipeline = TriagePipeline()
+
+def triage_and_match(email_text):
+    """Triages an email, then retrieves its policy within the routes of the predicted category."""
+    triage = triage_pipeline.triage(email_text)
+    return triage, match_policy(email_text, triage["category"], triage["category_confidence"])
+
+def _result(subject, email_text, triage, response, start_time, tier, truncated=False):
+    elapsed = time.time() - start_time
+    tier_stats.record(tier, elapsed)
+    metrics.observe("email", elapsed)
+    return {
+        "subject": subject,
+        "email": email_text,
+        "category": triage["category"],
+        "category_confidence": triage["category_confidence"],
+        "sentiment": triage["sentiment"],
+        "sentiment_confidence": triage["sentiment_confidence"],
+        "response": response,
+        "escalation": triage["escalation"],
+        "tier": tier,
+        "truncated": truncated,  # The LLM stopped mid-reply and the predefined response was appended
+        "time": elapsed,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+async def process_email(email_text, subject="No Subject", llm_timeout=DEFAULT_LLM_TIMEOUT, policy_match=None, triage=None,
+                        on_token=None):
+    """Classifies, analyzes and answers one email.
+
+    triage and policy_match can be precomputed (e.g. from batched triage_batch and match_policies calls).
+    on_token, if given, is called with each piece of the response as it streams in.
+    Confidently classified, calm emails are answered from templates without calling the LLM (see response_tiers).
+    """
+    start_time = time.time()
+
+    if triage is None or policy_match is None:
+        # Triage takes milliseconds and its category narrows the policy search, so it runs first
+        triage, policy_match = await asyncio.to_thread(triage_and_match, email_text)
+
+    tier = select_tier(triage, policy_match)
+    if tier != "llm":
+        response = fast_response(tier, triage["category"], policy_match)
+        if on_token is not None:
+            on_token(response)
+        return _result(subject, email_text, triage, response, start_time, tier)
+
+    parts = []
+    status = {}
+    async for text in astream_response(triage["category"], email_text, policy_match, timeout=llm_timeout, status=status):
+        parts.append(text)
+        if on_token is not None:
+            on_token(text)
+
+    return _result(subject, email_text, triage, "".join(parts).strip(), start_time, tier, status.get("truncated", False))
+
+def stream_email(email_text, subject="No Subject", result=None):
+    """Processes one email synchronously, yielding the response as it streams (e.g. into st.write_stream).
+
+    Once the generator is exhausted, the full result entry is written into the `result` dict.
+    """
+    start_time = time.time()
+    triage, policy_match = triage_and_match(email_text)
+
+    tier = select_tier(triage, policy_match)
+    status = {}
+    if tier != "llm":
+        parts = [fast_response(tier, triage["category"], policy_match)]
+        yield parts[0]
+    else:
+        parts = []
+        for text in stream_response(triage["category"], email_text, policy_match, status):
+            parts.append(text)
+            yield text
+
+    if result is not None:
+        result.update(_result(subject, email_text, triage, "".join(parts).strip(), start_time, tier, status.get("truncated", False)))
+
+async def process_emails(emails, concurrency=DEFAULT_CONCURRENCY, llm_timeout=DEFAULT_LLM_TIMEOUT, on_token=None):
+    """Processes (subject, email_text) pairs concurrently, at most `concurrency` at a time, keeping input order.
+
+    on_token, if given, is called as on_token(index, text) with each streamed piece of each response.
+    """
+    emails = list(emails)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    # One triage batch, then one embedding batch and one index query per route, instead of one per email
+    texts = [email_text for _, email_text in emails]
+    triages = await asyncio.to_thread(triage_pipeline.triage_batch, texts)
+    policy_matches = await asyncio.to_thread(
+        match_policies,
+        texts,
+        [triage["category"] for triage in triages],
+        [triage["category_confidence"] for triage in triages],
+    )
+
+    async def limited(index, subject, email_text, policy_match, triage):
+        token_callback = (lambda text: on_token(index, text)) if on_token is not None else None
+        async with semaphore:
+            return await process_email(email_text, subject, llm_timeout, policy_match, triage, token_callback)
+
+    return await asyncio.gather(*(
+        limited(index, subject, email_text, policy_match, triage)
+        for index, ((subject, email_text), policy_match, triage) in enumerate(zip(emails, policy_matches, triages))
+    ))
+
+if __name__ == "__main__":
+    sample_emails = [
+        ("Refund", "I ordered a product, but it arrived damaged. I want a full refund."),
+        ("Cancel", "How can I cancel my order before it ships?"),
+        ("Payment", "My payment was deducted twice."),
+    ]
+
+    start_time = time.time()
+    results = asyncio.run(process_emails(sample_emails))
+    for result in results:
+        print(f"{result['subject']}: {result['category']} / {result['sentiment']} via {result['tier']} ({result['time']:.2f} sec)")
+    print(f"Processed {len(results)} emails in {time.time() - start_time:.2f} sec")
+    for tier, stats in tier_stats.report().items():
+        print(f"{tier}: {stats}")
@@ -0,0 +1,173 @@
+import os
+import time
+
+import numpy as np
+
+# ONNX exports of all-mpnet-base-v2 published alongside the PyTorch weights
+ONNX_FILES = {
+    "onnx": "onnx/model.onnx",
+    "onnx-int8": "onnx/model_quint8_avx2.onnx",  # Dynamically quantized int8 weights, for any AVX2 CPU
+}
+MAX_SEQ_LENGTH = 384  # Same truncation as the SentenceTransformer model
+
+def mean_pool(token_embeddings, attention_mask):
+    """Averages token embeddings over the non-padding positions, as the SentenceTransformer pooling layer does."""
+    mask = attention_mask[..., None].astype(np.float32)
+    return (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+def normalize(embeddings):
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.clip(norms, 1e-12, None)
+
+class OnnxSentenceEncoder:
+    """Runs a sentence-transformers model exported to ONNX with ONNX Runtime, without PyTorch.
+
+    encode() mirrors SentenceTransformer.encode: a string gives one vector, a list gives a 2-D array.
+    """
+
+    def __init__(self, session, tokenizer):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.input_names = {model_input.name for model_input in session.get_inputs()}
+
+    @classmethod
+    def from_pretrained(cls, model_name, file_name, threads=0):
+        """Downloads (or reuses the cached) ONNX export and tokenizer of a Hugging Face model."""
+        import onnxruntime
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = onnxruntime.InferenceSession(
+            hf_hub_download(model_name, file_name), options, providers=["CPUExecutionProvider"]
+        )
+
+        tokenizer = Tokenizer.from_file(hf_hub_download(model_name, "tokenizer.json"))
+        tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        pad_token = (tokenizer.padding or {}).get("pad_token", "<pad>")
+        tokenizer.enable_padding(pad_id=tokenizer.token_to_id(pad_token), pad_token=pad_token)  # Pad to the longest in batch
+        return cls(session, tokenizer)
+
+    def _encode_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(inputs["input_ids"])
+        inputs = {name: value for name, value in inputs.items() if name in self.input_names}
+
+        token_embeddings = self.session.run(None, inputs)[0]
+        return normalize(mean_pool(token_embeddings, inputs["attention_mask"]))
+
+    def encode(self, sentences, batch_size=32):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # Sorting by length keeps padding (and wasted compute) per batch small
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        sorted_embeddings = np.concatenate([
+            self._encode_batch([texts[i] for i in order[start:start + batch_size]])
+            for start in range(0, len(texts), batch_size)
+        ]).astype(np.float32)
+
+        embeddings = np.empty_like(sorted_embeddings)
+        embeddings[order] = sorted_embeddings
+        return embeddings[0] if single else embeddings
+
+def load_embedding_model(model_name, backend="torch", threads=0):
+    """Returns a sentence encoder for the given backend: "torch" (SentenceTransformer), "onnx" or "onnx-int8"."""
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name)
+    if backend in ONNX_FILES:
+        return OnnxSentenceEncoder.from_pretrained(model_name, ONNX_FILES[backend], threads)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+def compare_encoders(reference, candidate, queries, corpus_embeddings, k=3, repeats=3):
+    """Compares a candidate encoder against a reference on latency, embedding similarity and top-k retrieval.
+
+    corpus_embeddings are the indexed chunk embeddings the top-k results are computed against.
+    """
+    report = {}
+    encoded = {}
+    for name, encoder in (("reference", reference), ("candidate", candidate)):
+        encoder.encode(queries[:1])  # Warm up
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            for query in queries:
+                encoder.encode(query)
+        single = (time.perf_counter() - start_time) / (repeats * len(queries))
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            encoded[name] = np.asarray(encoder.encode(queries), dtype=np.float32)
+        batch = (time.perf_counter() - start_time) / (repeats * len(queries))
+
+        report[name] = {"ms_per_query": round(single * 1000, 2), "ms_per_query_batched": round(batch * 1000, 2)}
+
+    similarities = np.sum(normalize(encoded["reference"]) * normalize(encoded["candidate"]), axis=1)
+    corpus = np.asarray(corpus_embeddings, dtype=np.float32)
+    top_reference = np.argsort(-(encoded["reference"] @ corpus.T), axis=1)[:, :k]
+    top_candidate = np.argsort(-(encoded["candidate"] @ corpus.T), axis=1)[:, :k]
+
+    report["accuracy"] = {
+        "mean_cosine": round(float(similarities.mean()), 4),
+        "min_cosine": round(float(similarities.min()), 4),
+        "top1_agreement": round(float(np.mean(top_reference[:, 0] == top_candidate[:, 0])), 4),
+        "top_k_overlap": round(float(np.mean([
+            len(set(a) & set(b)) / k for a, b in zip(top_reference, top_candidate)
+        ])), 4),
+    }
+    report["speedup"] = round(report["reference"]["ms_per_query"] / max(report["candidate"]["ms_per_query"], 1e-9), 2)
+    return report
+
+if __name__ == "__main__":
+    # Benchmark an ONNX backend against the PyTorch SentenceTransformer on the indexed policy corpus
+    import argparse
+    from model_registry import registry, current_rss, EMBEDDING_MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="Compare embedding backends for latency, memory and accuracy.")
+    parser.add_argument("--backend", default="onnx-int8", choices=sorted(ONNX_FILES))
+    parser.add_argument("--threads", type=int, default=int(os.getenv("EMBEDDING_THREADS", "0")))
+    args = parser.parse_args()
+
+    sample_queries = [
+        "I ordered a product, but it arrived damaged. I want a full refund.",
+        "How can I cancel my order before it ships?",
+        "My payment was deducted twice.",
+        "how to contact company?",
+        "When will I get my refund after cancellation?",
+        "Can I exchange a product for a different size?",
+        "How long do you keep my personal data?",
+        "Who is the grievance officer?",
+        "How do I join the influencer marketing program?",
+        "My account was suspended without notice.",
+    ]
+    corpus = registry.get("policy_collection").get(include=["embeddings"])["embeddings"]
+
+    rss_start = current_rss()
+    candidate = load_embedding_model(EMBEDDING_MODEL_NAME, args.backend, args.threads)
+    candidate.encode("warm up")
+    rss_candidate = current_rss()
+    reference = load_embedding_model(EMBEDDING_MODEL_NAME, "torch", args.threads)
+    reference.encode("warm up")
+    rss_reference = current_rss()
+
+    report = compare_encoders(reference, candidate, sample_queries, corpus)
+    if rss_start is not None:
+        report["candidate"]["rss_mb"] = round((rss_candidate - rss_start) / 2**20, 1)
+        report["reference"]["rss_mb"] = round((rss_reference - rss_candidate) / 2**20, 1)
+    for name, stats in report.items():
+        print(f"{name}: {stats}")
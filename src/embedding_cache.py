@@ -0,0 +1,162 @@
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+def normalize_query(query):
+    """Normalizes query text so trivially different spellings share one cache entry."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+class QueryEmbeddingCache:
+    """Bounded LRU cache of query embeddings with an optional persistent SQLite tier.
+
+    The SQLite tier keeps at most max_disk_rows embeddings per namespace, deleting the oldest first.
+    """
+
+    def __init__(self, max_size=1024, path=None, namespace="default", max_disk_rows=100_000):
+        self.max_size = max_size
+        self.max_disk_rows = max_disk_rows
+        self.namespace = namespace  # e.g. the embedding model name, so models never share vectors
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "namespace TEXT, query TEXT, embedding BLOB, PRIMARY KEY (namespace, query))"
+            )
+            self._db.commit()
+
+    def _remember(self, key, embedding):
+        self._entries[key] = embedding
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _load(self, key):
+        row = self._db.execute(
+            "SELECT embedding FROM query_embeddings WHERE namespace = ? AND query = ?",
+            (self.namespace, key),
+        ).fetchone()
+        return None if row is None else np.frombuffer(row[0], dtype=np.float32)
+
+    def _trim(self):
+        # INSERT OR REPLACE gives a rewritten row a new rowid, so rowid order is insertion order
+        self._db.execute(
+            "DELETE FROM query_embeddings WHERE rowid IN ("
+            "SELECT rowid FROM query_embeddings WHERE namespace = ? ORDER BY rowid DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.max_disk_rows),
+        )
+
+    def _store(self, items):
+        """Writes (key, embedding) pairs to the SQLite tier in one transaction."""
+        self._db.executemany(
+            "INSERT OR REPLACE INTO query_embeddings (namespace, query, embedding) VALUES (?, ?, ?)",
+            [(self.namespace, key, embedding.tobytes()) for key, embedding in items],
+        )
+        self._trim()
+        self._db.commit()
+
+    def get(self, query, encode):
+        """Returns the embedding for a query, calling encode(query) only on a cache miss."""
+        key = normalize_query(query)
+
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return embedding
+
+            if self._db is not None:
+                embedding = self._load(key)
+                if embedding is not None:
+                    self.disk_hits += 1
+                    self._remember(key, embedding)
+                    return embedding
+
+        # Encode outside the lock so concurrent misses do not serialize on the model
+        embedding = np.asarray(encode(key), dtype=np.float32)
+        embedding.setflags(write=False)
+
+        with self._lock:
+            self.misses += 1
+            self._remember(key, embedding)
+            if self._db is not None:
+                self._store([(key, embedding)])
+        return embedding
+
+    def get_many(self, queries, encode_batch):
+        """Returns an (n_queries, dim) array of embeddings, encoding all cache misses in one encode_batch(texts) call."""
+        keys = [normalize_query(query) for query in queries]
+        found = {}
+
+        with self._lock:
+            for key in keys:
+                if key in found:
+                    continue
+                embedding = self._entries.get(key)
+                if embedding is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                elif self._db is not None:
+                    embedding = self._load(key)
+                    if embedding is not None:
+                        self.disk_hits += 1
+                        self._remember(key, embedding)
+                if embedding is not None:
+                    found[key] = embedding
+
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+        if missing:
+            embeddings = np.asarray(encode_batch(missing), dtype=np.float32)
+            with self._lock:
+                for key, embedding in zip(missing, embeddings):
+                    embedding = embedding.copy()
+                    embedding.setflags(write=False)
+                    found[key] = embedding
+                    self.misses += 1
+                    self._remember(key, embedding)
+                if self._db is not None:
+                    self._store((key, found[key]) for key in missing)
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def clear(self):
+        """Drops all in-memory and on-disk entries for this cache's namespace."""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM query_embeddings WHERE namespace = ?", (self.namespace,))
+                self._db.commit()
+
+    def close(self):
+        """Closes the on-disk tier."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self):
+        """Returns hit/miss counters and the current in-memory size."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
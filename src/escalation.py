@@ -0,0 +1,14 @@
+def escalate_to_human(category, category_confidence, sentiment, sentiment_confidence):
+    """Determines if a case needs to be escalated to human support."""
+    
+    # Categories that require more human oversight
+    CRITICAL_CATEGORIES = {"REFUND", "CANCEL", "PAYMENT"}
+    
+    if category_confidence < 0.5 and sentiment_confidence < 0.5:
+        return True  
+
+    # Escalate if the query falls into a critical category with negative sentiment
+    if category in CRITICAL_CATEGORIES and sentiment == "negative":
+        return True
+
+    return False
@@ -0,0 +1,192 @@
+import atexit
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from model_registry import registry
+
+HISTORY_DB_PATH = "../data/history.sqlite"
+WRITE_BATCH_SIZE = 32  # Pending entries written in one transaction
+FLUSH_INTERVAL = 2.0  # Seconds an entry may wait for its batch before being written anyway
+
+EMAIL_COLUMNS = (
+    "id", "timestamp", "subject", "email", "category", "category_confidence", "sentiment",
+    "sentiment_confidence", "response", "escalation", "tier", "time", "feedback",
+)
+CHAT_COLUMNS = ("conversation_id", "timestamp", "user", "ai")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS emails (
+    id TEXT PRIMARY KEY, timestamp TEXT, subject TEXT, email TEXT, category TEXT, category_confidence REAL,
+    sentiment TEXT, sentiment_confidence REAL, response TEXT, escalation INTEGER, tier TEXT, time REAL, feedback TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_emails_timestamp ON emails (timestamp);
+CREATE INDEX IF NOT EXISTS idx_emails_category ON emails (category, timestamp);
+CREATE INDEX IF NOT EXISTS idx_emails_escalation ON emails (escalation, timestamp);
+CREATE TABLE IF NOT EXISTS chat_turns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, conversation_id TEXT, timestamp TEXT, user TEXT, ai TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_chat_turns_conversation ON chat_turns (conversation_id, id);
+"""
+
+class HistoryStore:
+    """Durable email and chat history in SQLite, written in batches and read back page by page.
+
+    Entries are queued and written together once WRITE_BATCH_SIZE are pending or the oldest has waited
+    FLUSH_INTERVAL seconds; every read flushes first, so readers always see their own writes.
+    """
+
+    def __init__(self, path=HISTORY_DB_PATH, batch_size=WRITE_BATCH_SIZE, flush_interval=FLUSH_INTERVAL, clock=time.monotonic):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._pending_emails = []
+        self._pending_turns = []
+        self._oldest_pending = None
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")  # Readers do not block the batched writer
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    def _queue(self, pending, row):
+        with self._lock:
+            pending.append(row)
+            if self._oldest_pending is None:
+                self._oldest_pending = self.clock()
+            due = (
+                len(self._pending_emails) + len(self._pending_turns) >= self.batch_size
+                or self.clock() - self._oldest_pending >= self.flush_interval
+            )
+            if due:
+                self._flush()
+
+    def _flush(self):
+        if not self._pending_emails and not self._pending_turns:
+            return
+        with self._db:  # One transaction per batch
+            if self._pending_emails:
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO emails ({', '.join(EMAIL_COLUMNS)}) VALUES ({', '.join('?' * len(EMAIL_COLUMNS))})",
+                    self._pending_emails,
+                )
+            if self._pending_turns:
+                self._db.executemany(
+                    f"INSERT INTO chat_turns ({', '.join(CHAT_COLUMNS)}) VALUES ({', '.join('?' * len(CHAT_COLUMNS))})",
+                    self._pending_turns,
+                )
+        self._pending_emails = []
+        self._pending_turns = []
+        self._oldest_pending = None
+
+    def flush(self):
+        """Writes all pending entries now."""
+        with self._lock:
+            self._flush()
+
+    def add_email(self, entry):
+        """Queues a processed email result (as built by email_pipeline) and returns its id."""
+        entry.setdefault("id", uuid.uuid4().hex)
+        entry.setdefault("feedback", None)
+        row = [entry.get(column) for column in EMAIL_COLUMNS]
+        row[EMAIL_COLUMNS.index("escalation")] = int(bool(entry.get("escalation")))
+        row = [value.item() if hasattr(value, "item") else value for value in row]  # NumPy scalars from the models
+        self._queue(self._pending_emails, row)
+        return entry["id"]
+
+    def set_feedback(self, entry_id, feedback):
+        """Records agent feedback ("helpful" / "not helpful") on a stored email."""
+        with self._lock:
+            self._flush()
+            with self._db:
+                self._db.execute("UPDATE emails SET feedback = ? WHERE id = ?", (feedback, entry_id))
+
+    @staticmethod
+    def _where(category=None, escalation=None, since=None, until=None, search=None):
+        clauses, params = [], []
+        if category:
+            clauses.append("category = ?")
+            params.append(category)
+        if escalation is not None:
+            clauses.append("escalation = ?")
+            params.append(int(escalation))
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        if search:
+            clauses.append("(subject LIKE ? OR email LIKE ?)")
+            params += [f"%{search}%"] * 2
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query_emails(self, limit=20, offset=0, **filters):
+        """Returns one page of emails, newest first, matching the filters.
+
+        Filters: category, escalation (True/False), since/until ("YYYY-MM-DD[ HH:MM:SS]", until exclusive)
+        and search (substring of the subject or body).
+        """
+        where, params = self._where(**filters)
+        with self._lock:
+            self._flush()
+            rows = self._db.execute(
+                f"SELECT * FROM emails{where} ORDER BY timestamp DESC, rowid DESC LIMIT ? OFFSET ?", params + [limit, offset]
+            ).fetchall()
+        return [{**dict(row), "escalation": bool(row["escalation"])} for row in rows]
+
+    def count_emails(self, **filters):
+        where, params = self._where(**filters)
+        with self._lock:
+            self._flush()
+            return self._db.execute(f"SELECT COUNT(*) FROM emails{where}", params).fetchone()[0]
+
+    def categories(self):
+        """Returns the distinct categories in the history, for filter menus."""
+        with self._lock:
+            self._flush()
+            return [row[0] for row in self._db.execute("SELECT DISTINCT category FROM emails WHERE category IS NOT NULL ORDER BY category")]
+
+    def add_chat_turn(self, conversation_id, user, ai):
+        self._queue(self._pending_turns, (conversation_id, time.strftime("%Y-%m-%d %H:%M:%S"), user, ai))
+
+    def chat_turns(self, conversation_id, limit=None, offset=0):
+        """Returns a conversation's turns ({"user", "ai", "timestamp"}) oldest first, skipping the `offset` most recent
+        and keeping at most `limit` of the ones before them.
+        """
+        with self._lock:
+            self._flush()
+            rows = self._db.execute(
+                "SELECT user, ai, timestamp FROM chat_turns WHERE conversation_id = ? ORDER BY id DESC LIMIT ? OFFSET ?",
+                (conversation_id, -1 if limit is None else limit, offset),
+            ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def count_chat_turns(self, conversation_id):
+        with self._lock:
+            self._flush()
+            return self._db.execute("SELECT COUNT(*) FROM chat_turns WHERE conversation_id = ?", (conversation_id,)).fetchone()[0]
+
+    def close(self):
+        """Writes pending entries and closes the database."""
+        with self._lock:
+            if self._db is not None:
+                self._flush()
+                self._db.close()
+                self._db = None
+
+def _load_history_store():
+    store = HistoryStore(HISTORY_DB_PATH)
+    atexit.register(store.close)  # Entries still waiting for their batch are written on shutdown
+    return store
+
+registry.register("history_store", _load_history_store)
+
+def get_history_store():
+    return registry.get("history_store")
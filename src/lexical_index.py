@@ -0,0 +1,185 @@
+import json
+import math
+import os
+import re
+import threading
+
+import numpy as np
+
+from retrieval_backends import matches_route, route_key
+
+# Common English words that carry no policy meaning
+STOP_WORDS = frozenset("""
+a about above after again all am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers him his
+how i if in into is it its itself just me more most my myself no nor not now of off on once only or other our
+ours out over own same she should so some such than that the their theirs them then there these they this those
+through to too under until up very was we were what when where which while who whom why will with would you
+your yours please hi hello thanks thank
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    """Lowercases text and splits it into stop-word-free terms, folding simple plurals ("refunds" -> "refund")."""
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if len(token) < 2 or token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+class BM25Index:
+    """Okapi BM25 inverted index over policy chunks and their section titles.
+
+    Scores are reported normalized to [0, 1]: the raw BM25 score divided by the score a chunk would reach
+    if every query term were a saturated, corpus-unique match. Queries of rare, specific policy terms
+    therefore score high, while matches on common words ("order") stay low, so the score can serve as
+    a lexical confidence.
+    """
+
+    def __init__(self, ids, documents, metadatas, postings, doc_lengths, k1=1.5, b=0.75):
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas)
+        self.postings = postings  # term -> [[chunk index, term frequency], ...]
+        self.k1 = k1
+        self.b = b
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        self.avg_length = float(self.doc_lengths.mean()) if len(self.doc_lengths) else 0.0
+
+        self._route_masks = {}  # route key -> boolean mask of the chunks inside the route
+
+        # term -> (chunk indices, BM25 term weight per chunk), precomputed once so queries are a few array adds
+        self._terms = {}
+        n_docs = len(self.ids)
+        for term, entries in postings.items():
+            entries = np.asarray(entries, dtype=np.int64).reshape(-1, 2)
+            docs, tfs = entries[:, 0], entries[:, 1].astype(np.float32)
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / self.avg_length)
+            self._terms[term] = (docs, self._idf(len(docs), n_docs) * tfs * (self.k1 + 1) / (tfs + norm))
+
+    @staticmethod
+    def _idf(doc_freq, n_docs):
+        return math.log(1 + (n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    @classmethod
+    def build(cls, records, k1=1.5, b=0.75):
+        """Builds the index from (chunk_id, chunk, metadata) records, indexing the section title with each chunk."""
+        ids, documents, metadatas, doc_lengths = [], [], [], []
+        postings = {}
+        for i, (chunk_id, chunk, metadata) in enumerate(records):
+            terms = tokenize(f"{(metadata or {}).get('section', '')} {chunk}")
+            counts = {}
+            for term in terms:
+                counts[term] = counts.get(term, 0) + 1
+            for term, count in counts.items():
+                postings.setdefault(term, []).append([i, count])
+
+            ids.append(chunk_id)
+            documents.append(chunk)
+            metadatas.append(metadata)
+            doc_lengths.append(len(terms))
+
+        return cls(ids, documents, metadatas, postings, doc_lengths, k1, b)
+
+    def save(self, path):
+        """Atomically writes the index as JSON."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        data = {
+            "k1": self.k1, "b": self.b,
+            "ids": self.ids, "documents": self.documents, "metadatas": self.metadatas,
+            "doc_lengths": self.doc_lengths.astype(int).tolist(), "postings": self.postings,
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(data["ids"], data["documents"], data["metadatas"], data["postings"], data["doc_lengths"], data["k1"], data["b"])
+
+    def _route_mask(self, route):
+        key = route_key(route)
+        mask = self._route_masks.get(key)
+        if mask is None:
+            mask = self._route_masks[key] = np.array([matches_route(metadata, route) for metadata in self.metadatas], dtype=bool)
+        return mask
+
+    def query(self, text, k=3, route=None):
+        """Returns up to k hits ({"id", "document", "metadata", "score"}) ranked best first; chunks sharing no term are left out.
+
+        With a route, only chunks inside it are considered.
+        """
+        terms = list(dict.fromkeys(tokenize(text)))
+        if not terms or not self.ids:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in terms:
+            if term in self._terms:
+                docs, weights = self._terms[term]
+                scores[docs] += weights
+        if route:
+            scores[~self._route_mask(route)] = 0
+
+        max_score = len(terms) * self._idf(1, len(self.ids)) * (self.k1 + 1)
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            {"id": self.ids[i], "document": self.documents[i], "metadata": self.metadatas[i], "score": float(scores[i] / max_score)}
+            for i in top
+        ]
+
+class BM25Backend:
+    """Serves the BM25 index file written by pdf_processor, reloading it whenever version_fn() changes."""
+
+    name = "bm25"
+
+    def __init__(self, path, version_fn=None):
+        self.path = path
+        self.version_fn = version_fn
+        self._version = object()  # Forces a load on first query
+        self._index = None
+        self._lock = threading.Lock()
+
+    def index(self):
+        """Returns the current BM25Index, or None if no index has been built yet."""
+        version = self.version_fn() if self.version_fn else None
+        if version == self._version:
+            return self._index
+
+        with self._lock:
+            if version != self._version:
+                try:
+                    self._index = BM25Index.load(self.path)
+                except FileNotFoundError:
+                    self._index = None
+                self._version = version
+            return self._index
+
+    def query(self, texts, k=3, route=None):
+        """Returns, per query text, up to k lexical hits ranked best first (empty lists without an index)."""
+        index = self.index()
+        return [index.query(text, k, route) if index is not None else [] for text in texts]
+
+if __name__ == "__main__":
+    # Time keyword lookups against the index built by pdf_processor
+    import time
+    from pdf_processor import LEXICAL_INDEX_PATH
+
+    index = BM25Index.load(LEXICAL_INDEX_PATH)
+    for query in ["instant refund", "grievance officer", "influencer", "where is my order"]:
+        start_time = time.perf_counter()
+        hits = index.query(query)
+        elapsed = (time.perf_counter() - start_time) * 1000
+        print(f"{query}: {[(hit['id'], round(hit['score'], 3)) for hit in hits]} ({elapsed:.2f} ms)")
@@ -0,0 +1,374 @@
+import asyncio
+import random
+import threading
+import time
+
+# HTTP status codes worth retrying: rate limited, or a transient server-side failure
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+_END = object()  # Marks the end of a stream
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the provider while the circuit breaker is open."""
+
+class LLMMessage:
+    """Minimal chat message, so stub replies look like LangChain's (a .content attribute)."""
+
+    def __init__(self, content):
+        self.content = content
+
+def is_retryable(error):
+    """Returns True for rate limits, timeouts, connection errors and 5xx responses."""
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    name = type(error).__name__
+    return any(marker in name for marker in ("RateLimit", "Timeout", "Connection"))
+
+def retry_after(error):
+    """Returns the Retry-After delay (seconds) a provider sent with an error, if any."""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` tokens refill per second, up to `capacity` (the allowed burst)."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """Takes `amount` tokens (capped at capacity) and returns how long the caller must wait before proceeding."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount  # May go negative: later callers queue up behind this one
+            return max(0.0, -self.tokens / self.rate)
+
+    def release(self, amount=1):
+        """Gives back tokens reserved by a caller that gave up waiting, so the callers behind it do not inherit its debt."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def acquire(self, amount=1, sleep=time.sleep):
+        wait = self.reserve(amount)
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+    async def aacquire(self, amount=1):
+        wait = self.reserve(amount)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:  # e.g. the caller's deadline passed while queued
+                self.release(amount)
+                raise
+        return wait
+
+class CircuitBreaker:
+    """Stops calling a failing provider for `reset_timeout` seconds after `failure_threshold` failures in a row.
+
+    After the timeout one trial call is let through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.opens = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if self.clock() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self):
+        """Returns True if a call may go to the provider now."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            # A failed trial re-opens the circuit; in-flight failures while open do not extend it
+            if self._trial_running or (self.opened_at is None and self.failures >= self.failure_threshold):
+                self.opened_at = self.clock()
+                self.opens += 1
+            self._trial_running = False
+
+class ResilientLLM:
+    """Wraps a chat model (ChatGroq or a stub) with rate limiting, retries, a circuit breaker, timeouts and hedging.
+
+    Exposes the same invoke / ainvoke / stream / astream methods as the wrapped model. Retries use
+    exponential backoff with jitter (honouring Retry-After); streams are only retried before their first
+    chunk. With hedge_after set, ainvoke and astream send a second request if the first has not answered
+    (or sent its first chunk) by then, and use whichever responds first. timeout bounds async calls and stalls between stream chunks;
+    sync calls rely on the provider's own request timeout.
+    """
+
+    def __init__(self, provider, request_limiter=None, token_limiter=None, breaker=None, max_retries=3,
+                 backoff=0.5, max_backoff=8.0, timeout=30.0, hedge_after=None, token_counter=None,
+                 sleep=time.sleep):
+        self.provider = provider
+        self.request_limiter = request_limiter
+        self.token_limiter = token_limiter
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.token_counter = token_counter or (lambda prompt: len(prompt) // 4)
+        self.sleep = sleep
+        self.calls = 0
+        self.retries = 0
+        self.hedges = 0
+        self.failures = 0
+        self.throttled_sec = 0.0
+        self._lock = threading.Lock()
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def _check_circuit(self):
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM circuit breaker is open; skipping the provider call.")
+        self._count("calls")
+
+    def _delay(self, attempt, error):
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+        return max(delay, retry_after(error) or 0.0)
+
+    def _should_retry(self, error, attempt):
+        """Records a failed attempt and returns whether another one should be made."""
+        if isinstance(error, CircuitOpenError):
+            return False
+        if not is_retryable(error):
+            self.breaker.record_success()  # e.g. a bad request: the provider is up, retrying would not help
+            return False
+        self.breaker.record_failure()
+        self._count("failures")
+        if attempt >= self.max_retries:
+            return False
+        self._count("retries")
+        return True
+
+    def _throttle(self, prompt):
+        wait = self.request_limiter.acquire(1, self.sleep) if self.request_limiter else 0.0
+        if self.token_limiter:
+            wait += self.token_limiter.acquire(self.token_counter(prompt), self.sleep)
+        self._count("throttled_sec", wait)
+
+    async def _athrottle(self, prompt):
+        wait = await self.request_limiter.aacquire(1) if self.request_limiter else 0.0
+        if self.token_limiter:
+            try:
+                wait += await self.token_limiter.aacquire(self.token_counter(prompt))
+            except asyncio.CancelledError:  # The request never went out, so its request slot is returned too
+                if self.request_limiter:
+                    self.request_limiter.release(1)
+                raise
+        self._count("throttled_sec", wait)
+
+    def invoke(self, prompt):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._check_circuit()
+                self._throttle(prompt)
+                response = self.provider.invoke(prompt)
+                self.breaker.record_success()
+                return response
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                self.sleep(self._delay(attempt, e))
+
+    def stream(self, prompt):
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                self._check_circuit()
+                self._throttle(prompt)
+                for chunk in self.provider.stream(prompt):
+                    started = True
+                    yield chunk
+                self.breaker.record_success()
+                return
+            except Exception as e:
+                # Output already sent cannot be taken back, so a failure mid-stream is final
+                if not self._should_retry(e, self.max_retries if started else attempt):
+                    raise
+                self.sleep(self._delay(attempt, e))
+
+    async def _ainvoke_once(self, prompt):
+        self._check_circuit()
+        await self._athrottle(prompt)
+        return await asyncio.wait_for(self.provider.ainvoke(prompt), self.timeout)
+
+    async def _open_stream(self, prompt):
+        """Starts a provider stream and waits for its first chunk; returns (chunk iterator, first chunk or _END)."""
+        self._check_circuit()
+        await self._athrottle(prompt)
+        chunks = self.provider.astream(prompt).__aiter__()
+        try:
+            first = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+        except StopAsyncIteration:
+            first = _END
+        except BaseException:
+            await chunks.aclose()
+            raise
+        return chunks, first
+
+    async def _hedged(self, call, discard=None):
+        """Runs call(), plus a hedge call if the first is still pending after hedge_after seconds, and returns the
+        first successful result. discard(result) cleans up a result that lost the race (e.g. closes its stream).
+        """
+        if not self.hedge_after:
+            return await call()
+
+        pending = {asyncio.ensure_future(call())}
+        done, pending = await asyncio.wait(pending, timeout=self.hedge_after)
+        if not done:
+            self._count("hedges")
+            pending.add(asyncio.ensure_future(call()))
+
+        winner, error = None, None
+        try:
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+            if discard is not None:
+                for task in done:
+                    if task is not winner and not task.cancelled() and task.exception() is None:
+                        await discard(task.result())
+
+    async def ainvoke(self, prompt):
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._hedged(lambda: self._ainvoke_once(prompt))
+                self.breaker.record_success()
+                return response
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                await asyncio.sleep(self._delay(attempt, e))
+
+    async def astream(self, prompt):
+        for attempt in range(self.max_retries + 1):
+            started = False
+            try:
+                # Hedging races the first chunk; the losing stream is closed and the winner streams on
+                chunks, chunk = await self._hedged(lambda: self._open_stream(prompt), discard=lambda opened: opened[0].aclose())
+                try:
+                    while chunk is not _END:
+                        started = True
+                        yield chunk
+                        try:
+                            # A stalled stream counts as a timeout, so it is retried if nothing was sent yet
+                            chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+                        except StopAsyncIteration:
+                            chunk = _END
+                finally:
+                    await chunks.aclose()
+                self.breaker.record_success()
+                return
+            except Exception as e:
+                if not self._should_retry(e, self.max_retries if started else attempt):
+                    raise
+                await asyncio.sleep(self._delay(attempt, e))
+
+    def stats(self):
+        """Returns call, retry, hedge and failure counters, time spent rate limited, and the circuit state."""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "hedges": self.hedges,
+                "failures": self.failures,
+                "throttled_sec": round(self.throttled_sec, 3),
+                "circuit": self.breaker.state,
+                "circuit_opens": self.breaker.opens,
+            }
+
+class StubLLM:
+    """Local provider that answers without any network call, for tests and offline benchmarks.
+
+    reply(prompt) builds the answer (a short acknowledgement by default); latency adds a delay per call,
+    and the first `failures` calls raise ConnectionError to exercise retries.
+    """
+
+    def __init__(self, reply=None, latency=0.0, failures=0):
+        self.reply = reply or (lambda prompt: "Thank you for reaching out. We have received your request and will help you shortly.")
+        self.latency = latency
+        self.failures = failures
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _next(self, prompt):
+        with self._lock:
+            self.calls += 1
+            if self.calls <= self.failures:
+                raise ConnectionError("Stub LLM transient failure")
+        return self.reply(prompt)
+
+    @staticmethod
+    def _pieces(text):
+        words = text.split(" ")
+        return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+
+    def invoke(self, prompt):
+        time.sleep(self.latency)
+        return LLMMessage(self._next(prompt))
+
+    async def ainvoke(self, prompt):
+        await asyncio.sleep(self.latency)
+        return LLMMessage(self._next(prompt))
+
+    def stream(self, prompt):
+        time.sleep(self.latency)
+        for piece in self._pieces(self._next(prompt)):
+            yield LLMMessage(piece)
+
+    async def astream(self, prompt):
+        await asyncio.sleep(self.latency)
+        for piece in self._pieces(self._next(prompt)):
+            yield LLMMessage(piece)
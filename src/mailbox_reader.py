@@ -0,0 +1,95 @@
+import csv
+import json
+import mailbox
+import os
+
+# Column / field names tried, in order, when the input does not say which one holds the email body
+TEXT_FIELDS = ("email", "body", "text", "instruction")
+SUBJECT_FIELDS = ("subject",)
+
+def _pick(fields, candidates, explicit=None):
+    if explicit:
+        return explicit
+    for name in candidates:
+        if name in fields:
+            return name
+    return None
+
+def read_csv(path, text_field=None, subject_field=None):
+    """Yields (subject, email_text) pairs from a CSV file, one row at a time."""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        text_field = _pick(reader.fieldnames or [], TEXT_FIELDS, text_field)
+        subject_field = _pick(reader.fieldnames or [], SUBJECT_FIELDS, subject_field)
+        if text_field is None:
+            raise ValueError(f"No email text column found in {path}; expected one of {TEXT_FIELDS}.")
+
+        for row in reader:
+            subject = row.get(subject_field) if subject_field else None
+            yield subject or "No Subject", row[text_field] or ""
+
+def read_jsonl(path, text_field=None, subject_field=None):
+    """Yields (subject, email_text) pairs from a JSON Lines file, one record at a time."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            field = _pick(record, TEXT_FIELDS, text_field)
+            if field is None:
+                raise ValueError(f"No email text field found in record: {line.strip()[:80]}")
+            subject = record.get(_pick(record, SUBJECT_FIELDS, subject_field)) or "No Subject"
+            yield subject, record[field] or ""
+
+def _message_text(message):
+    """Returns the plain-text body of an email message."""
+    if message.is_multipart():
+        parts = [part for part in message.walk() if part.get_content_type() == "text/plain"]
+        return "\n".join(_message_text(part) for part in parts)
+
+    payload = message.get_payload(decode=True)
+    if payload is None:
+        return message.get_payload() or ""
+    return payload.decode(message.get_content_charset() or "utf-8", errors="replace")
+
+def read_mbox(path, text_field=None, subject_field=None):
+    """Yields (subject, email_text) pairs from an mbox mailbox, one message at a time."""
+    for message in mailbox.mbox(path, create=False):
+        yield message["subject"] or "No Subject", _message_text(message).strip()
+
+READERS = {
+    ".csv": read_csv,
+    ".jsonl": read_jsonl,
+    ".json": read_jsonl,
+    ".mbox": read_mbox,
+}
+
+def read_emails(path, text_field=None, subject_field=None):
+    """Streams (subject, email_text) pairs from a CSV, JSONL or mbox file, chosen by extension."""
+    extension = os.path.splitext(path)[1].lower()
+    reader = READERS.get(extension, read_mbox)  # mbox files often come without an extension
+    return reader(path, text_field, subject_field)
+
+def completed_count(output_path):
+    """Returns how many results an earlier run already wrote, dropping a partially written last line."""
+    if not os.path.exists(output_path):
+        return 0
+
+    count = 0
+    valid_size = 0
+    with open(output_path, "rb") as f:
+        for line in f:
+            try:
+                json.loads(line)
+            except ValueError:
+                break
+            if not line.endswith(b"\n"):
+                break
+            count += 1
+            valid_size += len(line)
+
+    # Cut off whatever a crash left behind after the last complete result
+    if valid_size != os.path.getsize(output_path):
+        with open(output_path, "r+b") as f:
+            f.truncate(valid_size)
+    return count
@@ -1,18 +1,33 @@
+import datetime
+import uuid
 import streamlit as st
-import time
-from classification import classify_email
-from sentiment_analysis import analyze_sentiment
-from response_generator import generate_response, escalate_to_human, generate_chat_response
+from email_pipeline import stream_email
+from response_generator import stream_chat_response
+from metrics import start_metrics_server
+from history_store import get_history_store
+from classification import get_model as get_classifier
+from online_learning import record_feedback, SENTIMENT_LABELS
+from prompt_builder import MAX_HISTORY_TURNS
+
+start_metrics_server()  # Serves /metrics for Prometheus if METRICS_PORT is set; once per process across reruns
+
+HISTORY_PAGE_SIZE = 20  # Emails rendered per History page
+CHAT_PAGE_SIZE = 10  # Chat turns rendered at first; "Show older messages" loads more
+
+# Email and chat history live in SQLite (data/history.sqlite); the session only keeps what is on screen
+history_store = get_history_store()
 
 # Initialize session state
-if "history" not in st.session_state:
-    st.session_state.history = []
 if "latest_response" not in st.session_state:
     st.session_state.latest_response = None
 if "latest_feedback" not in st.session_state:
     st.session_state.latest_feedback = None
-if "chat_history" not in st.session_state:
-    st.session_state.chat_history = []
+if "conversation_id" not in st.session_state:
+    # Kept in the URL, so reloading the page continues the same stored conversation
+    st.session_state.conversation_id = st.query_params.get("conversation") or uuid.uuid4().hex
+    st.query_params["conversation"] = st.session_state.conversation_id
+if "chat_turns_shown" not in st.session_state:
+    st.session_state.chat_turns_shown = CHAT_PAGE_SIZE
 
 st.title("📧 QueryGenie - AI Customer Support")
 st.markdown("Simulate AI-powered email support, engage in chatbot conversations, and access past email history logs with QueryGenie.")
@@ -30,32 +45,16 @@ with tabs[0]:
 
     if st.button("📤 Send & Process"):
         if email_text.strip():
-            start_time = time.time()
-
-            # AI Processing
-            category, category_confidence = classify_email(email_text)
-            sentiment, sentiment_confidence = analyze_sentiment(email_text)
-            response = generate_response(category, email_text)
-            escalation_needed = escalate_to_human(category, category_confidence, sentiment, sentiment_confidence)
-
-            response_time = time.time() - start_time
-
-            # Store latest response
-            st.session_state.latest_response = {
-                "subject": email_subject or "No Subject",
-                "email": email_text,
-                "category": category,
-                "category_confidence": category_confidence,
-                "sentiment": sentiment,
-                "sentiment_confidence": sentiment_confidence,
-                "response": response,
-                "escalation": escalation_needed,
-                "time": response_time,
-                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            }
+            # AI Processing: the reply streams in as it is generated, then the full entry is shown below
+            result = {}
+            placeholder = st.empty()
+            with placeholder.container():
+                st.write_stream(stream_email(email_text, email_subject or "No Subject", result))
+            placeholder.empty()
+            history_store.add_email(result)
+            st.session_state.latest_response = result
 
             st.session_state.latest_feedback = None  # Reset feedback
-            st.session_state.history.append(st.session_state.latest_response)
 
     # Display Latest Response
     if st.session_state.latest_response:
@@ -63,8 +62,10 @@ with tabs[0]:
         st.subheader("📊 AI Response")
         st.write(f"📌 **Category:** {entry['category']} (Confidence: {entry['category_confidence']:.2f})")
         st.write(f"🔍 **Sentiment:** {entry['sentiment']} (Confidence: {entry['sentiment_confidence']:.2f})")
-        st.write(f"⏳ **Response Time:** {entry['time']:.2f} sec")
+        st.write(f"⏳ **Response Time:** {entry['time']:.2f} sec (via {entry['tier']})")
         st.write(f"💬 **AI Response:** {entry['response']}")
+        if entry.get("truncated"):
+            st.warning("The AI response was cut off, so the predefined response for this category was added to it.")
 
         if entry["escalation"]:
             st.error("⚠️ This email requires escalation to a human agent!")
@@ -76,9 +77,13 @@ with tabs[0]:
         with col1:
             if st.button("✔️ Helpful", key="helpful"):
                 st.session_state.latest_feedback = "helpful"
+                history_store.set_feedback(entry["id"], "helpful")
+                record_feedback(entry, "helpful")  # Confirms the predicted labels for online learning
         with col2:
             if st.button("❌ Not Helpful", key="not_helpful"):
                 st.session_state.latest_feedback = "not helpful"
+                history_store.set_feedback(entry["id"], "not helpful")
+                record_feedback(entry, "not helpful")
 
         if st.session_state.latest_feedback:
             if st.session_state.latest_feedback == "helpful":
@@ -86,6 +91,22 @@ with tabs[0]:
             else:
                 st.warning("❌ We'll work on improving future responses!")
 
+                # Corrected labels are logged and, with ONLINE_MODELS=1, teach the models in mini-batches
+                with st.form("correct_labels"):
+                    categories = [str(category) for category in get_classifier().classes_]
+                    sentiments = list(SENTIMENT_LABELS)
+                    correct_category = st.selectbox(
+                        "Correct category", categories,
+                        index=categories.index(str(entry["category"])) if str(entry["category"]) in categories else 0,
+                    )
+                    correct_sentiment = st.selectbox(
+                        "Correct sentiment", sentiments,
+                        index=sentiments.index(entry["sentiment"]) if entry["sentiment"] in sentiments else 1,
+                    )
+                    if st.form_submit_button("Submit correction"):
+                        record_feedback(entry, "not helpful", category=correct_category, sentiment=correct_sentiment)
+                        st.success("✔️ Correction recorded!")
+
 
 # --- CHATBOT TAB ---
 with tabs[1]:
@@ -96,33 +117,72 @@ with tabs[1]:
 
     if st.button("💬 Send", key="send_chat"):
         if chat_input.strip():
-            # Use the last 5 messages as context for the response
-            recent_history = st.session_state.chat_history[-5:]
-            bot_response = generate_chat_response(recent_history, chat_input)
+            # Stored turns only seed the conversation's state (recent turns + rolling summary) after a restart
+            chat_history = history_store.chat_turns(st.session_state.conversation_id, limit=MAX_HISTORY_TURNS)
+            placeholder = st.empty()
+            with placeholder.container():
+                bot_response = st.write_stream(
+                    stream_chat_response(chat_history, chat_input, st.session_state.conversation_id)
+                ).strip()
+            placeholder.empty()
 
             # Store conversation history
-            st.session_state.chat_history.append({"user": chat_input, "ai": bot_response})
+            history_store.add_chat_turn(st.session_state.conversation_id, chat_input, bot_response)
 
-    # Display Chat History
-    for chat in reversed(st.session_state.chat_history):
+    # Display Chat History: only the most recent turns are loaded and rendered
+    conversation_id = st.session_state.conversation_id
+    for chat in reversed(history_store.chat_turns(conversation_id, limit=st.session_state.chat_turns_shown)):
         with st.container():
             st.markdown(f"👤 **You:** {chat['user']}")
             st.markdown(f"🤖 **AI:** {chat['ai']}")
             st.markdown("---")
 
+    if history_store.count_chat_turns(conversation_id) > st.session_state.chat_turns_shown:
+        if st.button("⬇️ Show older messages", key="older_chat"):
+            st.session_state.chat_turns_shown += CHAT_PAGE_SIZE
+            st.rerun()
+
 # --- HISTORY TAB ---
 with tabs[2]:
     st.subheader("📜 Email History")
-    if st.session_state.history:
-        for i, entry in enumerate(reversed(st.session_state.history)):
+
+    # Filters run as indexed SQLite queries; only the current page is loaded and rendered
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        category_filter = st.selectbox("📌 Category", ["All"] + history_store.categories())
+    with col2:
+        escalation_filter = st.selectbox("⚠️ Escalation", ["All", "Escalated", "Not escalated"])
+    with col3:
+        date_range = st.date_input("📅 Dates", value=[])
+    search = st.text_input("🔎 Search subject or email", "")
+
+    filters = {
+        "category": None if category_filter == "All" else category_filter,
+        "escalation": None if escalation_filter == "All" else escalation_filter == "Escalated",
+        "search": search.strip() or None,
+    }
+    if len(date_range) > 0:
+        filters["since"] = date_range[0].isoformat()
+    if len(date_range) > 1:
+        filters["until"] = (date_range[1] + datetime.timedelta(days=1)).isoformat()  # Includes the whole last day
+
+    total = history_store.count_emails(**filters)
+    if total:
+        pages = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+        page = st.number_input(f"Page (of {pages}, {total} emails)", min_value=1, max_value=pages, value=1, step=1)
+        for entry in history_store.query_emails(limit=HISTORY_PAGE_SIZE, offset=(page - 1) * HISTORY_PAGE_SIZE, **filters):
             with st.expander(f"📧 {entry['subject']} ({entry['timestamp']})"):
                 st.write(f"✉️ **Email:** {entry['email']}")
                 st.write(f"📌 **Category:** {entry['category']} (Confidence: {entry['category_confidence']:.2f})")
                 st.write(f"🔍 **Sentiment:** {entry['sentiment']} (Confidence: {entry['sentiment_confidence']:.2f})")
                 st.write(f"⏳ **Response Time:** {entry['time']:.2f} sec")
                 st.write(f"💬 **AI Response:** {entry['response']}")
+                if entry["feedback"]:
+                    st.write(f"🗳️ **Feedback:** {entry['feedback']}")
 
                 if entry["escalation"]:
                     st.error("⚠️ Escalated to a human agent")
+    elif any(filters.values()):
+        st.info("No emails match these filters.")
     else:
         st.info("No history yet. Send an email to see past responses!")
@@ -0,0 +1,222 @@
+import contextlib
+import cProfile
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Tracing is cheap (two perf_counter calls per stage); set METRICS_ENABLED=0 to turn every hook into a no-op
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # Serve /metrics on this port; 0 = no server
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")  # Local only; set to 0.0.0.0 to let other hosts scrape
+METRICS_PREFIX = "querygenie"
+SAMPLE_WINDOW = 2048  # Most recent samples per stage the percentiles are computed from
+QUANTILES = (0.5, 0.95, 0.99)
+
+class LatencyHistogram:
+    """Running count and sum of a stage's latencies, plus a ring buffer of recent samples for percentiles."""
+
+    def __init__(self, window=SAMPLE_WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self._samples = np.zeros(window, dtype=np.float64)
+
+    def observe(self, seconds):
+        self._samples[self.count % len(self._samples)] = seconds
+        self.count += 1
+        self.total += seconds
+
+    def quantiles(self, quantiles=QUANTILES):
+        samples = self._samples[:min(self.count, len(self._samples))]
+        if not len(samples):
+            return {q: 0.0 for q in quantiles}
+        return dict(zip(quantiles, np.quantile(samples, quantiles).tolist()))
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+_NO_TIMER = contextlib.nullcontext()
+
+class Metrics:
+    """In-process stage latencies, counters and collected gauges, exported as Prometheus text.
+
+    Stages are timed with `with metrics.timer("embed"):` or the @metrics.traced("classify") decorator;
+    collectors are callables returning {name: number} (e.g. cache stats), read at export time.
+    """
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._collectors = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._counters = {}
+
+    def observe(self, stage, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def timer(self, stage):
+        """Returns a context manager that records the time spent inside it under `stage`."""
+        return _StageTimer(self, stage) if self.enabled else _NO_TIMER
+
+    def traced(self, stage):
+        """Decorator recording each call's duration under `stage`."""
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                start_time = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(stage, time.perf_counter() - start_time)
+            return wrapper
+        return decorate
+
+    def increment(self, name, amount=1, **labels):
+        """Adds to a counter, e.g. increment("llm_tokens", 120, kind="prompt")."""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def register_collector(self, name, collect):
+        """Registers a zero-argument callable whose numeric {key: value} results are exported as gauges."""
+        self._collectors[name] = collect
+
+    def _collected(self):
+        gauges = {}
+        for name, collect in list(self._collectors.items()):
+            try:
+                values = collect() or {}
+            except Exception as e:
+                print(f"Error collecting metrics from {name}: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, (bool, int, float, np.number)):
+                    gauges[f"{name}_{key}"] = float(value)
+        return gauges
+
+    def report(self):
+        """Returns {"stages": {stage: {count, mean_ms, p50_ms, p95_ms, p99_ms}}, "counters": {...}, "gauges": {...}}."""
+        with self._lock:
+            stages = {
+                stage: {
+                    "count": histogram.count,
+                    "mean_ms": round(histogram.total / histogram.count * 1000, 3),
+                    **{f"p{int(q * 100)}_ms": round(value * 1000, 3) for q, value in histogram.quantiles().items()},
+                }
+                for stage, histogram in self._stages.items()
+            }
+            counters = {
+                name + "".join(f"[{label}={value}]" for label, value in labels): count
+                for (name, labels), count in self._counters.items()
+            }
+        return {"stages": stages, "counters": counters, "gauges": self._collected()}
+
+    def prometheus(self):
+        """Renders all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            if self._stages:
+                lines += [
+                    f"# HELP {METRICS_PREFIX}_stage_seconds Latency of each pipeline stage.",
+                    f"# TYPE {METRICS_PREFIX}_stage_seconds summary",
+                ]
+            for stage, histogram in sorted(self._stages.items()):
+                for q, value in histogram.quantiles().items():
+                    lines.append(f'{METRICS_PREFIX}_stage_seconds{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+                lines.append(f'{METRICS_PREFIX}_stage_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+                lines.append(f'{METRICS_PREFIX}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+            typed = set()
+            for (name, labels), count in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {METRICS_PREFIX}_{name}_total counter")
+                    typed.add(name)
+                label_text = ",".join(f'{label}="{value}"' for label, value in labels)
+                lines.append(f"{METRICS_PREFIX}_{name}_total{{{label_text}}} {count}" if label_text else f"{METRICS_PREFIX}_{name}_total {count}")
+
+        for name, value in sorted(self._collected().items()):
+            lines.append(f"# TYPE {METRICS_PREFIX}_{name} gauge")
+            lines.append(f"{METRICS_PREFIX}_{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+@contextlib.contextmanager
+def profile(path=None, limit=25):
+    """Runs the enclosed code under cProfile; writes the stats to `path`, or prints the top `limit` functions."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if path:
+            profiler.dump_stats(path)
+        else:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+            print(out.getvalue())
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the console
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """Serves /metrics on a background thread (once per process); returns the server, or None if port is 0."""
+    global _server
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                print(f"Error starting metrics server on {host}:{port}: {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
@@ -0,0 +1,272 @@
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+
+# Get absolute paths
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+EMAIL_MODEL_PATH = os.path.join(BASE_DIR, "models/email_classifier.pkl")
+EMAIL_VECTORIZER_PATH = os.path.join(BASE_DIR, "models/vectorizer_email.pkl")
+SENTIMENT_MODEL_PATH = os.path.join(BASE_DIR, "models/sentiment_analyzer.pkl")
+SENTIMENT_VECTORIZER_PATH = os.path.join(BASE_DIR, "models/vectorizer_sentiment.pkl")
+
+# Memory-mapped exports of the models above; preferred over the pickles when present
+EMAIL_COMPACT_DIR = os.path.join(BASE_DIR, "models/compact/email_classifier")
+SENTIMENT_COMPACT_DIR = os.path.join(BASE_DIR, "models/compact/sentiment_analyzer")
+
+# Hashing-feature models updated online from agent feedback (see online_learning.py); served when ONLINE_MODELS=1
+ONLINE_MODELS = os.getenv("ONLINE_MODELS", "0") == "1"
+EMAIL_ONLINE_PATH = os.path.join(BASE_DIR, "models/online/email_classifier.pkl")
+SENTIMENT_ONLINE_PATH = os.path.join(BASE_DIR, "models/online/sentiment_analyzer.pkl")
+
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+# "torch" (SentenceTransformer), "onnx" or "onnx-int8" (ONNX Runtime, no PyTorch); 0 threads = runtime default
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+CHROMA_PATH = "../data/chroma_db"
+RESPONSES_PATH = "../data/responses.json"
+POLICY_ROUTES_PATH = "../data/policy_routes.json"
+FAST_PATH_THRESHOLDS_PATH = "../data/fast_path_thresholds.json"
+
+# LLM client: "groq", or "stub" to answer locally without network calls (tests, offline benchmarks)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "10"))  # Pooled keep-alive HTTP connections
+# Client-side rate limits are off by default (0); on the Groq free tier set LLM_REQUESTS_PER_SEC=0.5 (30 requests/minute)
+# and LLM_TOKENS_PER_MIN=6000, and lower the batch concurrency to match
+LLM_REQUESTS_PER_SEC = float(os.getenv("LLM_REQUESTS_PER_SEC", "0"))
+LLM_BURST = int(os.getenv("LLM_BURST", "5"))
+LLM_TOKENS_PER_MIN = int(os.getenv("LLM_TOKENS_PER_MIN", "0"))  # Prompt tokens
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "0"))  # Seconds before a hedge request is sent; 0 disables hedging
+
+def current_rss():
+    """Returns the resident set size of this process in bytes, or None if unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # Peak RSS: bytes on macOS, KiB elsewhere
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return None
+
+class ModelRegistry:
+    """Loads shared model artifacts lazily on first use and records what each one cost."""
+
+    def __init__(self):
+        self._loaders = {}
+        self._warmups = {}
+        self._artifacts = {}
+        self._stats = {}
+        self._lock = threading.RLock()  # Reentrant, since loaders may fetch other artifacts
+
+    def register(self, name, loader, warmup=None):
+        """Registers a zero-argument loader (and optional warm-up hook taking the artifact) under a name."""
+        with self._lock:
+            self._loaders[name] = loader
+            if warmup is not None:
+                self._warmups[name] = warmup
+
+    def get(self, name):
+        """Returns the artifact, loading it on first use."""
+        artifact = self._artifacts.get(name)
+        if artifact is not None:
+            return artifact
+
+        with self._lock:
+            if name in self._artifacts:
+                return self._artifacts[name]
+            if name not in self._loaders:
+                raise KeyError(f"No artifact registered under '{name}'.")
+
+            rss_before = current_rss()
+            start_time = time.time()
+            try:
+                artifact = self._loaders[name]()
+            except Exception as e:
+                raise RuntimeError(f"Error loading '{name}': {e}") from e
+            rss_after = current_rss()
+
+            self._stats[name] = {
+                "load_sec": round(time.time() - start_time, 3),
+                "rss_delta_mb": round((rss_after - rss_before) / 2**20, 1) if rss_before is not None else None,
+            }
+            self._artifacts[name] = artifact
+            return artifact
+
+    def swap(self, name, artifact):
+        """Replaces a loaded artifact in one step (e.g. a model updated online); callers holding the old one keep it."""
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f"No artifact registered under '{name}'.")
+            self._artifacts[name] = artifact
+
+    def unload(self, *names):
+        """Drops loaded artifacts, so the next get() loads them again (e.g. after re-registering what they depend on)."""
+        with self._lock:
+            for name in names:
+                self._artifacts.pop(name, None)
+
+    def is_loaded(self, name):
+        return name in self._artifacts
+
+    def snapshot(self):
+        """Returns the registered loaders and loaded artifacts, for restore() to put back later."""
+        with self._lock:
+            return dict(self._loaders), dict(self._warmups), dict(self._artifacts)
+
+    def restore(self, snapshot):
+        """Puts back the loaders and artifacts saved by snapshot(), dropping anything registered or loaded since."""
+        loaders, warmups, artifacts = snapshot
+        with self._lock:
+            self._loaders, self._warmups, self._artifacts = dict(loaders), dict(warmups), dict(artifacts)
+
+    def warm_up(self, *names):
+        """Loads the given artifacts (all registered ones by default) and runs their warm-up hooks."""
+        for name in names or list(self._loaders):
+            artifact = self.get(name)
+            warmup = self._warmups.get(name)
+            if warmup is not None:
+                start_time = time.time()
+                warmup(artifact)
+                self._stats.setdefault(name, {})["warmup_sec"] = round(time.time() - start_time, 3)
+
+    def report(self):
+        """Returns per-artifact load time and RSS growth for everything loaded so far."""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+def _load_pickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def _use_online(online_path):
+    return ONLINE_MODELS and os.path.exists(online_path)
+
+def _load_vectorizer(compact_dir, pickle_path, online_path):
+    if _use_online(online_path):
+        from online_learning import HashingFeatures
+        return HashingFeatures()
+    if os.path.isdir(compact_dir):
+        from compact_model import CompactVectorizer
+        return CompactVectorizer(compact_dir)
+    return _load_pickle(pickle_path)
+
+def _load_text_model(compact_dir, pickle_path, online_path):
+    if _use_online(online_path):
+        from online_learning import load_online_model
+        return load_online_model(online_path)
+    if os.path.isdir(compact_dir):
+        from compact_model import CompactLinearModel
+        return CompactLinearModel(compact_dir)
+    return _load_pickle(pickle_path)
+
+def _load_embedding_model():
+    from embedding_backends import load_embedding_model
+    return load_embedding_model(EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND, EMBEDDING_THREADS)
+
+def _load_chroma_client():
+    import chromadb
+    return chromadb.PersistentClient(path=CHROMA_PATH)
+
+POLICY_COLLECTION = "company_policies"
+
+def _load_policy_collection():
+    # Read path: a missing collection means the index was never built, which an empty collection would hide
+    try:
+        return registry.get("chroma_client").get_collection(POLICY_COLLECTION)
+    except Exception as e:
+        raise RuntimeError(
+            f"The policy index has not been built (no '{POLICY_COLLECTION}' collection in {CHROMA_PATH}). "
+            "Run `python pdf_processor.py` first."
+        ) from e
+
+def _load_indexing_collection():
+    # Write path, used only by ingestion (pdf_processor), which creates the collection on its first run
+    return registry.get("chroma_client").get_or_create_collection(POLICY_COLLECTION)
+
+def _load_llm_provider():
+    if LLM_PROVIDER == "stub":
+        from llm_client import StubLLM
+        return StubLLM()
+    if LLM_PROVIDER != "groq":
+        raise ValueError(f"Unknown LLM provider: {LLM_PROVIDER}")
+
+    import httpx
+    from dotenv import load_dotenv
+    from langchain_groq import ChatGroq
+
+    load_dotenv()
+    api_key = os.getenv("GROQ_API_KEY")
+    if not api_key:
+        raise ValueError("GROQ_API_KEY is not set! Please set it in your environment.")
+
+    # One keep-alive connection pool per client, reused across requests instead of a new TLS handshake each time
+    limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+    return ChatGroq(
+        temperature=0.7,
+        groq_api_key=api_key,
+        model_name="llama-3.3-70b-versatile",
+        max_retries=0,  # Retries are handled (with backoff and the circuit breaker) by ResilientLLM
+        request_timeout=LLM_TIMEOUT,
+        http_client=httpx.Client(limits=limits, timeout=LLM_TIMEOUT),
+        http_async_client=httpx.AsyncClient(limits=limits, timeout=LLM_TIMEOUT),
+    )
+
+def _load_llm():
+    from llm_client import ResilientLLM, TokenBucket, CircuitBreaker
+    from prompt_builder import count_tokens
+
+    return ResilientLLM(
+        registry.get("llm_provider"),
+        request_limiter=TokenBucket(LLM_REQUESTS_PER_SEC, LLM_BURST) if LLM_REQUESTS_PER_SEC > 0 else None,
+        token_limiter=TokenBucket(LLM_TOKENS_PER_MIN / 60, LLM_TOKENS_PER_MIN) if LLM_TOKENS_PER_MIN > 0 else None,
+        breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30.0),
+        max_retries=LLM_MAX_RETRIES,
+        timeout=LLM_TIMEOUT,
+        hedge_after=LLM_HEDGE_AFTER or None,
+        token_counter=count_tokens,
+    )
+
+def _load_responses():
+    # Load predefined responses as fallback
+    with open(RESPONSES_PATH, "r") as file:
+        return json.load(file)
+
+def _load_policy_routes():
+    # Category -> {"sources": [...], "sections": [...]} the category's policies live in
+    with open(POLICY_ROUTES_PATH, "r") as file:
+        return json.load(file)
+
+def _load_fast_path_thresholds():
+    # Category -> classifier confidence needed to answer without the LLM ("default" for the rest, null = never)
+    with open(FAST_PATH_THRESHOLDS_PATH, "r") as file:
+        return json.load(file)
+
+registry = ModelRegistry()
+registry.register("email_classifier", lambda: _load_text_model(EMAIL_COMPACT_DIR, EMAIL_MODEL_PATH, EMAIL_ONLINE_PATH))
+registry.register("email_vectorizer", lambda: _load_vectorizer(EMAIL_COMPACT_DIR, EMAIL_VECTORIZER_PATH, EMAIL_ONLINE_PATH))
+registry.register("sentiment_model", lambda: _load_text_model(SENTIMENT_COMPACT_DIR, SENTIMENT_MODEL_PATH, SENTIMENT_ONLINE_PATH))
+registry.register(
+    "sentiment_vectorizer", lambda: _load_vectorizer(SENTIMENT_COMPACT_DIR, SENTIMENT_VECTORIZER_PATH, SENTIMENT_ONLINE_PATH)
+)
+registry.register("embedding_model", _load_embedding_model, warmup=lambda model: model.encode(["warm up"]))
+registry.register("chroma_client", _load_chroma_client)
+registry.register("policy_collection", _load_policy_collection)
+registry.register("indexing_collection", _load_indexing_collection)
+registry.register("llm_provider", _load_llm_provider)
+registry.register("llm", _load_llm)
+registry.register("responses", _load_responses)
+registry.register("policy_routes", _load_policy_routes)
+registry.register("fast_path_thresholds", _load_fast_path_thresholds)
+
+if __name__ == "__main__":
+    registry.warm_up()
+    for name, stats in registry.report().items():
+        print(f"{name}: {stats}")
@@ -0,0 +1,234 @@
+import argparse
+import copy
+import json
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from metrics import metrics
+from model_registry import registry, ONLINE_MODELS, EMAIL_ONLINE_PATH, SENTIMENT_ONLINE_PATH
+
+FEEDBACK_LOG_PATH = "../data/feedback_log.jsonl"
+HASHING_FEATURES = 2**17  # Hashed feature columns; fixed, so no vocabulary is ever refit
+ONLINE_BATCH_SIZE = int(os.getenv("ONLINE_BATCH_SIZE", "16"))  # Labeled examples applied per model update
+CORRECTION_WEIGHT = 5.0  # Sample weight of an agent-corrected label, relative to a confirmed prediction (1.0)
+SENTIMENT_LABELS = ("negative", "neutral", "positive")
+
+def _analyzed(terms):
+    return terms
+
+class HashingFeatures:
+    """Stateless replacement for the fitted TF-IDF vectorizers: terms are hashed straight into feature columns.
+
+    Uses the same analysis settings as the training scripts (English stop words, 1-2 grams), so the triage
+    pipeline still analyzes each email once for both models, and nothing needs refitting as new words appear.
+    """
+
+    def __init__(self, n_features=HASHING_FEATURES):
+        self.n_features = n_features
+        self.vectorizer = HashingVectorizer(
+            n_features=n_features, stop_words="english", ngram_range=(1, 2), alternate_sign=False, norm="l2"
+        )
+        self._analyzed_vectorizer = HashingVectorizer(
+            n_features=n_features, analyzer=_analyzed, alternate_sign=False, norm="l2"
+        )
+
+    def get_params(self):
+        return self.vectorizer.get_params()
+
+    def build_analyzer(self):
+        return self.vectorizer.build_analyzer()
+
+    def transform(self, texts):
+        return self.vectorizer.transform(texts)
+
+    def transform_analyzed(self, term_lists):
+        """Hashes already analyzed texts (lists of terms), as TriagePipeline produces them."""
+        return self._analyzed_vectorizer.transform(term_lists)
+
+def load_online_model(path):
+    with open(path, "rb") as f:
+        model = pickle.load(f)
+    if model.n_features_in_ != HASHING_FEATURES:
+        raise ValueError(f"{path} was trained on {model.n_features_in_} hashed features, expected {HASHING_FEATURES}")
+    return model
+
+def save_online_model(model, path):
+    """Pickles the model to a temporary file and renames it into place, so readers never see a partial file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(model, f)
+    os.replace(tmp_path, path)
+
+class FeedbackLog:
+    """Append-only JSONL log of agent feedback and corrected labels, replayable into the online models."""
+
+    def __init__(self, path=FEEDBACK_LOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def records(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+class OnlineLearner:
+    """Updates one registry model with partial_fit in mini-batches and hot-swaps the result in.
+
+    Labeled examples are queued until batch_size are pending. Each update trains a copy of the serving
+    model, saves it and swaps it into the registry in one step, so requests in flight finish on the old
+    model and none ever sees a half-updated one.
+    """
+
+    def __init__(self, model_name, path, batch_size=ONLINE_BATCH_SIZE, models=None, features=None):
+        self.model_name = model_name
+        self.path = path
+        self.batch_size = batch_size
+        self.models = models or registry
+        self.features = features or HashingFeatures()
+        self.updates = 0
+        self.examples_seen = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()  # One update at a time, each starting from the previous one's model
+
+    def add(self, text, label, weight=1.0):
+        """Queues a labeled example, applying the batch once it is full; returns how many examples were applied."""
+        with self._lock:
+            self._pending.append((text, label, weight))
+            due = len(self._pending) >= self.batch_size
+        return self.update() if due else 0
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def update(self):
+        """Applies all pending examples as one mini-batch; returns how many were applied."""
+        with self._update_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+
+            model = self.models.get(self.model_name)
+            if not hasattr(model, "partial_fit"):
+                print(f"Error updating {self.model_name}: the serving model cannot learn online (run training/train_online.py and set ONLINE_MODELS=1)")
+                return 0
+
+            # partial_fit cannot add classes after the first call
+            known = set(model.classes_)
+            unknown = {label for _, label, _ in batch if label not in known}
+            if unknown:
+                print(f"Skipping feedback with unknown {self.model_name} labels: {sorted(unknown)}")
+                batch = [example for example in batch if example[1] in known]
+                if not batch:
+                    return 0
+
+            texts, labels, weights = zip(*batch)
+            try:
+                updated = copy.deepcopy(model)
+                with metrics.timer("online_update"):
+                    updated.partial_fit(self.features.transform(texts), np.array(labels), sample_weight=np.array(weights))
+                save_online_model(updated, self.path)
+            except Exception as e:
+                print(f"Error updating {self.model_name}: {e}")
+                return 0
+
+            self.models.swap(self.model_name, updated)
+            self.updates += 1
+            self.examples_seen += len(batch)
+            metrics.increment("online_examples", len(batch), model=self.model_name)
+            return len(batch)
+
+    def stats(self):
+        return {"updates": self.updates, "examples": self.examples_seen, "pending": self.pending()}
+
+def training_labels(record):
+    """Returns [(learner name, label, weight)] to learn from a feedback record.
+
+    "helpful" (or an agent picking the predicted label) confirms it; labels an agent corrected are learned with
+    CORRECTION_WEIGHT.
+    "not helpful" without corrections says nothing about which label was wrong, so it is only logged.
+    """
+    labels = []
+    for learner_name, key in (("email_learner", "category"), ("sentiment_learner", "sentiment")):
+        predicted, corrected = record.get(f"predicted_{key}"), record.get(key)
+        if corrected and corrected != predicted:
+            labels.append((learner_name, corrected, CORRECTION_WEIGHT))
+        elif corrected or (record.get("feedback") == "helpful" and predicted):
+            labels.append((learner_name, corrected or predicted, 1.0))
+    return labels
+
+def learn(record, models=None):
+    """Queues a feedback record's labels with the online learners; returns how many examples were applied."""
+    if not (record.get("email") or "").strip():
+        return 0
+    models = models or registry
+    return sum(models.get(learner_name).add(record["email"], label, weight) for learner_name, label, weight in training_labels(record))
+
+feedback_log = FeedbackLog()
+
+def record_feedback(entry, feedback, category=None, sentiment=None):
+    """Logs agent feedback on a processed email (with any corrected labels) and, with ONLINE_MODELS=1, learns from it."""
+    record = {
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "id": entry.get("id"),
+        "email": entry.get("email", ""),
+        "feedback": feedback,
+        "predicted_category": None if entry.get("category") is None else str(entry["category"]),
+        "predicted_sentiment": None if entry.get("sentiment") is None else str(entry["sentiment"]),
+        "category": category,
+        "sentiment": sentiment,
+    }
+    try:
+        feedback_log.append(record)
+    except OSError as e:
+        print(f"Error logging feedback: {e}")
+    if ONLINE_MODELS:
+        learn(record)
+    return record
+
+def replay(log=None, models=None):
+    """Applies every labeled record of the feedback log to the online models, e.g. after re-bootstrapping them."""
+    models = models or registry
+    records = 0
+    for record in (log or feedback_log).records():
+        learn(record, models)
+        records += 1
+    for learner_name in ("email_learner", "sentiment_learner"):
+        models.get(learner_name).update()  # The last, partial batch
+    return records
+
+registry.register("email_learner", lambda: OnlineLearner("email_classifier", EMAIL_ONLINE_PATH))
+registry.register("sentiment_learner", lambda: OnlineLearner("sentiment_model", SENTIMENT_ONLINE_PATH))
+metrics.register_collector("online_learning", lambda: {
+    f"{learner_name}_{key}": value
+    for learner_name in ("email_learner", "sentiment_learner") if registry.is_loaded(learner_name)
+    for key, value in registry.get(learner_name).stats().items()
+})
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply logged agent feedback to the online classifier and sentiment models.")
+    parser.add_argument("--log", default=FEEDBACK_LOG_PATH, help="Feedback log to replay")
+    args = parser.parse_args()
+
+    if not ONLINE_MODELS:
+        print("Set ONLINE_MODELS=1 to update the online models.")
+    else:
+        print(f"Replayed {replay(FeedbackLog(args.log))} feedback records")
+        for learner_name in ("email_learner", "sentiment_learner"):
+            print(f"{learner_name}: {registry.get(learner_name).stats()}")
@@ -0,0 +1,148 @@
+import fitz  # PyMuPDF
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+import json
+import os
+import re
+
+# Define Policy Sections for All PDFs
+SECTIONS = {
+    # Terms & Conditions
+    "About the Terms": r"1\. ABOUT THE TERMS",
+    "Account Registration & Termination": r"2\. ACCOUNT REGISTRATION, SUSPENSION AND TERMINATION",
+    "Placing Orders & Financial Terms": r"3\. PLACING ORDERS AND FINANCIAL TERMS",
+    "Use of the Platform": r"4\. USE OF THE PLATFORM",
+    "Fair Usage Policy": r"5\. FAIR USAGE POLICY",
+    "Accuracy & Completeness of Information": r"6\. ACCURACY AND COMPLETENESS OF INFORMATION",
+    "Listing & Selling": r"7\. LISTING AND SELLING",
+    "User Information & Third-Party Tools": r"8\. USER INFORMATION AND THIRD-PARTY TOOLS",
+    "Intellectual Property & Infringement": r"9\. INTELLECTUAL PROPERTY (IP) AND IP INFRINGEMENT",
+    "Liabilities & Disclaimers": r"10\. DISCLAIMER AND LIABILITIES",
+    "Contact Company": r"11\. CONTACT COMPANY",
+    "Miscellaneous & Legal Jurisdiction": r"12\. MISCELLANEOUS PROVISIONS APPLICABLE TO AGREEMENT",
+
+    # Privacy Policy
+    "Privacy Policy Overview": r"PRIVACY POLICY",
+    "Applicability of the Policy": r"1\. APPLICABILITY OF THE POLICY",
+    "Collection of Information": r"2\. COLLECTION OF THE INFORMATION",
+    "Use of Information": r"3\. USE OF THE INFORMATION",
+    "Sharing of Information": r"4\. SHARING OF THE INFORMATION",
+    "Third-Party Links & Services": r"5\. THIRD PARTY LINKS AND SERVICES",
+    "Security Precautions": r"8\. SECURITY PRECAUTIONS",
+    "Data Retention": r"10\. DATA RETENTION",
+    "Changes to the Privacy Policy": r"13\. CHANGES TO THIS PRIVACY POLICY",
+    "Grievance Officer": r"14\. GRIEVANCE OFFICER",
+
+    # Returns, Exchange & Refunds Policy
+    "Returns Overview": r"RETURNS, EXCHANGE AND REFUNDS POLICY",
+    "Return options": r"RETURN OPTIONS",
+    "Exchange": r"EXCHANGE",
+    "Refund Queries": r"REFUND QUERIES",
+    "Refund Timelines": r"WHEN WILL I GET MY REFUND",
+    "Instant Refunds": r"INSTANT REFUND",
+    "Return Eligibility": r"COMMON GUIDELINES FOR RETURN AND EXCHANGE",
+
+    # Cancellation Policy
+    "Cancellation Overview": r"CANCELLATION POLICY",
+    "User Cancellation": r"CANCELLATION BY THE USER",
+    "Supplier Cancellation": r"CANCELLATION BY THE SUPPLIER",
+    "Ecom Cancellation": r"CANCELLATION BY ECOM",
+    "Refunds After Cancellation": r"REFUNDS AFTER ORDER CANCELLATION",
+    "Refund Processing Time": r"WHEN WILL THE USER GET THE REFUND AFTER CANCELLATION OF ORDER",
+    "Discount Vouchers & Offers": r"WILL THE DISCOUNT VOUCHERS OR OTHER SUCH PROMOTIONAL OFFERS BE REINSTATED",
+
+    # Influencer Marketing Program
+    "Influencer Marketing Program": r"INFLUENCER MARKETING PROGRAM",
+}
+
+# Per-document heading tables, keyed by PDF filename (without extension).
+# Documents not listed here are scanned with the full SECTIONS table.
+SECTION_TABLES_PATH = "../data/section_tables.json"
+
+def load_section_tables(path=SECTION_TABLES_PATH):
+    """Loads the per-document heading tables: filename -> list of SECTIONS names, or {name: pattern} for custom headings."""
+    try:
+        with open(path, "r") as file:
+            tables = json.load(file)
+    except FileNotFoundError:
+        return {}
+    return {
+        source: dict(table) if isinstance(table, dict) else {name: SECTIONS[name] for name in table}
+        for source, table in tables.items()
+    }
+
+SECTION_TABLES = load_section_tables()
+
+class SectionDetector:
+    """Matches a line against every heading pattern of a table in a single compiled regex."""
+
+    def __init__(self, sections):
+        self.section_names = list(sections)
+        # Alternatives are tried in table order, so the first matching heading wins as before
+        self.pattern = re.compile(
+            "|".join(f"(?P<s{i}>(?:{pattern}))" for i, pattern in enumerate(sections.values())),
+            re.IGNORECASE,
+        )
+
+    def match(self, line):
+        """Returns the section name whose heading starts the line, or None."""
+        m = self.pattern.match(line)
+        if m is None:
+            return None
+        return self.section_names[int(m.lastgroup[1:])]
+
+_detectors = {}
+
+def get_section_detector(source, sections=None):
+    """Returns the compiled section detector for a document, building it once per heading table."""
+    if sections is None:
+        sections = SECTION_TABLES.get(source, SECTIONS)
+    key = tuple(sections.items())
+    if key not in _detectors:
+        _detectors[key] = SectionDetector(sections)
+    return _detectors[key]
+
+def parse_sections(pdf_path, sections=None):
+    """Extracts the text of each policy section from a PDF, returning (filename, section_texts)."""
+    doc = fitz.open(pdf_path)
+
+    # Extract full text
+    text = "".join(page.get_text("text") + "\n" for page in doc)
+
+    # Get the filename (without extension) to make IDs unique
+    filename = os.path.splitext(os.path.basename(pdf_path))[0]
+    detector = get_section_detector(filename, sections)
+
+    section_lines = {}
+    current_lines = None
+
+    # Splitting text into sections based on subheading patterns
+    for line in text.split("\n"):
+        line = line.strip()
+        section = detector.match(line)
+        if section is not None:
+            current_lines = section_lines[section] = []
+        if current_lines is not None:
+            current_lines.append(line + "\n")
+
+    section_texts = {section: "".join(lines) for section, lines in section_lines.items()}
+    return filename, section_texts
+
+def chunk_sections(filename, section_texts):
+    """Splits section texts into retrieval-sized chunks with unique IDs and metadata."""
+    # Split large sections into smaller chunks (better retrieval)
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+
+    records = []
+    for section, content in section_texts.items():
+        if content.strip():
+            chunks = text_splitter.split_text(content)
+            for i, chunk in enumerate(chunks):
+                unique_id = f"{filename}_{section}_{i}"
+                records.append((unique_id, chunk, {"section": section, "source": filename}))
+            print(f"Chunked '{section}' from '{filename}' ({len(chunks)} chunks)")
+    return records
+
+def parse_pdf(pdf_path):
+    """Parses and chunks one PDF, returning (source, records). Safe to run in a worker process."""
+    source, section_texts = parse_sections(pdf_path)
+    return source, chunk_sections(source, section_texts)
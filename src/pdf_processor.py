@@ -1,119 +1,166 @@
-import chromadb
-import fitz  # PyMuPDF
-from sentence_transformers import SentenceTransformer
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import hashlib
+import json
 import os
-import re
-
-# Load embedding model
-embedding_model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")
-
-# Initialize ChromaDB
-chroma_client = chromadb.PersistentClient(path="../data/chroma_db")
-policy_collection = chroma_client.get_or_create_collection("company_policies")
-
-# Define Policy Sections for All PDFs
-SECTIONS = {
-    # Terms & Conditions
-    "About the Terms": r"1\. ABOUT THE TERMS",
-    "Account Registration & Termination": r"2\. ACCOUNT REGISTRATION, SUSPENSION AND TERMINATION",
-    "Placing Orders & Financial Terms": r"3\. PLACING ORDERS AND FINANCIAL TERMS",
-    "Use of the Platform": r"4\. USE OF THE PLATFORM",
-    "Fair Usage Policy": r"5\. FAIR USAGE POLICY",
-    "Accuracy & Completeness of Information": r"6\. ACCURACY AND COMPLETENESS OF INFORMATION",
-    "Listing & Selling": r"7\. LISTING AND SELLING",
-    "User Information & Third-Party Tools": r"8\. USER INFORMATION AND THIRD-PARTY TOOLS",
-    "Intellectual Property & Infringement": r"9\. INTELLECTUAL PROPERTY (IP) AND IP INFRINGEMENT",
-    "Liabilities & Disclaimers": r"10\. DISCLAIMER AND LIABILITIES",
-    "Contact Company": r"11\. CONTACT COMPANY",
-    "Miscellaneous & Legal Jurisdiction": r"12\. MISCELLANEOUS PROVISIONS APPLICABLE TO AGREEMENT",
-
-    # Privacy Policy
-    "Privacy Policy Overview": r"PRIVACY POLICY",
-    "Applicability of the Policy": r"1\. APPLICABILITY OF THE POLICY",
-    "Collection of Information": r"2\. COLLECTION OF THE INFORMATION",
-    "Use of Information": r"3\. USE OF THE INFORMATION",
-    "Sharing of Information": r"4\. SHARING OF THE INFORMATION",
-    "Third-Party Links & Services": r"5\. THIRD PARTY LINKS AND SERVICES",
-    "Security Precautions": r"8\. SECURITY PRECAUTIONS",
-    "Data Retention": r"10\. DATA RETENTION",
-    "Changes to the Privacy Policy": r"13\. CHANGES TO THIS PRIVACY POLICY",
-    "Grievance Officer": r"14\. GRIEVANCE OFFICER",
-
-    # Returns, Exchange & Refunds Policy
-    "Returns Overview": r"RETURNS, EXCHANGE AND REFUNDS POLICY",
-    "Return options": r"RETURN OPTIONS",
-    "Exchange": r"EXCHANGE",
-    "Refund Queries": r"REFUND QUERIES",
-    "Refund Timelines": r"WHEN WILL I GET MY REFUND",
-    "Instant Refunds": r"INSTANT REFUND",
-    "Return Eligibility": r"COMMON GUIDELINES FOR RETURN AND EXCHANGE",
-
-    # Cancellation Policy
-    "Cancellation Overview": r"CANCELLATION POLICY",
-    "User Cancellation": r"CANCELLATION BY THE USER",
-    "Supplier Cancellation": r"CANCELLATION BY THE SUPPLIER",
-    "Ecom Cancellation": r"CANCELLATION BY ECOM",
-    "Refunds After Cancellation": r"REFUNDS AFTER ORDER CANCELLATION",
-    "Refund Processing Time": r"WHEN WILL THE USER GET THE REFUND AFTER CANCELLATION OF ORDER",
-    "Discount Vouchers & Offers": r"WILL THE DISCOUNT VOUCHERS OR OTHER SUCH PROMOTIONAL OFFERS BE REINSTATED",
-
-    # Influencer Marketing Program
-    "Influencer Marketing Program": r"INFLUENCER MARKETING PROGRAM",
-}
-
-def extract_sections(pdf_path):
+import time
+from pdf_parser import parse_pdf
+from model_registry import registry
+from lexical_index import BM25Index
+
+# Content hashes of the last indexing run, kept next to the index they describe
+MANIFEST_PATH = "../data/chroma_db/index_manifest.json"
+
+# BM25 index over the same chunks, rebuilt after every indexing run for hybrid retrieval
+LEXICAL_INDEX_PATH = "../data/chroma_db/bm25_index.json"
+
+# Number of chunks embedded and written to ChromaDB per batch
+DEFAULT_BATCH_SIZE = 64
+
+def store_chunks(records, batch_size=DEFAULT_BATCH_SIZE):
+    """Embeds chunk records in batches and bulk upserts them into ChromaDB."""
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        ids = [record[0] for record in batch]
+        documents = [record[1] for record in batch]
+        metadatas = [record[2] for record in batch]
+
+        # One forward pass and one collection write per batch
+        embeddings = registry.get("embedding_model").encode(documents, batch_size=batch_size).tolist()
+        registry.get("indexing_collection").upsert(
+            ids=ids,
+            documents=documents,
+            embeddings=embeddings,
+            metadatas=metadatas
+        )
+    return len(records)
+
+def extract_sections(pdf_path, batch_size=DEFAULT_BATCH_SIZE):
     """Extracts policy sections, chunks them, and stores them in ChromaDB."""
-    doc = fitz.open(pdf_path)
-    text = ""
-
-    # Extract full text
-    for page in doc:
-        text += page.get_text("text") + "\n"
-
-    # Get the filename (without extension) to make IDs unique
-    filename = os.path.splitext(os.path.basename(pdf_path))[0]
-
-    section_texts = {}
-    current_section = None
-
-    # Splitting text into sections based on subheading patterns
-    lines = text.split("\n")
-    for line in lines:
-        line = line.strip()
-        for section, pattern in SECTIONS.items():
-            if re.match(pattern, line, re.IGNORECASE):
-                current_section = section
-                section_texts[current_section] = ""
-                break
-        if current_section:
-            section_texts[current_section] += line + "\n"
-
-    # Split large sections into smaller chunks (better retrieval)
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-
-    # Store each section separately in ChromaDB with unique IDs
-    for section, content in section_texts.items():
-        if content.strip():
-            chunks = text_splitter.split_text(content)
-            for i, chunk in enumerate(chunks):
-                unique_id = f"{filename}_{section}_{i}"  
-                embedding = embedding_model.encode(chunk).tolist()
-                policy_collection.add(
-                    ids=[unique_id],
-                    documents=[chunk],
-                    embeddings=[embedding],
-                    metadatas=[{"section": section, "source": filename}]
-                )
-            print(f"Stored '{section}' from '{filename}' ({len(chunks)} chunks)")
-
-def process_all_pdfs(pdf_folder):
-    """Processes all policy PDFs in the given folder."""
-    for filename in os.listdir(pdf_folder):
-        if filename.endswith(".pdf"):
-            pdf_path = os.path.join(pdf_folder, filename)
-            print(f"Processing: {filename}")
-            extract_sections(pdf_path)
+    _, records = parse_pdf(pdf_path)
+    return store_chunks(records, batch_size)
+
+def file_hash(path):
+    """Returns the SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_hash(record):
+    """Returns the SHA-256 digest of a chunk's text and metadata."""
+    _, chunk, metadata = record
+    payload = json.dumps([chunk, metadata], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """Loads the per-file and per-chunk content hashes of the last indexing run."""
+    try:
+        with open(manifest_path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"files": {}}
+
+def save_manifest(manifest, manifest_path=MANIFEST_PATH):
+    """Atomically writes the indexing manifest."""
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+def indexed_chunk_ids(source):
+    """Returns the IDs of all chunks currently stored for a source document."""
+    return set(registry.get("indexing_collection").get(where={"source": source}, include=[])["ids"])
+
+def build_lexical_index(lexical_index_path=LEXICAL_INDEX_PATH):
+    """Rebuilds the BM25 index from every chunk currently stored in ChromaDB."""
+    data = registry.get("indexing_collection").get(include=["documents", "metadatas"])
+    index = BM25Index.build(zip(data["ids"], data["documents"], data["metadatas"]))
+    index.save(lexical_index_path)
+    return len(index.ids)
+
+def process_all_pdfs(pdf_folder, batch_size=DEFAULT_BATCH_SIZE, incremental=False, manifest_path=MANIFEST_PATH, workers=1,
+                     lexical_index_path=LEXICAL_INDEX_PATH):
+    """Processes all policy PDFs in the given folder, embedding chunks across PDFs in shared batches.
+
+    In incremental mode, unchanged PDFs are skipped and only new or edited chunks are re-embedded.
+    Chunks that no longer exist in a PDF (or whose PDF was removed) are deleted in both modes.
+    With workers > 1, PDF parsing and chunking run in a process pool.
+    The BM25 index used for hybrid retrieval is rebuilt over all stored chunks at the end.
+    """
+    start_time = time.time()
+
+    old_manifest = load_manifest(manifest_path)
+    new_manifest = {"files": {}}
+    records = []
+    stale_ids = set()
+
+    pdf_files = sorted(filename for filename in os.listdir(pdf_folder) if filename.endswith(".pdf"))
+    pending = {}
+    for filename in pdf_files:
+        pdf_path = os.path.join(pdf_folder, filename)
+        digest = file_hash(pdf_path)
+        entry = old_manifest["files"].get(filename)
+
+        if incremental and entry and entry["hash"] == digest:
+            new_manifest["files"][filename] = entry
+            print(f"Unchanged: {filename}")
+            continue
+
+        print(f"Processing: {filename}")
+        pending[filename] = digest
+
+    # Parsing and chunking is CPU-bound pure Python, so fan it out to worker processes;
+    # embedding and storage stay in this process
+    pdf_paths = [os.path.join(pdf_folder, filename) for filename in pending]
+    if workers > 1 and len(pdf_paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parsed = list(executor.map(parse_pdf, pdf_paths))
+    else:
+        parsed = [parse_pdf(pdf_path) for pdf_path in pdf_paths]
+
+    for (filename, digest), (source, file_records) in zip(pending.items(), parsed):
+        entry = old_manifest["files"].get(filename)
+        chunk_hashes = {record[0]: chunk_hash(record) for record in file_records}
+
+        # Only embed chunks that are new or whose content changed since the last run
+        old_chunks = entry["chunks"] if incremental and entry else {}
+        records.extend(record for record in file_records if old_chunks.get(record[0]) != chunk_hashes[record[0]])
+
+        stale_ids |= indexed_chunk_ids(source) - set(chunk_hashes)
+        new_manifest["files"][filename] = {"hash": digest, "chunks": chunk_hashes}
+
+    # Drop everything indexed from PDFs that were removed from the folder
+    for filename in old_manifest["files"]:
+        if filename not in new_manifest["files"]:
+            print(f"Removed: {filename}")
+            stale_ids |= indexed_chunk_ids(os.path.splitext(filename)[0])
+
+    if stale_ids:
+        registry.get("indexing_collection").delete(ids=sorted(stale_ids))
+        print(f"Deleted {len(stale_ids)} stale chunks")
+
+    stored = store_chunks(records, batch_size)
+
+    # Written before the manifest, whose change is what tells running retrievers to reload
+    lexical_start = time.time()
+    indexed = build_lexical_index(lexical_index_path)
+    print(f"Built BM25 index over {indexed} chunks in {time.time() - lexical_start:.2f} sec")
+    save_manifest(new_manifest, manifest_path)
+
+    elapsed = time.time() - start_time
+    rate = stored / elapsed if elapsed > 0 else 0.0
+    print(f"Stored {stored} chunks in {elapsed:.2f} sec ({rate:.1f} chunks/sec)")
+    return stored
 
 if __name__ == "__main__":
-    process_all_pdfs("../data/company policies/")  # Folder where PDFs are stored
+    parser = argparse.ArgumentParser(description="Index company policy PDFs into ChromaDB.")
+    parser.add_argument("pdf_folder", nargs="?", default="../data/company policies/")  # Folder where PDFs are stored
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Chunks embedded and written per batch")
+    parser.add_argument("--incremental", action="store_true", help="Only re-embed new or changed chunks")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used to parse and chunk PDFs")
+    args = parser.parse_args()
+
+    process_all_pdfs(args.pdf_folder, batch_size=args.batch_size, incremental=args.incremental, workers=args.workers)
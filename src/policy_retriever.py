@@ -1,37 +1,202 @@
-import chromadb
-from sentence_transformers import SentenceTransformer
+import os
+import numpy as np
+from embedding_cache import QueryEmbeddingCache
+from model_registry import registry, EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND
+from retrieval_backends import BACKENDS, InMemoryBackend, route_key
+from lexical_index import BM25Backend
+from metrics import metrics
 
-# Load embedding model 
-embedding_model = SentenceTransformer("sentence-transformers/all-mpnet-base-v2")
+# Query embedding cache: in-memory LRU backed by SQLite so it survives app restarts
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_PATH = "../data/query_cache.sqlite"
+QUERY_CACHE_DISK_ROWS = 100_000  # Embeddings kept on disk per model (oldest deleted first), ~3 KB each at 768 float32 dims, so ~300 MB
+# Quantized backends produce slightly different vectors, so each backend keeps its own cached embeddings
+QUERY_CACHE_NAMESPACE = EMBEDDING_MODEL_NAME if EMBEDDING_BACKEND == "torch" else f"{EMBEDDING_MODEL_NAME}:{EMBEDDING_BACKEND}"
 
-# Initialize ChromaDB
-chroma_client = chromadb.PersistentClient(path="../data/chroma_db")
-policy_collection = chroma_client.get_collection("company_policies")
+# Written by pdf_processor after every indexing run
+INDEX_MANIFEST_PATH = "../data/chroma_db/index_manifest.json"
+LEXICAL_INDEX_PATH = "../data/chroma_db/bm25_index.json"
 
-def retrieve_policy(query):
-    """Retrieves the most relevant policy chunk, filtering out weak matches dynamically."""
-    query_embedding = embedding_model.encode(query).tolist()
+# "hybrid" scores queries with BM25 first and only embeds them when lexical confidence is low; "dense" always embeds
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+LEXICAL_CONFIDENCE = 0.35  # Normalized BM25 score above which the lexical ranking is used on its own
+RRF_K = 60  # Reciprocal rank fusion constant
+
+# Confidently classified emails only search the policies routed to their category (data/policy_routes.json)
+ROUTING_CONFIDENCE = 0.6
+
+# "memory" searches an in-process copy of the embeddings; "chroma" queries ChromaDB directly
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "memory")
+
+def _load_retrieval_backend():
+    backend = BACKENDS[RETRIEVAL_BACKEND]
+    collection = registry.get("policy_collection")
+    return backend(collection, index_version) if backend is InMemoryBackend else backend(collection)
+
+registry.register("retrieval_backend", _load_retrieval_backend)
+registry.register("lexical_backend", lambda: BM25Backend(LEXICAL_INDEX_PATH, index_version))
+registry.register(
+    "query_cache",
+    lambda: QueryEmbeddingCache(
+        max_size=QUERY_CACHE_SIZE, path=QUERY_CACHE_PATH, namespace=QUERY_CACHE_NAMESPACE, max_disk_rows=QUERY_CACHE_DISK_ROWS
+    ),
+)
+metrics.register_collector("query_cache", lambda: registry.get("query_cache").stats() if registry.is_loaded("query_cache") else {})
+
+def embed_query(query):
+    """Returns the embedding for a query, reusing cached embeddings for repeated questions."""
+    # The embedding model is only loaded on the first cache miss
+    return registry.get("query_cache").get(query, lambda text: registry.get("embedding_model").encode(text))
+
+def embed_queries(queries):
+    """Returns an (n_queries, dim) embedding array, encoding all uncached queries in one model batch."""
+    with metrics.timer("embed"):
+        return registry.get("query_cache").get_many(queries, lambda texts: registry.get("embedding_model").encode(texts))
+
+def _apply_dynamic_threshold(hit_lists):
+    """Drops weak hits, vectorized across the batch: a query keeps the chunks scoring at least its dynamic threshold."""
+    if not hit_lists:
+        return []
+    best_scores = np.array([hits[0]["score"] if hits else -np.inf for hits in hit_lists])
+    dynamic_thresholds = best_scores * 0.8  # Each query's own best score, scaled
+    keep = np.isfinite(best_scores) & (best_scores >= dynamic_thresholds)
+    return [
+        [hit for hit in hits if hit["score"] >= threshold] if kept else []
+        for hits, threshold, kept in zip(hit_lists, dynamic_thresholds, keep)
+    ]
+
+def _fuse(dense_hits, lexical_hits, k):
+    """Merges two ranked hit lists with reciprocal rank fusion; chunks found by both keep their dense hit."""
+    fused, hits_by_id = {}, {}
+    for hits in (dense_hits, lexical_hits):
+        for rank, hit in enumerate(hits):
+            fused[hit["id"]] = fused.get(hit["id"], 0.0) + 1 / (RRF_K + rank + 1)
+            hits_by_id.setdefault(hit["id"], hit)
+    ranked = sorted(hits_by_id, key=lambda chunk_id: -fused[chunk_id])  # Stable, so dense wins ties
+    return [hits_by_id[chunk_id] for chunk_id in ranked[:k]]
+
+def policy_route(category, category_confidence):
+    """Returns the route for a confidently classified category, or None to search all policies."""
+    if category is None or category_confidence is None or category_confidence < ROUTING_CONFIDENCE:
+        return None
+    return registry.get("policy_routes").get(category)
+
+def _routes(queries, categories, category_confidences):
+    if categories is None:
+        return [None] * len(queries)
+    return [policy_route(category, confidence) for category, confidence in zip(categories, category_confidences)]
+
+def _search_route(queries, k, route):
+    """Returns (filtered hit lists, query embeddings) for queries searched within one route (None for all policies).
 
-    results = policy_collection.query(
-        query_embeddings=[query_embedding],
-        n_results=3,  # Retrieve top 3 matches
-        include=["documents", "distances"]
-    )
+    In hybrid mode, queries whose best BM25 match is confident are answered lexically and get no
+    embedding (None); the rest are embedded in one batch and their dense hits fused with the lexical ones.
+    """
+    if RETRIEVAL_MODE == "hybrid":
+        with metrics.timer("lexical_search"):
+            lexical_lists = _apply_dynamic_threshold(registry.get("lexical_backend").query(queries, k, route))
+    else:
+        lexical_lists = [[] for _ in queries]
 
-    if results["documents"]:
-        best_scores = [1 - d[0] for d in results["distances"]]  # Normalize distances
-        avg_score = sum(best_scores) / len(best_scores)  # Compute dynamic threshold
+    hit_lists = [hits if hits and hits[0]["score"] >= LEXICAL_CONFIDENCE else None for hits in lexical_lists]
+    query_embeddings = [None] * len(queries)
 
-        best_match = results["documents"][0][0]  # Always return the top match
-        best_score = best_scores[0]  # Best score among results
+    dense = [i for i, hits in enumerate(hit_lists) if hits is None]
+    metrics.increment("retrieval_queries", len(queries) - len(dense), path="lexical")
+    metrics.increment("retrieval_queries", len(dense), path="dense")
+    if dense:
+        embeddings = embed_queries([queries[i] for i in dense])
+        with metrics.timer("vector_search"):
+            dense_lists = _apply_dynamic_threshold(registry.get("retrieval_backend").query(embeddings, k=k, route=route))
+        for i, embedding, hits in zip(dense, embeddings, dense_lists):
+            query_embeddings[i] = embedding
+            hit_lists[i] = _fuse(hits, lexical_lists[i], k)
 
-        dynamic_threshold = avg_score * 0.8  
+    return hit_lists, query_embeddings
 
-        if best_score >= dynamic_threshold:
-            return best_match  
+def _search(queries, k, routes):
+    """Returns (filtered hit lists, query embeddings) for a batch of queries, one search per distinct route.
+
+    Routed queries without a usable match inside their route fall back to a search over all policies.
+    """
+    hit_lists = [None] * len(queries)
+    query_embeddings = [None] * len(queries)
+
+    def search(indices, route):
+        group_hits, group_embeddings = _search_route([queries[i] for i in indices], k, route)
+        for i, hits, embedding in zip(indices, group_hits, group_embeddings):
+            hit_lists[i] = hits
+            if embedding is not None:
+                query_embeddings[i] = embedding
+
+    groups = {}
+    for i, route in enumerate(routes):
+        groups.setdefault(route_key(route) if route else None, (route, []))[1].append(i)
+    for route, indices in groups.values():
+        search(indices, route)
+
+    fallback = [i for i, route in enumerate(routes) if route and not hit_lists[i]]
+    if fallback:
+        search(fallback, None)
+
+    return hit_lists, query_embeddings
+
+def retrieve_policies(queries, k=3, categories=None, category_confidences=None):
+    """Retrieves the top k policy chunks for each query with one encode batch and one index query per route.
+
+    Returns one ranked list per query of {"id", "document", "score", "section", "source"} dicts;
+    weak matches are filtered out with the same dynamic threshold as retrieve_policy. The score is the
+    dense similarity, or the normalized BM25 score for chunks found only by the lexical index.
+    With predicted categories and their confidences, confident queries only search their category's route.
+    """
+    queries = list(queries)
+    hit_lists, _ = _search(queries, k, _routes(queries, categories, category_confidences))
+    return [
+        [
+            {
+                "id": hit["id"],
+                "document": hit["document"],
+                "score": hit["score"],
+                "section": (hit["metadata"] or {}).get("section"),
+                "source": (hit["metadata"] or {}).get("source"),
+            }
+            for hit in hits
+        ]
+        for hits in hit_lists
+    ]
+
+def match_policies(queries, categories=None, category_confidences=None):
+    """Batch version of match_policy: returns a (chunk_id, document, query_embedding) tuple per query."""
+    queries = list(queries)
+    hit_lists, query_embeddings = _search(queries, 3, _routes(queries, categories, category_confidences))  # Top 3 matches
+    return [
+        (hits[0]["id"], hits[0]["document"], query_embedding) if hits else (None, "NO_MATCH", query_embedding)
+        for hits, query_embedding in zip(hit_lists, query_embeddings)
+    ]
+
+def match_policy(query, category=None, category_confidence=None):
+    """Returns (chunk_id, document, query_embedding) for the most relevant policy chunk.
+
+    chunk_id is None and document is "NO_MATCH" when the best match is filtered out as weak.
+    query_embedding is None when the query was answered from the lexical index alone.
+    A confidently classified category restricts the search to the policies routed to it.
+    """
+    return match_policies([query], [category], [category_confidence])[0]
+
+def retrieve_policy(query):
+    """Retrieves the most relevant policy chunk, filtering out weak matches dynamically."""
+    return match_policy(query)[1]
 
-    return "NO_MATCH"  # No relevant policy found
+def index_version():
+    """Returns a token that changes whenever pdf_processor re-indexes the policies."""
+    try:
+        return os.stat(INDEX_MANIFEST_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
 
 if __name__ == "__main__":
     query = "how to contact company?"
     print(retrieve_policy(query))
+    for hits in retrieve_policies([query, "where is my refund?"]):
+        print([(hit["section"], hit["source"], round(hit["score"], 3)) for hit in hits])
+    print(registry.get("query_cache").stats())
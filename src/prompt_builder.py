@@ -0,0 +1,133 @@
+import math
+import re
+
+# Prompt token budgets (estimated, see count_tokens)
+EMAIL_PROMPT_BUDGET = 1024
+CHAT_PROMPT_BUDGET = 768
+POLICY_BUDGET = 350  # Policy text included in one prompt
+HISTORY_BUDGET = 300  # Chat history included in one prompt
+MAX_HISTORY_TURNS = 10  # Most recent turns considered at all; those beyond the history budget are summarized
+TEMPLATE_TOKENS = 60  # Fixed instructions around the variable parts of a prompt
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+def split_sentences(text):
+    """Splits text into sentences, joining lines that PDF extraction broke mid-sentence."""
+    return [sentence for sentence in SENTENCE_PATTERN.split(re.sub(r"\s+", " ", text).strip()) if sentence]
+
+def count_tokens(text):
+    """Estimates the number of LLM tokens in a text (one per punctuation mark, one per 4 characters of a word)."""
+    return sum(math.ceil(len(piece) / 4) for piece in TOKEN_PATTERN.findall(text))
+
+def truncate_to_budget(text, budget):
+    """Cuts text to at most `budget` estimated tokens, at a sentence boundary when one is close enough."""
+    if count_tokens(text) <= budget:
+        return text
+
+    kept, used = [], 0
+    for sentence in split_sentences(text):
+        tokens = count_tokens(sentence)
+        if used + tokens > budget:
+            if not kept:  # A single overlong sentence: cut it word by word
+                words = []
+                for word in sentence.split():
+                    used += count_tokens(word)
+                    if used > budget:
+                        break
+                    words.append(word)
+                kept.append(" ".join(words))
+            break
+        kept.append(sentence)
+        used += tokens
+    return " ".join(kept).strip() + " ..."
+
+def dedupe_policy(policy_texts, budget=POLICY_BUDGET):
+    """Joins policy chunks, dropping repeated sentences (e.g. the overlap between neighbouring chunks), within budget."""
+    seen, sentences = set(), []
+    for text in policy_texts:
+        for sentence in split_sentences(text):
+            key = sentence.lower()
+            if key not in seen:
+                seen.add(key)
+                sentences.append(sentence)
+    return truncate_to_budget(" ".join(sentences), budget)
+
+def summarize_turns(turns, budget, earlier_topics=()):
+    """Compresses older chat turns into one line listing what the user asked about.
+
+    earlier_topics are questions already summarized (e.g. a conversation's rolling summary), listed first.
+    """
+    topics = list(earlier_topics) + [(split_sentences(turn["user"]) or [""])[0] for turn in turns]
+    if not topics or budget <= 0:
+        return ""
+    return truncate_to_budget("Earlier, the user asked: " + "; ".join(topics), budget)
+
+def build_chat_context(chat_history, budget=HISTORY_BUDGET, max_turns=MAX_HISTORY_TURNS, summary_topics=()):
+    """Renders recent chat turns within budget: newest turns verbatim, older ones (and summary_topics) summarized."""
+    turns = list(chat_history)[-max_turns:]
+    lines, used = [], 0
+    for turn in reversed(turns):
+        line = f"User: {turn['user']}\nAI: {turn['ai']}"
+        tokens = count_tokens(line)
+        if used + tokens > budget:
+            break
+        lines.insert(0, line)
+        used += tokens
+
+    summary = summarize_turns(turns[:len(turns) - len(lines)], budget - used, summary_topics)
+    return "\n".join(([summary] if summary else []) + lines)
+
+def _policy_text(retrieved_policy):
+    return dedupe_policy([retrieved_policy] if isinstance(retrieved_policy, str) else retrieved_policy)
+
+def build_email_prompt(category, email_text, retrieved_policy, budget=EMAIL_PROMPT_BUDGET):
+    """Builds the email reply prompt, grounded in the retrieved policy when there is one.
+
+    retrieved_policy is a chunk, a list of chunks or "NO_MATCH"; the email is cut to what is left of the budget.
+    """
+    if retrieved_policy != "NO_MATCH":
+        policy = _policy_text(retrieved_policy)
+        email_text = truncate_to_budget(email_text, budget - count_tokens(policy) - TEMPLATE_TOKENS)
+        return (
+            f"You are an AI assistant for an online shopping platform.\n\n"
+            f"Use the following company policy to generate a structured response.\n"
+            f"Do not ask follow-up questions. Ensure the response is informative.\n\n"
+            f"Policy:\n{policy}\n\n"
+            f"User Query: {email_text}\n\n"
+            f"Provide a clear and well-structured response."
+        )
+    email_text = truncate_to_budget(email_text, budget - TEMPLATE_TOKENS)
+    return (
+        f"You are an AI assistant for an online shopping platform.\n\n"
+        f"Category: {category}\nEmail: {email_text}\n\n"
+        f"Provide a structured response relevant to this category.\n"
+        f"Ensure the response is detailed but concise. Do not ask follow-up questions."
+    )
+
+def build_chat_prompt(chat_history, user_message, retrieved_policy, budget=CHAT_PROMPT_BUDGET, summary_topics=()):
+    """Builds the chat prompt: policy-grounded when there is a match, otherwise from the budgeted chat history.
+
+    summary_topics are earlier questions already folded out of chat_history, mentioned in the history summary.
+    """
+    if retrieved_policy != "NO_MATCH":
+        policy = _policy_text(retrieved_policy)
+        user_message = truncate_to_budget(user_message, budget - count_tokens(policy) - TEMPLATE_TOKENS)
+        return (
+            f"You are an AI assistant for an online shopping platform.\n\n"
+            f"User: {user_message}\n\n"
+            f"Use the following company policy to provide a conversational response:\n\n"
+            f"{policy}\n\n"
+            f"Respond in a short and conversational manner."
+        )
+
+    user_message = truncate_to_budget(user_message, budget // 2)
+    chat_context = build_chat_context(
+        chat_history, min(HISTORY_BUDGET, budget - count_tokens(user_message) - TEMPLATE_TOKENS), summary_topics=summary_topics
+    )
+    return (
+        f"You are an AI assistant for an online shopping platform.\n\n"
+        f"{chat_context}\n"
+        f"User: {user_message}\n"
+        f"AI: Respond in a short and conversational manner."
+    )
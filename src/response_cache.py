@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+class SemanticResponseCache:
+    """Caches generated answers and serves them for semantically similar queries.
+
+    Entries are bucketed by a key such as (category, policy chunk ID); within a bucket a lookup
+    returns the answer of the most similar earlier query if its cosine similarity reaches the
+    threshold. Answers stored with embedding None are only served for exactly the same key (e.g. one
+    that includes the normalized query text). Entries expire after ttl seconds, the least recently
+    used ones are evicted beyond max_entries, and everything is dropped when version_fn() (e.g. the
+    policy index version) changes.
+    """
+
+    def __init__(self, threshold=0.95, max_entries=512, ttl=24 * 60 * 60, version_fn=None, clock=time.monotonic):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_fn = version_fn
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # entry_id -> (key, unit embedding, answer, created_at)
+        self._buckets = {}  # key -> set of entry_ids
+        self._next_id = 0
+        self._version = version_fn() if version_fn else None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(embedding):
+        embedding = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm > 0 else embedding
+
+    def _check_version(self):
+        if self.version_fn is None:
+            return
+        version = self.version_fn()
+        if version != self._version:
+            self._entries.clear()
+            self._buckets.clear()
+            self._version = version
+            self.invalidations += 1
+
+    def _drop(self, entry_id):
+        key = self._entries.pop(entry_id)[0]
+        bucket = self._buckets[key]
+        bucket.discard(entry_id)
+        if not bucket:
+            del self._buckets[key]
+
+    def lookup(self, key, embedding):
+        """Returns a cached answer for a similar query under the same key, or None.
+
+        embedding may be a zero-argument callable; it is only called when the key has answers to compare against.
+        With embedding None, the most recent answer stored under the key without an embedding is returned.
+        """
+        if callable(embedding):
+            with self._lock:
+                self._check_version()
+                if key not in self._buckets:
+                    self.misses += 1
+                    return None
+            embedding = embedding()
+
+        with self._lock:
+            self._check_version()
+            entry_ids = list(self._buckets.get(key, ()))
+
+            now = self.clock()
+            for entry_id in entry_ids:
+                if now - self._entries[entry_id][3] > self.ttl:
+                    self._drop(entry_id)
+            entry_ids = [entry_id for entry_id in entry_ids if entry_id in self._entries]
+
+            # Entries stored without an embedding only answer exact (embedding None) lookups, and vice versa
+            entry_ids = [entry_id for entry_id in entry_ids if (self._entries[entry_id][1] is None) == (embedding is None)]
+
+            if entry_ids and embedding is None:
+                entry_id = max(entry_ids)  # The most recent answer
+                self._entries.move_to_end(entry_id)
+                self.hits += 1
+                return self._entries[entry_id][2]
+            if entry_ids:
+                # One matrix-vector product scores every candidate in the bucket
+                candidates = np.stack([self._entries[entry_id][1] for entry_id in entry_ids])
+                similarities = candidates @ self._unit(embedding)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry_id = entry_ids[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return self._entries[entry_id][2]
+
+            self.misses += 1
+            return None
+
+    def store(self, key, embedding, answer):
+        """Stores an answer for a query under the given key (embedding may be a zero-argument callable, or None)."""
+        if callable(embedding):
+            embedding = embedding()
+        with self._lock:
+            self._check_version()
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (key, None if embedding is None else self._unit(embedding), answer, self.clock())
+            self._buckets.setdefault(key, set()).add(entry_id)
+
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def get_or_generate(self, key, embedding, generate):
+        """Returns a cached answer for a similar query, or calls generate() and caches its result."""
+        answer = self.lookup(key, embedding)
+        if answer is None:
+            answer = generate()
+            self.store(key, embedding, answer)
+        return answer
+
+    def clear(self):
+        """Drops all cached answers."""
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self):
+        """Returns hit/miss counters, hit rate and the current number of entries."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
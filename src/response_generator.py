@@ -1,102 +1,217 @@
-from langchain_groq import ChatGroq
-from dotenv import load_dotenv
-import json
-import os
-from policy_retriever import retrieve_policy 
-
-load_dotenv()
-api_key = os.getenv("GROQ_API_KEY")
-
-if not api_key:
-    raise ValueError("GROQ_API_KEY is not set! Please set it in your environment.")
-
-# Load predefined responses as fallback
-with open("../data/responses.json", "r") as file:
-    responses = json.load(file)
-
-llm = ChatGroq(
-    temperature=0.7,  
-    groq_api_key=api_key,
-    model_name="llama-3.3-70b-versatile"
-)
-def generate_response(category, email_text):
-    """Generates a structured response using retrieved policy data first, then Llama if needed."""
+import asyncio
+import time
+from policy_retriever import match_policy, index_version
+from response_cache import SemanticResponseCache
+from model_registry import registry
+from prompt_builder import build_email_prompt, build_chat_prompt, count_tokens
+from metrics import metrics
+from conversation_state import conversations
+
+# The Groq client and the fallback responses are created on first use by the model registry
+def get_llm():
+    return registry.get("llm")
+
+def fallback_response(category):
+    """Returns the predefined response for a category, used when the LLM is unavailable."""
+    return registry.get("responses").get(category, "I'm sorry, I don't understand your request.")
+
+# Serve earlier answers for near-identical queries; dropped whenever the policy index is rebuilt
+response_cache = SemanticResponseCache(threshold=0.95, max_entries=512, ttl=24 * 60 * 60, version_fn=index_version)
+metrics.register_collector("response_cache", response_cache.stats)
+metrics.register_collector("llm", lambda: get_llm().stats() if registry.is_loaded("llm") and hasattr(get_llm(), "stats") else {})
+
+def record_llm_usage(prompt, answer):
+    """Counts the estimated prompt and completion tokens of one LLM call."""
+    if metrics.enabled:
+        metrics.increment("llm_tokens", count_tokens(prompt), kind="prompt")
+        metrics.increment("llm_tokens", count_tokens(answer), kind="completion")
+
+def cache_entry(cache_key, query_embedding, text):
+    """Returns the (key, embedding) a reply is cached under.
+
+    Lexically matched queries have no embedding, and embedding them just for the cache would bring back the
+    transformer pass hybrid retrieval skipped, so they are cached under their normalized text instead.
+    """
+    if query_embedding is not None:
+        return cache_key, query_embedding
+    return cache_key + (" ".join(text.lower().split()),), None
+
+CHAT_FALLBACK = "I'm here to help! Could you clarify your request?"
+
+def complete_reply(parts, fallback, status=None):
+    """Returns what to send when the LLM stops early: the fallback, or a continuation with it if part of a reply was sent.
+
+    A cut-off reply sets status["truncated"], so callers can tell it apart from a complete LLM answer.
+    """
+    if not parts:
+        return fallback
+    if status is not None:
+        status["truncated"] = True
+    return "\n\n" + fallback
+
+def stream_llm(prompt):
+    """Yields the LLM's reply to a prompt piece by piece as it is generated, without leading whitespace.
+
+    The "llm" stage records only the time spent waiting on the provider, not the consumer's time between
+    pieces, and is recorded even if the stream fails.
+    """
+    started = False
+    waited = 0.0
+    wait_start = time.perf_counter()  # None while the consumer has the last piece
     try:
-        retrieved_policy = retrieve_policy(email_text)
-
-        if retrieved_policy != "NO_MATCH":
-            prompt = (
-                f"You are an AI assistant for an online shopping platform.\n\n"
-                f"Use the following company policy to generate a structured response.\n"
-                f"Do not ask follow-up questions. Ensure the response is informative.\n\n"
-                f"Policy:\n{retrieved_policy}\n\n"
-                f"User Query: {email_text}\n\n"
-                f"Provide a clear and well-structured response."
-            )
-        else:
-            prompt = (
-                f"You are an AI assistant for an online shopping platform.\n\n"
-                f"Category: {category}\nEmail: {email_text}\n\n"
-                f"Provide a structured response relevant to this category.\n"
-                f"Ensure the response is detailed but concise. Do not ask follow-up questions."
-            )
+        for chunk in get_llm().stream(prompt):
+            waited += time.perf_counter() - wait_start
+            wait_start = None
+            text = chunk.content if started else chunk.content.lstrip()
+            if text:
+                if not started:
+                    metrics.observe("llm_first_token", waited)
+                started = True
+                yield text
+            wait_start = time.perf_counter()
+    finally:
+        if wait_start is not None:
+            waited += time.perf_counter() - wait_start
+        metrics.observe("llm", waited)
+
+def _stream_cached(cache_key, embedding, prompt, fallback, status=None):
+    """Yields a cached answer at once, or streams a new one and caches it; completes it with `fallback` if the LLM fails."""
+    if cache_key is not None:
+        cached = response_cache.lookup(cache_key, embedding)
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
+    try:
+        for text in stream_llm(prompt):
+            parts.append(text)
+            yield text
+    except Exception as e:
+        print(f"Llama Model Error: {e}")
+        yield complete_reply(parts, fallback, status)
+        return
+
+    answer = "".join(parts).strip()
+    record_llm_usage(prompt, answer)
+    if cache_key is not None and answer:
+        response_cache.store(cache_key, embedding, answer)
 
-        response = llm.invoke(prompt)
-        return response.content.strip()
+def stream_response(category, email_text, policy_match=None, status=None):
+    """Streams a structured email response grounded in retrieved policy data; policy_match can be precomputed.
 
+    If the LLM fails mid-reply, the category's predefined response is appended and status["truncated"] is set.
+    """
+    try:
+        if policy_match is None:
+            policy_match = match_policy(email_text)
+        policy_id, retrieved_policy, query_embedding = policy_match
+        prompt = build_email_prompt(category, email_text, retrieved_policy)
     except Exception as e:
         print(f"Llama Model Error: {e}")
+        yield fallback_response(category)
+        return
 
-    return responses.get(category, "I'm sorry, I don't understand your request.")
+    yield from _stream_cached(
+        *cache_entry(("email", category, policy_id), query_embedding, email_text), prompt, fallback_response(category), status
+    )
 
+def generate_response(category, email_text):
+    """Generates a structured response using retrieved policy data first, then Llama if needed."""
+    return "".join(stream_response(category, email_text)).strip()
 
-def generate_chat_response(chat_history, user_message):
-    """Generates a short, conversational response, prioritizing policy-based answers."""
+async def astream_response(category, email_text, policy_match=None, timeout=None, status=None):
+    """Async version of stream_response using astream; the whole reply must arrive within timeout seconds."""
+    parts = []
     try:
-        retrieved_policy = retrieve_policy(user_message)
-
-        if retrieved_policy != "NO_MATCH":
-            prompt = (
-                f"You are an AI assistant for an online shopping platform.\n\n"
-                f"User: {user_message}\n\n"
-                f"Use the following company policy to provide a conversational response:\n\n"
-                f"{retrieved_policy}\n\n"
-                f"Respond in a short and conversational manner."
-            )
-        else:
-            chat_context = "\n".join(
-                [f"User: {c['user']}\nAI: {c['ai']}" for c in chat_history[-5:]]
-            )
-            prompt = (
-                f"You are an AI assistant for an online shopping platform.\n\n"
-                f"{chat_context}\n"
-                f"User: {user_message}\n"
-                f"AI: Respond in a short and conversational manner."
-            )
-
-        response = llm.invoke(prompt)
-        return response.content.strip()
-
+        if policy_match is None:
+            policy_match = await asyncio.to_thread(match_policy, email_text)
+        policy_id, retrieved_policy, query_embedding = policy_match
+        cache_key, query_embedding = cache_entry(("email", category, policy_id), query_embedding, email_text)
+
+        cached = response_cache.lookup(cache_key, query_embedding)
+        if cached is not None:
+            yield cached
+            return
+
+        prompt = build_email_prompt(category, email_text, retrieved_policy)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        waited = 0.0  # Time spent waiting on the provider, as in stream_llm
+        chunks = get_llm().astream(prompt).__aiter__()
+        try:
+            while True:
+                wait_start = loop.time()
+                remaining = deadline - wait_start if deadline is not None else None
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), remaining)
+                except StopAsyncIteration:
+                    break
+                finally:
+                    waited += loop.time() - wait_start
+                text = chunk.content if parts else chunk.content.lstrip()
+                if text:
+                    if not parts:
+                        metrics.observe("llm_first_token", waited)
+                    parts.append(text)
+                    yield text
+        finally:
+            metrics.observe("llm", waited)
+            await chunks.aclose()
+
+        record_llm_usage(prompt, "".join(parts))
+        if parts:
+            response_cache.store(cache_key, query_embedding, "".join(parts).strip())
+        return
+
+    except asyncio.TimeoutError:
+        print(f"Llama Model Error: no response within {timeout} sec")
     except Exception as e:
         print(f"Llama Model Error: {e}")
 
-    return "I'm here to help! Could you clarify your request?"
+    yield complete_reply(parts, fallback_response(category), status)
 
+async def agenerate_response(category, email_text, policy_match=None, timeout=None):
+    """Async version of generate_response; policy_match can be a precomputed match_policy result."""
+    return "".join([text async for text in astream_response(category, email_text, policy_match, timeout)]).strip()
 
-def escalate_to_human(category, category_confidence, sentiment, sentiment_confidence):
-    """Determines if a case needs to be escalated to human support."""
-    
-    # Categories that require more human oversight
-    CRITICAL_CATEGORIES = {"REFUND", "CANCEL", "PAYMENT"}
-    
-    if category_confidence < 0.5 and sentiment_confidence < 0.5:
-        return True  
+def stream_chat_response(chat_history, user_message, conversation_id=None):
+    """Streams a short, conversational response, prioritizing policy-based answers.
 
-    # Escalate if the query falls into a critical category with negative sentiment
-    if category in CRITICAL_CATEGORIES and sentiment == "negative":
-        return True
-
-    return False
+    With a conversation_id, turns close to a topic discussed earlier reuse its retrieved policy, and
+    the history sent is the conversation's recent turns plus a rolling summary (see conversation_state);
+    chat_history then only seeds a conversation this process has not seen yet.
+    """
+    state = None
+    try:
+        if conversation_id is None:
+            policy_id, retrieved_policy, query_embedding = match_policy(user_message)
+            prompt = build_chat_prompt(chat_history, user_message, retrieved_policy)
+        else:
+            state = conversations.get(conversation_id, chat_history)
+            policy_id, retrieved_policy, query_embedding = state.match(user_message)
+            prompt = build_chat_prompt(state.recent_turns(), user_message, retrieved_policy, summary_topics=state.summary_topics())
+    except Exception as e:
+        print(f"Llama Model Error: {e}")
+        yield CHAT_FALLBACK
+        return
+
+    # Policy-grounded replies do not depend on the chat history, so they can be shared
+    if retrieved_policy != "NO_MATCH":
+        pieces = _stream_cached(*cache_entry(("chat", policy_id), query_embedding, user_message), prompt, CHAT_FALLBACK)
+    else:
+        pieces = _stream_cached(None, None, prompt, CHAT_FALLBACK)
+
+    parts = []
+    for text in pieces:
+        parts.append(text)
+        yield text
+    if state is not None:
+        state.add_turn(user_message, "".join(parts).strip())
+
+def generate_chat_response(chat_history, user_message, conversation_id=None):
+    """Generates a short, conversational response, prioritizing policy-based answers."""
+    return "".join(stream_chat_response(chat_history, user_message, conversation_id)).strip()
 
 
 # Example usage
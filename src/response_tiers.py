@@ -0,0 +1,81 @@
+import os
+import threading
+
+from model_registry import registry
+from prompt_builder import dedupe_policy
+
+# Tiers, cheapest first:
+#   "template" - the category's predefined response, no LLM call
+#   "policy"   - the predefined response followed by an excerpt of the retrieved policy, no LLM call
+#   "llm"      - a generated response (anything ambiguous, negative or escalated)
+TIERS = ("template", "policy", "llm")
+
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "1") == "1"
+FAST_PATH_SENTIMENTS = {"neutral", "positive"}
+# Sentiment below this confidence is reported as "neutral" (see analyze_sentiments), so it must not count as calm
+FAST_PATH_SENTIMENT_CONFIDENCE = 0.65
+FAST_POLICY_BUDGET = 80  # Policy excerpt length in estimated tokens
+
+def category_threshold(category):
+    """Returns the classifier confidence a category needs for the fast path, or None if it always goes to the LLM."""
+    thresholds = registry.get("fast_path_thresholds")
+    return thresholds.get(category, thresholds.get("default"))
+
+def select_tier(triage, policy_match):
+    """Picks the cheapest tier that can answer an email, from its triage result and match_policy result."""
+    threshold = category_threshold(triage["category"])
+    if (
+        not FAST_PATH_ENABLED
+        or threshold is None
+        or triage["escalation"]
+        or triage["sentiment"] not in FAST_PATH_SENTIMENTS
+        or triage["sentiment_confidence"] < FAST_PATH_SENTIMENT_CONFIDENCE
+        or triage["category_confidence"] < threshold
+        or triage["category"] not in registry.get("responses")
+    ):
+        return "llm"
+    return "template" if policy_match[1] == "NO_MATCH" else "policy"
+
+def fast_response(tier, category, policy_match):
+    """Builds the response for the "template" or "policy" tier."""
+    response = registry.get("responses")[category]
+    if tier == "policy":
+        response += f"\n\nAccording to our policy: {dedupe_policy([policy_match[1]], FAST_POLICY_BUDGET)}"
+    return response
+
+class TierStats:
+    """Counts responses and their end-to-end latency per tier."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = {tier: 0 for tier in TIERS}
+            self._total_sec = {tier: 0.0 for tier in TIERS}
+            self._max_sec = {tier: 0.0 for tier in TIERS}
+
+    def record(self, tier, seconds):
+        with self._lock:
+            self._counts[tier] += 1
+            self._total_sec[tier] += seconds
+            self._max_sec[tier] = max(self._max_sec[tier], seconds)
+
+    def report(self):
+        """Returns {tier: {"count", "share", "mean_ms", "max_ms"}} plus the overall mean latency."""
+        with self._lock:
+            total = sum(self._counts.values())
+            report = {
+                tier: {
+                    "count": count,
+                    "share": round(count / total, 3) if total else 0.0,
+                    "mean_ms": round(self._total_sec[tier] / count * 1000, 1) if count else 0.0,
+                    "max_ms": round(self._max_sec[tier] * 1000, 1),
+                }
+                for tier, count in self._counts.items()
+            }
+            report["overall_mean_ms"] = round(sum(self._total_sec.values()) / total * 1000, 1) if total else 0.0
+            return report
+
+tier_stats = TierStats()
@@ -0,0 +1,229 @@
+import threading
+import time
+
+import numpy as np
+
+# Brute-force search is exact and fast for small corpora; switch to HNSW (if hnswlib is installed) beyond this
+HNSW_MIN_SIZE = 20000
+
+# A route restricts a search to chunks from some policy documents and/or sections:
+#   {"sources": ["ReturnsExchangeRefunds", ...], "sections": ["Placing Orders & Financial Terms", ...]}
+# A chunk is in the route if its source or its section is listed.
+
+def route_key(route):
+    """Returns a hashable key for a route."""
+    return tuple(sorted(route.get("sources", ()))), tuple(sorted(route.get("sections", ())))
+
+def matches_route(metadata, route):
+    """Returns True if a chunk's metadata falls inside the route."""
+    metadata = metadata or {}
+    return metadata.get("source") in route.get("sources", ()) or metadata.get("section") in route.get("sections", ())
+
+def chroma_where(route):
+    """Translates a route into a ChromaDB metadata filter."""
+    clauses = [
+        {field: {"$in": list(values)}}
+        for field, values in (("source", route.get("sources")), ("section", route.get("sections")))
+        if values
+    ]
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+class ChromaBackend:
+    """Searches the ChromaDB policy collection directly."""
+
+    name = "chroma"
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def query(self, query_embeddings, k=3, route=None):
+        """Returns, per query, up to k hits ({"id", "document", "metadata", "score"}) ranked best first.
+
+        With a route, only chunks inside it are searched (as a ChromaDB metadata filter).
+        """
+        query_embeddings = np.asarray(query_embeddings, dtype=np.float32)
+        if len(query_embeddings) == 0:
+            return []
+
+        results = self.collection.query(
+            query_embeddings=query_embeddings.tolist(),
+            n_results=k,
+            where=chroma_where(route) if route else None,
+            include=["documents", "distances", "metadatas"]
+        )
+        return [
+            [
+                {"id": chunk_id, "document": document, "metadata": metadata, "score": 1 - distance}
+                for chunk_id, document, metadata, distance in zip(ids, documents, metadatas, distances)
+            ]
+            for ids, documents, metadatas, distances in zip(
+                results["ids"], results["documents"], results["metadatas"], results["distances"]
+            )
+        ]
+
+class InMemoryBackend:
+    """Keeps every chunk embedding in one float32 matrix and answers top-k with a matrix product.
+
+    Distances follow the collection's ChromaDB space ("l2", "cosine" or "ip"), so scores match ChromaBackend.
+    The matrix is reloaded from the collection whenever version_fn() changes. Routed searches use a
+    sub-index holding only the route's rows, built on first use and kept until the next reload.
+    """
+
+    name = "memory"
+
+    def __init__(self, collection, version_fn=None):
+        self.collection = collection
+        self.version_fn = version_fn
+        self.space = (collection.metadata or {}).get("hnsw:space", "l2")
+        self._version = object()  # Forces a load on first query
+        self._lock = threading.Lock()
+        self._index = None
+
+    def _refresh(self):
+        """Returns the current index snapshot, reloading it from the collection if the version changed."""
+        version = self.version_fn() if self.version_fn else None
+        if version == self._version:
+            return self._index
+
+        with self._lock:
+            if version == self._version:
+                return self._index
+            data = self.collection.get(include=["embeddings", "documents", "metadatas"])
+            matrix = np.asarray(data["embeddings"], dtype=np.float32)
+            if len(data["ids"]) == 0:
+                matrix = np.zeros((0, 0), dtype=np.float32)
+
+            if self.space == "cosine":
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                matrix = matrix / np.where(norms > 0, norms, 1)
+            matrix = np.ascontiguousarray(matrix)
+
+            # Swapped in as one tuple, so concurrent queries never see a half-updated index
+            self._index = (
+                list(data["ids"]),
+                list(data["documents"]),
+                list(data["metadatas"]),
+                matrix,
+                np.einsum("ij,ij->i", matrix, matrix),
+                self._build_hnsw(matrix) if len(matrix) >= HNSW_MIN_SIZE else None,
+                {},  # route key -> (row indices, sub-matrix, squared row norms)
+            )
+            self._version = version
+            return self._index
+
+    def _build_hnsw(self, matrix):
+        try:
+            import hnswlib
+        except ImportError:
+            return None
+        index = hnswlib.Index(space=self.space, dim=matrix.shape[1])
+        index.init_index(max_elements=len(matrix), ef_construction=200, M=16)
+        index.add_items(matrix, np.arange(len(matrix)))
+        index.set_ef(64)
+        return index
+
+    def _distances(self, queries, matrix, sq_norms):
+        """Returns the (n_queries, n_chunks) distance matrix in the collection's space."""
+        products = queries @ matrix.T
+        if self.space == "ip":
+            return 1 - products
+        if self.space == "cosine":
+            norms = np.linalg.norm(queries, axis=1, keepdims=True)
+            return 1 - products / np.where(norms > 0, norms, 1)
+        return np.einsum("ij,ij->i", queries, queries)[:, None] - 2 * products + sq_norms  # Squared L2
+
+    @staticmethod
+    def _sub_index(index, route):
+        """Returns (row indices, sub-matrix, squared norms) for the chunks inside a route."""
+        _, _, metadatas, matrix, sq_norms, _, sub_indexes = index
+        key = route_key(route)
+        sub_index = sub_indexes.get(key)
+        if sub_index is None:
+            rows = np.array([i for i, metadata in enumerate(metadatas) if matches_route(metadata, route)], dtype=np.int64)
+            sub_index = sub_indexes[key] = (rows, matrix[rows], sq_norms[rows])
+        return sub_index
+
+    def query(self, query_embeddings, k=3, route=None):
+        """Returns, per query, up to k hits ({"id", "document", "metadata", "score"}) ranked best first.
+
+        With a route, only chunks inside it are searched.
+        """
+        index = self._refresh()
+        ids, documents, metadatas, matrix, sq_norms, hnsw, _ = index
+        rows = None
+        if route:
+            rows, matrix, sq_norms = self._sub_index(index, route)
+            hnsw = None  # Route sub-indexes are small enough for exact search
+
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        k = min(k, len(matrix))
+        if len(queries) == 0 or k == 0:
+            return [[] for _ in range(len(queries))]
+
+        if hnsw is not None:
+            top, distances = hnsw.knn_query(queries, k=k)
+        else:
+            all_distances = self._distances(queries, matrix, sq_norms)
+            top = np.argpartition(all_distances, k - 1, axis=1)[:, :k]
+            distances = np.take_along_axis(all_distances, top, axis=1)
+            order = np.argsort(distances, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            distances = np.take_along_axis(distances, order, axis=1)
+            if rows is not None:
+                top = rows[top]
+
+        return [
+            [
+                {"id": ids[i], "document": documents[i], "metadata": metadatas[i], "score": 1 - float(distance)}
+                for i, distance in zip(row, row_distances)
+            ]
+            for row, row_distances in zip(top, distances)
+        ]
+
+BACKENDS = {
+    ChromaBackend.name: ChromaBackend,
+    InMemoryBackend.name: InMemoryBackend,
+}
+
+def benchmark(backends, query_embeddings, k=3, repeats=3):
+    """Times single and batched queries on each backend and reports top-k agreement with the first one."""
+    report = {}
+    reference = None
+    for backend in backends:
+        backend.query(query_embeddings[:1], k)  # Warm up (e.g. load the in-memory matrix)
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            for embedding in query_embeddings:
+                backend.query([embedding], k)
+        single = (time.perf_counter() - start_time) / (repeats * len(query_embeddings))
+
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            batched = backend.query(query_embeddings, k)
+        batch = (time.perf_counter() - start_time) / (repeats * len(query_embeddings))
+
+        top_ids = [[hit["id"] for hit in hits] for hits in batched]
+        if reference is None:
+            reference = top_ids
+        agreement = np.mean([len(set(a) & set(b)) / max(len(a), 1) for a, b in zip(top_ids, reference)])
+        report[backend.name] = {
+            "ms_per_query": round(single * 1000, 3),
+            "ms_per_query_batched": round(batch * 1000, 3),
+            "top_k_agreement": round(float(agreement), 4),
+        }
+    return report
+
+if __name__ == "__main__":
+    # Compare backends on the indexed corpus, using stored chunk embeddings (with a little noise) as queries
+    from model_registry import registry
+    from policy_retriever import index_version
+
+    collection = registry.get("policy_collection")
+    embeddings = np.asarray(collection.get(include=["embeddings"])["embeddings"], dtype=np.float32)
+    rng = np.random.default_rng(0)
+    queries = embeddings[rng.choice(len(embeddings), size=min(100, len(embeddings)), replace=False)]
+    queries = queries + rng.normal(scale=0.01, size=queries.shape).astype(np.float32)
+
+    for name, stats in benchmark([ChromaBackend(collection), InMemoryBackend(collection, index_version)], queries).items():
+        print(f"{name}: {stats}")
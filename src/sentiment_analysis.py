@@ -1,41 +1,46 @@
-import os
-import pickle
 import numpy as np
+from model_registry import registry
+from metrics import metrics
 
-# Get absolute paths for models
-BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
-MODEL_PATH = os.path.join(BASE_DIR, "models/sentiment_analyzer.pkl")
-VECTORIZER_PATH = os.path.join(BASE_DIR, "models/vectorizer_sentiment.pkl")
+# Sentiment model & vectorizer are loaded on first use and shared through the model registry
+def get_model():
+    return registry.get("sentiment_model")
 
-# Load sentiment analysis model
-try:
-    with open(MODEL_PATH, "rb") as file:
-        model = pickle.load(file)
-
-    with open(VECTORIZER_PATH, "rb") as file:
-        vectorizer = pickle.load(file)
-
-except FileNotFoundError:
-    print("Error: Model files not found. Ensure 'sentiment_analyzer.pkl' & 'vectorizer_sentiment.pkl' exist in 'models/' folder.")
-    exit()
+def get_vectorizer():
+    return registry.get("sentiment_vectorizer")
 
 def analyze_sentiment(text, confidence_threshold=0.65):
     """Predict sentiment (positive, neutral, negative) with confidence check."""
-    if not text.strip():
-        return "neutral", 0.0  # Handle empty input
-
-    text_vec = vectorizer.transform([text])
-    prediction = model.predict(text_vec)[0]
-
-    # Get probability scores
-    proba = model.predict_proba(text_vec)[0]
-    confidence = round(np.max(proba), 2) 
+    predictions, confidences = analyze_sentiments([text], confidence_threshold)
+    return predictions[0], confidences[0]
+
+def analyze_sentiments(texts, confidence_threshold=0.65):
+    """Predict sentiment for a batch of texts, returning arrays of labels and confidence scores."""
+    texts = list(texts)
+    predictions = np.full(len(texts), "neutral", dtype=object)
+    confidences = np.zeros(len(texts))
+
+    # Empty inputs stay "neutral" with zero confidence
+    non_empty = np.array([bool(text.strip()) for text in texts], dtype=bool)
+    if not non_empty.any():
+        return predictions, confidences
+
+    # One sparse transform and one predict_proba for the whole batch
+    text_vecs = get_vectorizer().transform([text for text, keep in zip(texts, non_empty) if keep])
+    predictions[non_empty], confidences[non_empty] = predict_sentiments(text_vecs, confidence_threshold)
+    return predictions, confidences
+
+@metrics.traced("sentiment")
+def predict_sentiments(text_vecs, confidence_threshold=0.65):
+    """Predict sentiment labels and confidence scores from already vectorized texts."""
+    model = get_model()
+    proba = model.predict_proba(text_vecs)
+    best = np.argmax(proba, axis=1)
+    confidences = np.round(proba[np.arange(len(best)), best], 2)
 
     # Force "neutral" if confidence is below threshold
-    if confidence < confidence_threshold:
-        return "neutral", confidence
-
-    return prediction, confidence
+    predictions = np.where(confidences < confidence_threshold, "neutral", model.classes_[best])
+    return predictions.astype(object), confidences
 
 if __name__ == "__main__":
     # Test cases
@@ -1,13 +1,17 @@
 import os
+import sys
 import pickle
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.naive_bayes import MultinomialNB
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from compact_model import export_compact
 
 # Get absolute paths
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 DATA_PATH = os.path.join(BASE_DIR, "data/emails.csv")
 MODEL_PATH = os.path.join(BASE_DIR, "models/email_classifier.pkl")
+COMPACT_DIR = os.path.join(BASE_DIR, "models/compact/email_classifier")
 VECTORIZER_PATH = os.path.join(BASE_DIR, "models/vectorizer_email.pkl")
 
 try:
@@ -46,4 +50,7 @@ with open(MODEL_PATH, "wb") as f:
 with open(VECTORIZER_PATH, "wb") as f:
     pickle.dump(vectorizer, f)
 
+# Export the memory-mapped format used at serving time
+export_compact(vectorizer, model, COMPACT_DIR)
+
 print("Email classifier trained and saved successfully!")
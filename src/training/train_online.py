@@ -0,0 +1,70 @@
+import os
+import sys
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from online_learning import HashingFeatures, save_online_model, SENTIMENT_LABELS
+
+# Get absolute paths
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
+EMAIL_DATA_PATH = os.path.join(BASE_DIR, "data/emails.csv")
+SENTIMENT_DATA_PATH = os.path.join(BASE_DIR, "data/sentiment_data.csv")
+EMAIL_MODEL_PATH = os.path.join(BASE_DIR, "models/online/email_classifier.pkl")
+SENTIMENT_MODEL_PATH = os.path.join(BASE_DIR, "models/online/sentiment_analyzer.pkl")
+
+CHUNK_SIZE = 5000  # Rows streamed from the CSV per partial_fit call
+SENTIMENT_EPOCHS = 5  # Passes over the sentiment data (Naive Bayes counts are exact after one pass)
+
+def stream_labeled(path, text_column, label_column, label_mapping=None):
+    """Yields (texts, labels) chunks of the CSV without loading it whole."""
+    for chunk in pd.read_csv(path, usecols=[text_column, label_column], chunksize=CHUNK_SIZE):
+        if label_mapping is not None:
+            chunk[label_column] = chunk[label_column].map(label_mapping)
+        chunk = chunk.dropna(subset=[text_column, label_column])
+        if len(chunk):
+            yield chunk[text_column].astype(str).tolist(), chunk[label_column].to_numpy()
+
+def label_counts(path, label_column, label_mapping=None):
+    labels = pd.read_csv(path, usecols=[label_column])[label_column]
+    if label_mapping is not None:
+        labels = labels.map(label_mapping)
+    return labels.dropna().value_counts()
+
+def train(model, features, path, text_column, label_column, classes, epochs=1, label_mapping=None):
+    rows = 0
+    for _ in range(epochs):
+        for texts, labels in stream_labeled(path, text_column, label_column, label_mapping):
+            model.partial_fit(features.transform(texts), labels, classes=classes)
+            rows += len(texts)
+    return rows
+
+features = HashingFeatures()
+
+try:
+    # Email classifier: Naive Bayes, as in train_classifier.py, on hashed instead of TF-IDF features
+    categories = label_counts(EMAIL_DATA_PATH, "category")
+    print("🔹 Category Distribution:\n", categories)
+    email_model = MultinomialNB()
+    rows = train(email_model, features, EMAIL_DATA_PATH, "instruction", "category", categories.index.to_numpy())
+    save_online_model(email_model, EMAIL_MODEL_PATH)
+    print(f"Online email classifier trained on {rows} rows")
+except Exception as e:
+    print(f"Error training online email classifier: {e}")
+
+try:
+    # Sentiment: logistic regression fitted by SGD; "balanced" class weights are computed up front,
+    # since partial_fit cannot derive them from a single chunk
+    sentiment_mapping = {0: "negative", 1: "neutral", 2: "positive"}
+    counts = label_counts(SENTIMENT_DATA_PATH, "label", sentiment_mapping)
+    print("🔹 Sentiment Distribution:\n", counts)
+    class_weight = {label: counts.sum() / (len(counts) * counts[label]) for label in counts.index}
+    sentiment_model = SGDClassifier(loss="log_loss", alpha=1e-5, class_weight=class_weight, random_state=42)
+    rows = train(
+        sentiment_model, features, SENTIMENT_DATA_PATH, "text", "label", list(SENTIMENT_LABELS),
+        epochs=SENTIMENT_EPOCHS, label_mapping=sentiment_mapping,
+    )
+    save_online_model(sentiment_model, SENTIMENT_MODEL_PATH)
+    print(f"Online sentiment model trained on {rows} rows ({SENTIMENT_EPOCHS} epochs)")
+except Exception as e:
+    print(f"Error training online sentiment model: {e}")
@@ -1,13 +1,17 @@
 import os
+import sys
 import pickle
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.linear_model import LogisticRegression
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from compact_model import export_compact
 
 # Get absolute path 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 DATA_PATH = os.path.join(BASE_DIR, "data/sentiment_data.csv")
 MODEL_PATH = os.path.join(BASE_DIR, "models/sentiment_analyzer.pkl")
+COMPACT_DIR = os.path.join(BASE_DIR, "models/compact/sentiment_analyzer")
 VECTORIZER_PATH = os.path.join(BASE_DIR, "models/vectorizer_sentiment.pkl")
 
 try:
@@ -46,4 +50,7 @@ with open(MODEL_PATH, "wb") as f:
 with open(VECTORIZER_PATH, "wb") as f:
     pickle.dump(vectorizer, f)
 
+# Export the memory-mapped format used at serving time
+export_compact(vectorizer, model, COMPACT_DIR)
+
 print("Sentiment model trained and saved successfully!")
@@ -0,0 +1,128 @@
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+
+import classification
+from compact_model import normalize_rows
+import sentiment_analysis
+from escalation import escalate_to_human
+from metrics import metrics
+
+# Vectorizer settings that decide how raw text is turned into terms
+ANALYZER_PARAMS = (
+    "input", "encoding", "decode_error", "strip_accents", "lowercase", "preprocessor",
+    "tokenizer", "analyzer", "stop_words", "token_pattern", "ngram_range",
+)
+
+class TriagePipeline:
+    """Classifies, scores sentiment and decides escalation for emails with a single tokenization pass."""
+
+    def __init__(self, sentiment_threshold=0.65):
+        self.sentiment_threshold = sentiment_threshold
+        self.email_vectorizer = None
+        self.sentiment_vectorizer = None
+
+    def _setup(self):
+        """Fetches both vectorizers on first use, so creating a pipeline does not load any model."""
+        if self.email_vectorizer is not None:
+            return
+        email_vectorizer = classification.get_vectorizer()
+        sentiment_vectorizer = sentiment_analysis.get_vectorizer()
+
+        # Both vectorizers are trained with the same config, so one analyzer can feed both vocabularies
+        self.shared_analysis = self._analysis_config(email_vectorizer) == self._analysis_config(sentiment_vectorizer)
+        self.analyzer = email_vectorizer.build_analyzer() if self.shared_analysis else None
+        self.sentiment_vectorizer = sentiment_vectorizer
+        self.email_vectorizer = email_vectorizer
+
+    @staticmethod
+    def _analysis_config(vectorizer):
+        params = vectorizer.get_params()
+        return {name: params.get(name) for name in ANALYZER_PARAMS}
+
+    @staticmethod
+    def _tfidf(counts, vectorizer):
+        """Applies a fitted vectorizer's TF-IDF weighting and normalization to raw term counts."""
+        if vectorizer.binary:
+            counts.data.fill(1)
+        if vectorizer.sublinear_tf:
+            np.log(counts.data, counts.data)
+            counts.data += 1
+        if vectorizer.use_idf:
+            counts = counts @ diags(vectorizer.idf_)
+        if vectorizer.norm:
+            counts = normalize_rows(counts, vectorizer.norm)
+        return counts
+
+    @metrics.traced("vectorize")
+    def vectorize(self, texts):
+        """Returns (email_vecs, sentiment_vecs) for the texts, analyzing each text only once."""
+        self._setup()
+        if not self.shared_analysis:
+            return self.email_vectorizer.transform(texts), self.sentiment_vectorizer.transform(texts)
+
+        term_lists = [self.analyzer(text) for text in texts]
+        return self._from_terms(term_lists, self.email_vectorizer), self._from_terms(term_lists, self.sentiment_vectorizer)
+
+    @classmethod
+    def _from_terms(cls, term_lists, vectorizer):
+        """Builds one vectorizer's TF-IDF matrix from already analyzed texts."""
+        if hasattr(vectorizer, "transform_analyzed"):  # Compact, memory-mapped vectorizer
+            return vectorizer.transform_analyzed(term_lists)
+
+        vocabulary = vectorizer.vocabulary_
+        rows, cols = [], []
+        for i, terms in enumerate(term_lists):
+            for term in terms:
+                j = vocabulary.get(term)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+
+        # Duplicate (row, col) entries are summed into term counts
+        counts = csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(term_lists), len(vocabulary)),
+            dtype=vectorizer.dtype,
+        )
+        counts.sum_duplicates()
+        return cls._tfidf(counts, vectorizer)
+
+    def triage(self, email_text):
+        """Returns category, sentiment, both confidences and the escalation decision for one email."""
+        return self.triage_batch([email_text])[0]
+
+    def triage_batch(self, email_texts):
+        """Triages a batch of emails with one analysis pass per email and one model call per batch."""
+        email_texts = list(email_texts)
+        if not email_texts:
+            return []
+
+        email_vecs, sentiment_vecs = self.vectorize(email_texts)
+        categories, category_confidences = classification.predict_categories(email_vecs)
+
+        # Empty emails stay "neutral" with zero confidence, as in analyze_sentiment
+        sentiments = np.full(len(email_texts), "neutral", dtype=object)
+        sentiment_confidences = np.zeros(len(email_texts))
+        non_empty = np.array([bool(text.strip()) for text in email_texts], dtype=bool)
+        if non_empty.any():
+            sentiments[non_empty], sentiment_confidences[non_empty] = sentiment_analysis.predict_sentiments(
+                sentiment_vecs[non_empty], self.sentiment_threshold
+            )
+
+        results = []
+        for category, category_confidence, sentiment, sentiment_confidence in zip(
+            categories, category_confidences, sentiments, sentiment_confidences
+        ):
+            results.append({
+                "category": category,
+                "category_confidence": category_confidence,
+                "sentiment": sentiment,
+                "sentiment_confidence": sentiment_confidence,
+                "escalation": escalate_to_human(category, category_confidence, sentiment, sentiment_confidence),
+            })
+        return results
+
+if __name__ == "__main__":
+    pipeline = TriagePipeline()
+    sample_email = "My payment was deducted twice and nobody is helping me. This is terrible!"
+    print(pipeline.triage(sample_email))
@@ -0,0 +1,38 @@
+import sys
+import os
+import inspect
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from model_registry import ModelRegistry
+
+def registry_installer(monkeypatch):
+    """Returns install(loaders, *modules), which points each module's `registry` at a test registry until monkeypatch undoes it.
+
+    loaders is either a {name: loader} dict, registered in a fresh ModelRegistry, or a ready-made ModelRegistry.
+    install returns the registry, so a test can register, swap or unload artifacts later on.
+    """
+    def install(loaders, *modules):
+        if isinstance(loaders, ModelRegistry):
+            test_registry = loaders
+        else:
+            test_registry = ModelRegistry()
+            for name, loader in loaders.items():
+                test_registry.register(name, loader)
+        for module in modules:
+            monkeypatch.setattr(module, "registry", test_registry)
+        return test_registry
+
+    return install
+
+@pytest.fixture
+def use_registry(monkeypatch):
+    """Swaps test registries into modules for the duration of one test."""
+    return registry_installer(monkeypatch)
+
+def run_test(test):
+    """Runs a test outside pytest (from a module's __main__ runner), supplying the monkeypatch and use_registry fixtures it takes."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        fixtures = {"monkeypatch": monkeypatch, "use_registry": registry_installer(monkeypatch)}
+        test(**{name: fixtures[name] for name in inspect.signature(test).parameters})
@@ -0,0 +1,109 @@
+import sys
+import os
+import shutil
+import tempfile
+import uuid
+
+import chromadb
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from benchmark import HashingEncoder, compare_to_baseline, ingest_policies, run_benchmarks, run_component, summarize, synthetic_emails
+from model_registry import registry
+from lexical_index import BM25Index
+import pdf_processor
+import policy_retriever
+
+POLICY_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data/company policies'))
+
+def test_synthetic_corpus():
+    """Tests that the synthetic corpus is deterministic per seed and covers every category."""
+
+    emails = synthetic_emails(45, seed=7)
+    assert emails == synthetic_emails(45, seed=7), "Same seed must give the same corpus"
+    assert emails != synthetic_emails(45, seed=8), "Different seeds should give different corpora"
+    assert len({subject for subject, _ in emails}) == 9, "Every category should be represented"
+    assert all(text.strip() for _, text in emails), "Empty email generated"
+
+    print("Synthetic corpus tests passed!")
+
+def test_hashing_encoder():
+    """Tests that the offline encoder is deterministic, normalized and shaped like SentenceTransformer output."""
+
+    encoder = HashingEncoder(dim=64)
+    batch = encoder.encode(["refund my order", "cancel my order"])
+    single = encoder.encode("refund my order")
+    assert batch.shape == (2, 64) and single.shape == (64,), f"Unexpected shapes: {batch.shape}, {single.shape}"
+    assert np.allclose(batch[0], single) and np.allclose(np.linalg.norm(batch, axis=1), 1.0), "Vectors must match and be unit length"
+
+    print("Hashing encoder tests passed!")
+
+def test_reports_and_baseline():
+    """Tests component timing reports and regression detection against a baseline."""
+
+    report = run_component(lambda n: sum(range(n)), [1000] * 20, memory_sample=5)
+    assert report["items"] == 20 and report["throughput_per_sec"] > 0, f"Unexpected report: {report}"
+    assert report["p50_ms"] <= report["p95_ms"] <= report["p99_ms"], f"Percentiles out of order: {report}"
+    assert report["peak_memory_mb"] >= 0, "Missing peak memory"
+
+    stats = summarize([0.001] * 99 + [0.1], elapsed=0.2)
+    assert stats["p50_ms"] == 1.0 and stats["throughput_per_sec"] == 500.0, f"Unexpected summary: {stats}"
+
+    baseline = {"classify": {"p95_ms": 2.0, "throughput_per_sec": 500.0}, "retrieve": {"p95_ms": 2.0, "throughput_per_sec": 500.0}}
+    current = {
+        "classify": {"p95_ms": 2.2, "throughput_per_sec": 480.0},
+        "retrieve": {"p95_ms": 3.0, "throughput_per_sec": 350.0},
+        "respond": {"p95_ms": 1.0, "throughput_per_sec": 900.0},
+    }
+    comparison = compare_to_baseline(current, baseline, tolerance=0.2)
+    assert not comparison["classify"]["regressed"], "Within tolerance should not regress"
+    assert comparison["retrieve"]["regressed"], "Slower retrieval should be flagged"
+    assert "respond" not in comparison, "Components missing from the baseline are not compared"
+
+    print("Benchmark report tests passed!")
+
+def test_offline_ingestion(use_registry):
+    """Tests that the benchmark's ingestion stores chunks in the collection and indexes them before retrieval is timed."""
+
+    collection = chromadb.EphemeralClient().get_or_create_collection(f"benchmark_{uuid.uuid4().hex}")
+    use_registry({"embedding_model": lambda: HashingEncoder(dim=64), "indexing_collection": lambda: collection}, pdf_processor)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        lexical_index_path = os.path.join(tmp_dir, "bm25_index.json")
+        pdf_path = os.path.join(POLICY_FOLDER, sorted(name for name in os.listdir(POLICY_FOLDER) if name.endswith(".pdf"))[0])
+        report = ingest_policies([pdf_path], lexical_index_path)
+        lexical_index = BM25Index.load(lexical_index_path)
+
+    assert report["items"] == 1 and report["chunks"] > 0, f"Nothing was indexed: {report}"
+    assert collection.count() == report["chunks"] == len(lexical_index.ids), "Collection and BM25 index should hold every chunk"
+
+    print("Offline ingestion tests passed!")
+
+def test_run_benchmarks():
+    """Tests a full offline benchmark run on a tiny corpus, and that it leaves the shared registry as it found it."""
+
+    offline_names = ["embedding_model", "chroma_client", "policy_collection", "indexing_collection", "query_cache", "llm"]
+    loaded_before = {name: registry.is_loaded(name) for name in offline_names}
+    paths_before = policy_retriever.INDEX_MANIFEST_PATH, policy_retriever.LEXICAL_INDEX_PATH
+
+    with tempfile.TemporaryDirectory() as pdf_folder:
+        shutil.copy(os.path.join(POLICY_FOLDER, "CancellationPolicy.pdf"), pdf_folder)
+        results = run_benchmarks(synthetic_emails(3), pdf_folder=pdf_folder, concurrency=2)
+
+    assert set(results) == {"ingest", "classify", "sentiment", "retrieve", "respond", "pipeline"}, f"Missing components: {sorted(results)}"
+    assert results["ingest"]["items"] == 1 and results["ingest"]["chunks"] > 0, f"Nothing was indexed: {results['ingest']}"
+    for name in ["classify", "sentiment", "retrieve", "respond"]:
+        assert results[name]["items"] == 3 and results[name]["throughput_per_sec"] > 0, f"Unexpected {name} report: {results[name]}"
+    assert results["pipeline"]["stages"], "Pipeline stages were not traced"
+
+    assert {name: registry.is_loaded(name) for name in offline_names} == loaded_before, "Offline artifacts left in the registry"
+    assert (policy_retriever.INDEX_MANIFEST_PATH, policy_retriever.LEXICAL_INDEX_PATH) == paths_before, "Index paths not restored"
+
+    print("Benchmark run tests passed!")
+
+if __name__ == "__main__":
+    test_synthetic_corpus()
+    test_hashing_encoder()
+    test_reports_and_baseline()
+    from conftest import run_test
+    run_test(test_offline_ingestion)
+    test_run_benchmarks()
@@ -2,7 +2,7 @@ import sys
 import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
-from classification import classify_email  
+from classification import classify_email, classify_emails
 
 def test_email_classification():
     """Tests email classification for different types of queries."""
@@ -27,5 +27,28 @@ def test_email_classification():
 
     print("Email classification tests passed!")
 
+def test_batch_email_classification():
+    """Tests that batch classification matches single-query classification."""
+
+    queries = [
+        "I need a refund for my damaged product.",
+        "My payment was deducted twice. Please help.",
+        "I want to contact your support team.",
+    ]
+
+    categories, confidences = classify_emails(iter(queries))
+
+    assert len(categories) == len(queries) and len(confidences) == len(queries), "Batch size mismatch"
+    for email_text, category, confidence in zip(queries, categories, confidences):
+        expected_category, expected_confidence = classify_email(email_text)
+        assert category == expected_category, f"Batch category {category} differs for input: {email_text}"
+        assert abs(confidence - expected_confidence) < 1e-9, f"Batch confidence differs for input: {email_text}"
+
+    empty_categories, empty_confidences = classify_emails([])
+    assert len(empty_categories) == 0 and len(empty_confidences) == 0, "Empty batch should return empty arrays"
+
+    print("Batch email classification tests passed!")
+
 if __name__ == "__main__":
     test_email_classification()
+    test_batch_email_classification()
@@ -0,0 +1,57 @@
+import sys
+import os
+import pickle
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from compact_model import export_compact, CompactVectorizer, CompactLinearModel
+from model_registry import (
+    EMAIL_MODEL_PATH, EMAIL_VECTORIZER_PATH, SENTIMENT_MODEL_PATH, SENTIMENT_VECTORIZER_PATH,
+)
+
+TEXTS = [
+    "I need a refund for my damaged product.",
+    "My payment was deducted twice. Please help!",
+    "Where is my package? I haven't received it yet.",
+    "I love this service!",
+    "The product is okay, nothing special.",
+    "supercalifragilisticexpialidocious-order-number-1234567890",
+    "",
+]
+
+def _load(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def test_compact_matches_pickled_models():
+    """Tests that the memory-mapped compact models reproduce the pickled sklearn models."""
+
+    for vectorizer_path, model_path in [
+        (EMAIL_VECTORIZER_PATH, EMAIL_MODEL_PATH),
+        (SENTIMENT_VECTORIZER_PATH, SENTIMENT_MODEL_PATH),
+    ]:
+        vectorizer, model = _load(vectorizer_path), _load(model_path)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            export_compact(vectorizer, model, tmp_dir)
+            compact_vectorizer = CompactVectorizer(tmp_dir)
+            compact_model = CompactLinearModel(tmp_dir)
+
+            assert isinstance(compact_model.weights, np.memmap), "Weights should be memory-mapped"
+            assert [compact_vectorizer.analyze(text) for text in TEXTS] == [vectorizer.build_analyzer()(text) for text in TEXTS]
+
+            expected_features = vectorizer.transform(TEXTS)
+            features = compact_vectorizer.transform(TEXTS)
+            assert np.allclose(features.toarray(), expected_features.toarray()), "TF-IDF features differ"
+
+            proba = compact_model.predict_proba(features)
+            assert np.allclose(proba, model.predict_proba(expected_features)), "Probabilities differ"
+            assert list(compact_model.classes_) == list(model.classes_), "Class labels differ"
+
+            del compact_vectorizer, compact_model, features  # Release memory maps before cleanup
+
+    print("Compact model tests passed!")
+
+if __name__ == "__main__":
+    test_compact_matches_pickled_models()
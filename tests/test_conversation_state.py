@@ -0,0 +1,99 @@
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from conversation_state import ConversationState, ConversationStore
+from prompt_builder import build_chat_prompt
+from response_cache import SemanticResponseCache
+from llm_client import StubLLM
+import response_generator
+
+# Toy embeddings: refund questions point one way, account questions another
+EMBEDDINGS = {
+    "Where is my refund?": [1.0, 0.0, 0.0],
+    "How long does the refund take?": [0.9, 0.3, 0.0],
+    "How do I delete my account?": [0.0, 0.0, 1.0],
+    "And the refund for my other order?": [0.95, 0.0, 0.1],
+}
+POLICIES = {
+    "Where is my refund?": ("refund-1", "Refunds are credited within 7 days.", None),
+    "How do I delete my account?": ("account-1", "Accounts can be deleted from settings.", np.array([0.0, 0.0, 1.0])),
+}
+
+class CountingRetriever:
+    """Stand-in for match_policy that records which queries were actually searched."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        return POLICIES.get(query, (None, "NO_MATCH", None))
+
+def test_topic_reuse():
+    """Tests that follow-ups close to an earlier topic reuse its policy instead of searching again."""
+
+    retriever = CountingRetriever()
+    state = ConversationState(retrieve=retriever, embed=lambda query: np.array(EMBEDDINGS[query]))
+
+    assert state.match("Where is my refund?")[0] == "refund-1", "First turn should search"
+    chunk_id, document, embedding = state.match("How long does the refund take?")
+    assert chunk_id == "refund-1" and document == "Refunds are credited within 7 days.", "Follow-up should reuse the topic"
+    assert embedding is not None, "Reused matches still return the turn's embedding"
+
+    assert state.match("How do I delete my account?")[0] == "account-1", "A new topic should search"
+    assert state.match("And the refund for my other order?")[0] == "refund-1", "Returning to an earlier topic should reuse it"
+
+    assert retriever.queries == ["Where is my refund?", "How do I delete my account?"], f"Unexpected searches: {retriever.queries}"
+    assert state.reuses == 2 and state.searches == 2, f"Unexpected counters: {state.reuses}, {state.searches}"
+
+    print("Topic reuse tests passed!")
+
+def test_rolling_summary():
+    """Tests that old turns are folded into a compact summary that the chat prompt uses instead of raw history."""
+
+    state = ConversationState(retrieve=CountingRetriever(), embed=lambda query: np.zeros(3), recent_turns=2)
+    for i in range(5):
+        state.add_turn(f"Question {i} about my order? Extra detail.", "A long answer. " * 40)
+
+    assert [turn["user"] for turn in state.recent_turns()] == ["Question 3 about my order? Extra detail.", "Question 4 about my order? Extra detail."]
+    assert state.summary_topics() == ["Question 0 about my order?", "Question 1 about my order?", "Question 2 about my order?"]
+
+    prompt = build_chat_prompt(state.recent_turns(), "Anything else?", "NO_MATCH", summary_topics=state.summary_topics())
+    assert "Earlier, the user asked: Question 0 about my order?; Question 1 about my order?" in prompt, prompt
+    assert "Extra detail." not in prompt.split("Earlier, the user asked:")[1].split("\n")[0], "Summary should keep only the questions"
+
+    store = ConversationStore(factory=lambda: ConversationState(recent_turns=2))
+    history = [{"user": f"Stored question {i}.", "ai": "Answer."} for i in range(3)]
+    resumed = store.get("conversation-a", history)
+    assert resumed.summary_topics() == ["Stored question 0."] and len(resumed.recent_turns()) == 2, "Resumed state not seeded"
+    assert store.get("conversation-a", []) is resumed, "State should be kept per conversation"
+
+    print("Rolling summary tests passed!")
+
+def test_chat_response_with_conversation(use_registry, monkeypatch):
+    """Tests that chat responses record turns in the conversation state and reuse its topics."""
+
+    retriever = CountingRetriever()
+    use_registry({"llm": lambda: StubLLM(reply=lambda prompt: "Refunds take seven days.")}, response_generator)
+    monkeypatch.setattr(response_generator, "conversations", ConversationStore(
+        factory=lambda: ConversationState(retrieve=retriever, embed=lambda query: np.array(EMBEDDINGS[query]))
+    ))
+    monkeypatch.setattr(response_generator, "response_cache", SemanticResponseCache())
+    first = response_generator.generate_chat_response([], "Where is my refund?", "conversation-a")
+    second = response_generator.generate_chat_response([], "How long does the refund take?", "conversation-a")
+    state = response_generator.conversations.get("conversation-a")
+
+    assert first == second == "Refunds take seven days.", f"Unexpected answers: {first!r}, {second!r}"
+    assert retriever.queries == ["Where is my refund?"], f"Follow-up should not search again: {retriever.queries}"
+    assert [turn["user"] for turn in state.recent_turns()] == ["Where is my refund?", "How long does the refund take?"]
+
+    print("Conversation chat response tests passed!")
+
+if __name__ == "__main__":
+    test_topic_reuse()
+    test_rolling_summary()
+    from conftest import run_test
+    run_test(test_chat_response_with_conversation)
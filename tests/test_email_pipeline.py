@@ -0,0 +1,99 @@
+import sys
+import os
+import asyncio
+import json
+import tempfile
+import uuid
+
+import chromadb
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from email_pipeline import process_email, process_emails
+from benchmark import HashingEncoder
+from embedding_cache import QueryEmbeddingCache
+from lexical_index import BM25Backend
+from llm_client import StubLLM
+from response_cache import SemanticResponseCache
+from retrieval_backends import InMemoryBackend
+import policy_retriever
+import response_generator
+import response_tiers
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data'))
+POLICIES = [
+    ("refund_0", "Refunds for damaged products are credited within 7 days of the return.", {"section": "Refunds", "source": "Returns"}),
+    ("payment_0", "Payments deducted twice are reversed to the original payment method.", {"section": "Payments", "source": "Payments"}),
+    ("contact_0", "You can contact the support team by chat, email or phone.", {"section": "Contact", "source": "Contact"}),
+]
+REPLY = "Thanks for reaching out, we are on it."
+
+def _load_json(name):
+    with open(os.path.join(DATA_DIR, name), "r") as f:
+        return json.load(f)
+
+def _use_offline_services(use_registry, monkeypatch, llm):
+    """Serves the pipeline from a stub LLM and a small in-memory policy index, from any working directory and offline."""
+    encoder = HashingEncoder(dim=64)
+    collection = chromadb.EphemeralClient().create_collection(f"policies_{uuid.uuid4().hex}", embedding_function=None)
+    collection.add(
+        ids=[chunk_id for chunk_id, _, _ in POLICIES],
+        documents=[document for _, document, _ in POLICIES],
+        embeddings=encoder.encode([document for _, document, _ in POLICIES]).tolist(),
+        metadatas=[metadata for _, _, metadata in POLICIES],
+    )
+
+    use_registry({
+        "embedding_model": lambda: encoder,
+        "query_cache": lambda: QueryEmbeddingCache(max_size=16),
+        "policy_collection": lambda: collection,
+        "retrieval_backend": lambda: InMemoryBackend(collection),
+        "lexical_backend": lambda: BM25Backend(os.path.join(tempfile.gettempdir(), "missing_bm25.json")),
+        "policy_routes": lambda: {},
+        "llm": lambda: llm,
+        "responses": lambda: _load_json("responses.json"),
+        "fast_path_thresholds": lambda: _load_json("fast_path_thresholds.json"),
+    }, policy_retriever, response_generator, response_tiers)
+    monkeypatch.setattr(response_generator, "response_cache", SemanticResponseCache())
+
+def test_process_emails(use_registry, monkeypatch):
+    """Tests concurrent email processing, ensuring results come back complete and in input order."""
+
+    emails = [
+        ("Refund", "I need a refund for my damaged product."),
+        ("Payment", "My payment was deducted twice. Please help."),
+        ("Contact", "I want to contact your support team."),
+    ]
+
+    _use_offline_services(use_registry, monkeypatch, StubLLM(reply=lambda prompt: REPLY))
+    results = asyncio.run(process_emails(emails, concurrency=2, llm_timeout=60))
+
+    assert len(results) == len(emails), "Missing results"
+    for (subject, email_text), result in zip(emails, results):
+        assert result["subject"] == subject and result["email"] == email_text, f"Result out of order for {subject}"
+        assert result["category"] is not None, f"Category is None for input: {email_text}"
+        if result["tier"] == "llm":
+            assert result["response"] == REPLY, f"Invalid LLM response for {subject}"
+        else:
+            assert isinstance(result["response"], str) and len(result["response"]) > 0, f"Invalid {result['tier']} response for {subject}"
+        assert isinstance(result["escalation"], bool), f"Invalid escalation flag for {subject}"
+
+    print("Concurrent email processing tests passed!")
+
+def test_llm_timeout_fallback(use_registry, monkeypatch):
+    """Tests that an LLM call exceeding its timeout falls back to the category's predefined response."""
+
+    _use_offline_services(use_registry, monkeypatch, StubLLM(latency=1.0))
+    monkeypatch.setattr(response_tiers, "FAST_PATH_ENABLED", False)  # Otherwise a confident, calm email never reaches the LLM
+    result = asyncio.run(process_email("I need a refund for my damaged product.", llm_timeout=0.05))
+    fallback = response_generator.fallback_response(result["category"])
+
+    assert result["tier"] == "llm", f"Expected the LLM tier, got {result['tier']}"
+    assert result["response"] == fallback, f"Expected the fallback response, got {result['response']!r}"
+    assert result["truncated"] is False, "No part of the LLM reply arrived, so nothing was cut off"
+
+    print("LLM timeout fallback tests passed!")
+
+if __name__ == "__main__":
+    from conftest import run_test
+    run_test(test_process_emails)
+    run_test(test_llm_timeout_fallback)
@@ -0,0 +1,79 @@
+import sys
+import os
+from types import SimpleNamespace
+import numpy as np
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from embedding_backends import OnnxSentenceEncoder, compare_encoders, mean_pool
+
+VOCAB = {"<pad>": 0, "[UNK]": 1, "where": 2, "is": 3, "my": 4, "refund": 5, "cancel": 6, "order": 7}
+
+class TableSession:
+    """Stand-in for an ONNX Runtime session: looks token embeddings up in a fixed table."""
+
+    def __init__(self, dim=4, seed=0):
+        self.table = np.random.default_rng(seed).normal(size=(len(VOCAB), dim)).astype(np.float32)
+        self.batch_sizes = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+
+    def run(self, output_names, inputs):
+        self.batch_sizes.append(len(inputs["input_ids"]))
+        return [self.table[inputs["input_ids"]]]
+
+def _tokenizer():
+    tokenizer = Tokenizer(WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.enable_padding(pad_id=0, pad_token="<pad>")
+    return tokenizer
+
+def _expected(session, text):
+    vector = session.table[[VOCAB.get(word, 1) for word in text.split()]].mean(axis=0)
+    return vector / np.linalg.norm(vector)
+
+def test_mean_pool_ignores_padding():
+    """Tests that padded positions do not contribute to the pooled embedding."""
+
+    token_embeddings = np.array([[[1.0, 0.0], [3.0, 2.0], [100.0, 100.0]]])
+    pooled = mean_pool(token_embeddings, np.array([[1, 1, 0]]))
+    assert np.allclose(pooled, [[2.0, 1.0]]), f"Unexpected pooled embedding {pooled}"
+
+    print("Mean pooling tests passed!")
+
+def test_onnx_encoder():
+    """Tests single and batched encoding, including input order across length-sorted batches."""
+
+    session = TableSession()
+    encoder = OnnxSentenceEncoder(session, _tokenizer())
+    texts = ["where is my refund", "cancel order", "refund", "where is my order"]
+
+    single = encoder.encode("cancel order")
+    assert single.shape == (4,) and np.allclose(single, _expected(session, "cancel order"), atol=1e-6)
+
+    batch = encoder.encode(texts, batch_size=3)
+    assert batch.shape == (4, 4) and session.batch_sizes[-2:] == [3, 1], "Unexpected batching"
+    for text, embedding in zip(texts, batch):
+        assert np.allclose(embedding, _expected(session, text), atol=1e-6), f"Embedding out of order for '{text}'"
+
+    print("ONNX encoder tests passed!")
+
+def test_compare_encoders():
+    """Tests that an encoder compared with itself reports full agreement."""
+
+    encoder = OnnxSentenceEncoder(TableSession(), _tokenizer())
+    queries = ["where is my refund", "cancel order", "refund"]
+    corpus = encoder.encode(["refund", "cancel order", "where is my order", "my order"])
+
+    report = compare_encoders(encoder, encoder, queries, corpus, k=2, repeats=1)
+    assert report["accuracy"]["min_cosine"] > 0.9999 and report["accuracy"]["top_k_overlap"] == 1.0, f"Unexpected report {report}"
+
+    print("Encoder comparison tests passed!")
+
+if __name__ == "__main__":
+    test_mean_pool_ignores_padding()
+    test_onnx_encoder()
+    test_compare_encoders()
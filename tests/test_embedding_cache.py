@@ -0,0 +1,119 @@
+import sys
+import os
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from embedding_cache import QueryEmbeddingCache
+
+class CountingEncoder:
+    """Deterministic stand-in for the sentence embedding model that counts calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        return np.array([len(text), sum(map(ord, text)) % 97, 1.0], dtype=np.float32)
+
+def test_lru_cache():
+    """Tests hits on normalized repeats, LRU eviction and hit/miss counters."""
+
+    encoder = CountingEncoder()
+    cache = QueryEmbeddingCache(max_size=2)
+
+    first = cache.get("Where is my refund?", encoder)
+    again = cache.get("  where IS my   refund? ", encoder)
+    assert encoder.calls == 1, "Normalized repeat query should not be re-encoded"
+    assert np.array_equal(first, again), "Cached embedding differs"
+
+    cache.get("how to cancel order", encoder)
+    cache.get("where is my refund?", encoder)  # Refresh, so "how to cancel order" is least recent
+    cache.get("contact support", encoder)  # Evicts "how to cancel order"
+    cache.get("how to cancel order", encoder)
+    assert encoder.calls == 4, f"Unexpected encoder calls {encoder.calls}"
+
+    stats = cache.stats()
+    assert stats["size"] == 2 and stats["hits"] == 2 and stats["misses"] == 4, f"Unexpected stats {stats}"
+    assert abs(stats["hit_rate"] - 2 / 6) < 1e-9, f"Unexpected hit rate {stats['hit_rate']}"
+
+    print("LRU query cache tests passed!")
+
+def test_persistent_cache():
+    """Tests that embeddings survive a restart through the on-disk tier."""
+
+    encoder = CountingEncoder()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "query_cache.sqlite")
+
+        cache = QueryEmbeddingCache(max_size=8, path=path, namespace="model-a")
+        first = cache.get("where is my refund", encoder)
+        cache.close()
+
+        restarted = QueryEmbeddingCache(max_size=8, path=path, namespace="model-a")
+        reloaded = restarted.get("where is my refund", encoder)
+        restarted.close()
+
+        assert encoder.calls == 1, "Persisted embedding should not be re-encoded"
+        assert np.array_equal(first, reloaded), "Persisted embedding differs"
+        assert restarted.stats()["disk_hits"] == 1, "Expected a disk hit after restart"
+
+        other_model = QueryEmbeddingCache(max_size=8, path=path, namespace="model-b")
+        other_model.get("where is my refund", encoder)
+        other_model.close()
+        assert encoder.calls == 2, "Different namespaces must not share embeddings"
+
+    print("Persistent query cache tests passed!")
+
+def test_batched_lookup():
+    """Tests that get_many encodes only the distinct cache misses, in a single batch call."""
+
+    encoder = CountingEncoder()
+    batches = []
+
+    def encode_batch(texts):
+        batches.append(list(texts))
+        return [encoder(text) for text in texts]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = QueryEmbeddingCache(max_size=8, path=os.path.join(tmp_dir, "query_cache.sqlite"))
+        cached = cache.get("where is my refund", encoder)
+
+        embeddings = cache.get_many(["Where is my refund", "cancel order", "CANCEL  order", "contact support"], encode_batch)
+        cache.close()
+
+    assert batches == [["cancel order", "contact support"]], f"Unexpected encode batches {batches}"
+    assert embeddings.shape == (4, 3), f"Unexpected shape {embeddings.shape}"
+    assert np.array_equal(embeddings[0], cached) and np.array_equal(embeddings[1], embeddings[2])
+    assert np.array_equal(embeddings[3], encoder("contact support")), "Embeddings out of order"
+
+    print("Batched query cache tests passed!")
+
+def test_disk_row_cap():
+    """Tests that the on-disk tier keeps only the newest max_disk_rows embeddings per namespace."""
+
+    encoder = CountingEncoder()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "query_cache.sqlite")
+        cache = QueryEmbeddingCache(max_size=8, path=path, namespace="model-a", max_disk_rows=3)
+        other_model = QueryEmbeddingCache(max_size=8, path=path, namespace="model-b", max_disk_rows=3)
+        other_model.get("where is my refund", encoder)
+
+        for query in ["query 0", "query 1", "query 2", "query 3"]:
+            cache.get(query, encoder)
+        cache.get_many(["query 4", "query 1"], lambda texts: [encoder(text) for text in texts])
+
+        rows = cache._db.execute("SELECT namespace, query FROM query_embeddings ORDER BY rowid").fetchall()
+        cache.close()
+        other_model.close()
+
+    assert rows == [("model-b", "where is my refund"), ("model-a", "query 2"), ("model-a", "query 3"), ("model-a", "query 4")], \
+        f"Unexpected rows {rows}"
+
+    print("Disk row cap tests passed!")
+
+if __name__ == "__main__":
+    test_lru_cache()
+    test_persistent_cache()
+    test_batched_lookup()
+    test_disk_row_cap()
@@ -0,0 +1,96 @@
+import sys
+import os
+import sqlite3
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from history_store import HistoryStore
+
+def _entry(i, category="REFUND", escalation=False):
+    return {
+        "subject": f"Subject {i}", "email": f"Email body {i}", "category": category,
+        "category_confidence": np.float64(0.9), "sentiment": "neutral", "sentiment_confidence": 0.8,
+        "response": "Response", "escalation": escalation, "tier": "llm", "time": 0.5,
+        "timestamp": f"2026-10-{10 + i % 5:02d} 12:00:{i:02d}",
+    }
+
+def _stored_rows(path):
+    """Counts rows actually on disk, through a separate connection."""
+    with sqlite3.connect(path) as db:
+        return db.execute("SELECT COUNT(*) FROM emails").fetchone()[0]
+
+def test_batched_writes():
+    """Tests that writes are batched, flushed by size, age and reads, and survive reopening the store."""
+
+    now = [0.0]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "history.sqlite")
+        store = HistoryStore(path, batch_size=3, flush_interval=10, clock=lambda: now[0])
+
+        store.add_email(_entry(0))
+        store.add_email(_entry(1))
+        assert _stored_rows(path) == 0, "Entries should wait for their batch"
+        store.add_email(_entry(2))
+        assert _stored_rows(path) == 3, "A full batch should be written"
+
+        store.add_email(_entry(3))
+        now[0] = 11
+        store.add_email(_entry(4))
+        assert _stored_rows(path) == 5, "Entries older than the flush interval should be written"
+
+        entry_id = store.add_email(_entry(5))
+        assert store.count_emails() == 6, "Reads must see pending writes"
+        store.set_feedback(entry_id, "helpful")
+        store.close()
+
+        reopened = HistoryStore(path)
+        assert reopened.count_emails() == 6, "History should survive a restart"
+        assert reopened.query_emails(search="body 5")[0]["feedback"] == "helpful", "Feedback not stored"
+        reopened.close()
+
+    print("Batched history write tests passed!")
+
+def test_paged_queries():
+    """Tests newest-first pagination and category, escalation, date and text filters."""
+
+    store = HistoryStore(":memory:", batch_size=100)
+    for i in range(25):
+        store.add_email(_entry(i, category="REFUND" if i % 2 else "PAYMENT", escalation=i % 5 == 0))
+
+    first_page = store.query_emails(limit=10)
+    second_page = store.query_emails(limit=10, offset=10)
+    assert len(first_page) == 10 and len(second_page) == 10, "Unexpected page sizes"
+    timestamps = [entry["timestamp"] for entry in first_page + second_page]
+    assert timestamps == sorted(timestamps, reverse=True), "Pages should be newest first"
+    assert not {entry["id"] for entry in first_page} & {entry["id"] for entry in second_page}, "Pages overlap"
+
+    assert store.count_emails(category="REFUND") == 12 and store.categories() == ["PAYMENT", "REFUND"]
+    escalated = store.query_emails(escalation=True)
+    assert len(escalated) == 5 and all(entry["escalation"] is True for entry in escalated), "Escalation filter failed"
+    assert store.count_emails(since="2026-10-12", until="2026-10-13") == 5, "Date filter failed"
+    assert [entry["subject"] for entry in store.query_emails(search="body 17")] == ["Subject 17"], "Search filter failed"
+
+    print("Paged history query tests passed!")
+
+def test_chat_turns():
+    """Tests that chat turns are stored per conversation and read back as the most recent ones, oldest first."""
+
+    store = HistoryStore(":memory:", batch_size=100)
+    for i in range(12):
+        store.add_chat_turn("conversation-a", f"Question {i}", f"Answer {i}")
+    store.add_chat_turn("conversation-b", "Other question", "Other answer")
+
+    recent = store.chat_turns("conversation-a", limit=3)
+    assert [turn["user"] for turn in recent] == ["Question 9", "Question 10", "Question 11"], f"Unexpected turns: {recent}"
+    older = store.chat_turns("conversation-a", limit=3, offset=3)
+    assert [turn["user"] for turn in older] == ["Question 6", "Question 7", "Question 8"], f"Unexpected older turns: {older}"
+    assert store.count_chat_turns("conversation-a") == 12 and store.count_chat_turns("conversation-b") == 1
+
+    print("Chat history tests passed!")
+
+if __name__ == "__main__":
+    test_batched_writes()
+    test_paged_queries()
+    test_chat_turns()
@@ -0,0 +1,66 @@
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from lexical_index import BM25Index, BM25Backend, tokenize
+
+RECORDS = [
+    ("Refunds_Instant Refunds_0", "Instant refunds are credited to your wallet within minutes of pickup.",
+     {"section": "Instant Refunds", "source": "Refunds"}),
+    ("Refunds_Refund Timelines_0", "Refunds to the original payment method take 5-7 business days.",
+     {"section": "Refund Timelines", "source": "Refunds"}),
+    ("Privacy_Grievance Officer_0", "You may contact our grievance officer by email for any privacy concern.",
+     {"section": "Grievance Officer", "source": "Privacy"}),
+    ("Terms_Placing Orders_0", "Orders are confirmed once payment is received. Your order can be tracked online.",
+     {"section": "Placing Orders", "source": "Terms"}),
+]
+
+def test_tokenize():
+    """Tests lowercasing, stop word removal and plural folding."""
+
+    assert tokenize("Where are my Refunds?") == ["refund"], "Unexpected terms"
+    assert tokenize("Business address") == ["business", "address"], "Words ending in 'ss' must be kept"
+
+    print("Tokenizer tests passed!")
+
+def test_bm25_ranking():
+    """Tests that exact policy terms rank the right chunk first, including terms only in the section title."""
+
+    index = BM25Index.build(RECORDS)
+
+    assert index.query("grievance officer")[0]["id"] == "Privacy_Grievance Officer_0"
+    assert index.query("instant refund")[0]["id"] == "Refunds_Instant Refunds_0"
+    assert index.query("refund timelines")[0]["id"] == "Refunds_Refund Timelines_0", "Section titles should be indexed"
+    assert index.query("unrelated gibberish") == [], "Chunks sharing no term should not be returned"
+
+    hits = index.query("grievance officer", k=3)
+    assert all(0 < hit["score"] <= 1 for hit in hits), "Scores should be normalized"
+    assert hits[0]["metadata"]["section"] == "Grievance Officer", "Missing chunk metadata"
+
+    print("BM25 ranking tests passed!")
+
+def test_backend_reload():
+    """Tests saving, loading and reloading the index file when the index version changes."""
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bm25_index.json")
+        version = {"value": 1}
+        backend = BM25Backend(path, version_fn=lambda: version["value"])
+        assert backend.query(["grievance officer"]) == [[]], "Missing index should return no hits"
+
+        BM25Index.build(RECORDS).save(path)
+        assert backend.query(["grievance officer"]) == [[]], "Index should not reload before a version change"
+
+        version["value"] = 2
+        hits = backend.query(["grievance officer"])[0]
+        expected = BM25Index.build(RECORDS).query("grievance officer")
+        assert [hit["id"] for hit in hits] == [hit["id"] for hit in expected], "Loaded index ranks differently"
+        assert abs(hits[0]["score"] - expected[0]["score"]) < 1e-6, "Loaded index scores differently"
+
+    print("BM25 backend tests passed!")
+
+if __name__ == "__main__":
+    test_tokenize()
+    test_bm25_ranking()
+    test_backend_reload()
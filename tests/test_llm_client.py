@@ -0,0 +1,182 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from llm_client import CircuitBreaker, CircuitOpenError, ResilientLLM, StubLLM, TokenBucket
+
+class FakeClock:
+    """Manually advanced clock, so rate limits and breaker timeouts can be tested without waiting."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+class BadRequestError(Exception):
+    status_code = 400
+
+def test_token_bucket():
+    """Tests that the bucket allows a burst, then spaces calls out at the refill rate."""
+
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+    waits = [bucket.acquire(1, clock.sleep) for _ in range(5)]
+    assert waits[:3] == [0.0, 0.0, 0.0], f"Burst should not wait: {waits}"
+    assert waits[3:] == [0.5, 0.5], f"Calls beyond the burst should wait 1/rate: {waits}"
+
+    clock.now += 10
+    assert bucket.acquire(1, clock.sleep) == 0.0, "Bucket should refill while idle"
+
+    # Callers that time out while queued give their tokens back instead of leaving debt behind
+    async def give_up():
+        bucket = TokenBucket(rate=1, capacity=2)
+        for _ in range(20):
+            try:
+                await asyncio.wait_for(bucket.aacquire(), 0.01)
+            except asyncio.TimeoutError:
+                pass
+        return bucket.reserve(1)
+
+    assert asyncio.run(give_up()) < 1.5, "Cancelled waits should release their reserved tokens"
+
+    print("Token bucket tests passed!")
+
+def test_circuit_breaker():
+    """Tests the closed -> open -> half-open -> closed cycle and re-opening after a failed trial call."""
+
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow(), "One failure should not open the circuit"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow(), "Circuit should open after the threshold"
+
+    clock.now += 10
+    assert breaker.state == "half-open", "Circuit should be half-open after the reset timeout"
+    assert breaker.allow() and not breaker.allow(), "Only one trial call should be let through"
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.opens == 2, "A failed trial should re-open the circuit"
+
+    clock.now += 10
+    assert breaker.allow(), "Trial call expected"
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow(), "A successful trial should close the circuit"
+
+    print("Circuit breaker tests passed!")
+
+def test_retries_and_circuit():
+    """Tests retries on transient failures, no retry on bad requests, and failing fast once the circuit is open."""
+
+    llm = ResilientLLM(StubLLM(reply=lambda prompt: f"Echo: {prompt}", failures=2), sleep=lambda seconds: None)
+    assert llm.invoke("hello").content == "Echo: hello", "Expected the reply after retries"
+    assert llm.stats()["retries"] == 2 and llm.stats()["circuit"] == "closed", f"Unexpected stats: {llm.stats()}"
+
+    class RejectingLLM:
+        calls = 0
+
+        def invoke(self, prompt):
+            self.calls += 1
+            raise BadRequestError("prompt too long")
+
+    rejecting = RejectingLLM()
+    try:
+        ResilientLLM(rejecting, sleep=lambda seconds: None).invoke("hello")
+        assert False, "Expected the bad request error"
+    except BadRequestError:
+        pass
+    assert rejecting.calls == 1, "Bad requests must not be retried"
+
+    down = StubLLM(failures=100)
+    llm = ResilientLLM(down, breaker=CircuitBreaker(failure_threshold=3), max_retries=5, sleep=lambda seconds: None)
+    try:
+        llm.invoke("hello")
+        assert False, "Expected the circuit to open"
+    except CircuitOpenError:
+        pass
+    assert down.calls == 3, f"Provider called {down.calls} times after the circuit opened"
+
+    print("Retry and circuit breaker tests passed!")
+
+def test_streaming_retries():
+    """Tests that a stream failing before its first chunk is retried, and streams pass chunks through."""
+
+    llm = ResilientLLM(StubLLM(reply=lambda prompt: "Your refund is on its way.", failures=1), sleep=lambda seconds: None)
+    assert "".join(chunk.content for chunk in llm.stream("refund?")) == "Your refund is on its way.", "Unexpected stream"
+    assert llm.stats()["retries"] == 1, "Stream should have been retried once"
+
+    async def collect():
+        return "".join([chunk.content async for chunk in llm.astream("refund?")])
+
+    assert asyncio.run(collect()) == "Your refund is on its way.", "Unexpected async stream"
+
+    print("Streaming retry tests passed!")
+
+def test_hedging_and_timeouts():
+    """Tests that a hedge request answers when the first one is slow, and that a stalled call times out."""
+
+    class SlowFirstLLM(StubLLM):
+        started = 0
+
+        async def ainvoke(self, prompt):
+            self.started += 1
+            await asyncio.sleep(1.0 if self.started == 1 else 0.01)
+            return await super().ainvoke(prompt)
+
+    llm = ResilientLLM(SlowFirstLLM(), hedge_after=0.05)
+
+    async def timed():
+        start_time = asyncio.get_running_loop().time()
+        reply = await llm.ainvoke("hello")
+        return reply, asyncio.get_running_loop().time() - start_time
+
+    reply, elapsed = asyncio.run(timed())
+    assert reply.content.startswith("Thank you"), "Expected the stub reply"
+    assert elapsed < 0.5 and llm.stats()["hedges"] == 1, f"Hedge should have answered first ({elapsed:.2f}s)"
+
+    class SlowFirstStreamLLM(StubLLM):
+        started = 0
+        closed = 0
+
+        async def astream(self, prompt):
+            self.started += 1
+            try:
+                await asyncio.sleep(1.0 if self.started == 1 else 0.01)
+                async for chunk in super().astream(prompt):
+                    yield chunk
+            finally:
+                self.closed += 1
+
+    provider = SlowFirstStreamLLM(reply=lambda prompt: "Hedged stream reply.")
+    streaming = ResilientLLM(provider, hedge_after=0.05)
+
+    async def timed_stream():
+        start_time = asyncio.get_running_loop().time()
+        text = "".join([chunk.content async for chunk in streaming.astream("hello")])
+        return text, asyncio.get_running_loop().time() - start_time
+
+    text, elapsed = asyncio.run(timed_stream())
+    assert text == "Hedged stream reply.", f"Unexpected hedged stream {text!r}"
+    assert elapsed < 0.5 and streaming.stats()["hedges"] == 1, f"Hedge should have streamed first ({elapsed:.2f}s)"
+    assert provider.closed == 2, "The losing stream should be closed"
+
+    stalled = ResilientLLM(StubLLM(latency=1.0), timeout=0.05, max_retries=1, backoff=0.01)
+    try:
+        asyncio.run(stalled.ainvoke("hello"))
+        assert False, "Expected a timeout"
+    except asyncio.TimeoutError:
+        pass
+    assert stalled.stats()["retries"] == 1, "Timeouts should be retried"
+
+    print("Hedging and timeout tests passed!")
+
+if __name__ == "__main__":
+    test_token_bucket()
+    test_circuit_breaker()
+    test_retries_and_circuit()
+    test_streaming_retries()
+    test_hedging_and_timeouts()
@@ -0,0 +1,62 @@
+import sys
+import os
+import json
+import mailbox
+import tempfile
+from email.message import EmailMessage
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from mailbox_reader import read_emails, completed_count
+
+def test_read_emails():
+    """Tests streaming emails from CSV, JSONL and mbox inputs."""
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = os.path.join(tmp_dir, "emails.csv")
+        with open(csv_path, "w", encoding="utf-8") as f:
+            f.write('instruction,category\n"I need a refund, please.",REFUND\nWhere is my order?,ORDER\n')
+
+        jsonl_path = os.path.join(tmp_dir, "emails.jsonl")
+        with open(jsonl_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"subject": "Payment", "body": "I was charged twice."}) + "\n\n")
+            f.write(json.dumps({"text": "Cancel my order."}) + "\n")
+
+        mbox_path = os.path.join(tmp_dir, "inbox.mbox")
+        box = mailbox.mbox(mbox_path)
+        message = EmailMessage()
+        message["Subject"] = "Damaged item"
+        message.set_content("My product arrived damaged.")
+        box.add(message)
+        box.close()
+
+        assert list(read_emails(csv_path)) == [
+            ("No Subject", "I need a refund, please."),
+            ("No Subject", "Where is my order?"),
+        ]
+        assert list(read_emails(jsonl_path)) == [
+            ("Payment", "I was charged twice."),
+            ("No Subject", "Cancel my order."),
+        ]
+        assert list(read_emails(mbox_path)) == [("Damaged item", "My product arrived damaged.")]
+
+    print("Mailbox reader tests passed!")
+
+def test_completed_count():
+    """Tests that the resume checkpoint counts complete results and drops a partially written line."""
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_path = os.path.join(tmp_dir, "results.jsonl")
+        assert completed_count(output_path) == 0, "Missing output should count as nothing done"
+
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write('{"id": 0}\n{"id": 1}\n{"id": 2, "resp')
+
+        assert completed_count(output_path) == 2, "Expected two complete results"
+        with open(output_path, encoding="utf-8") as f:
+            assert f.read() == '{"id": 0}\n{"id": 1}\n', "Partial last line should be truncated"
+
+    print("Resume checkpoint tests passed!")
+
+if __name__ == "__main__":
+    test_read_emails()
+    test_completed_count()
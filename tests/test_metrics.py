@@ -0,0 +1,130 @@
+import sys
+import os
+import socket
+import time
+import urllib.request
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from metrics import Metrics, metrics, start_metrics_server
+from llm_client import StubLLM
+import response_generator
+
+def test_stage_percentiles():
+    """Tests that timed stages report counts and p50/p95/p99 latencies."""
+
+    test_metrics = Metrics(enabled=True)
+    for ms in range(1, 101):
+        test_metrics.observe("embed", ms / 1000)
+
+    @test_metrics.traced("classify")
+    def classify(text):
+        return text.upper()
+
+    assert classify("refund") == "REFUND", "Decorated function must return its result"
+    with test_metrics.timer("search"):
+        pass
+
+    stages = test_metrics.report()["stages"]
+    assert stages["embed"]["count"] == 100 and abs(stages["embed"]["p50_ms"] - 50.5) < 0.01, f"Unexpected p50: {stages['embed']}"
+    assert abs(stages["embed"]["p99_ms"] - 99.01) < 0.01, f"Unexpected p99: {stages['embed']}"
+    assert stages["classify"]["count"] == 1 and stages["search"]["count"] == 1, f"Missing stages: {stages}"
+
+    print("Stage percentile tests passed!")
+
+def test_disabled_metrics():
+    """Tests that a disabled registry records nothing."""
+
+    test_metrics = Metrics(enabled=False)
+    with test_metrics.timer("embed"):
+        pass
+    test_metrics.increment("llm_tokens", 10, kind="prompt")
+    test_metrics.traced("classify")(lambda: None)()
+
+    report = test_metrics.report()
+    assert report["stages"] == {} and report["counters"] == {}, f"Disabled metrics recorded data: {report}"
+
+    print("Disabled metrics tests passed!")
+
+def test_prometheus_export():
+    """Tests the Prometheus text output, collectors that fail, and the /metrics endpoint."""
+
+    test_metrics = Metrics(enabled=True)
+    test_metrics.observe("llm", 0.25)
+    test_metrics.increment("llm_tokens", 120, kind="prompt")
+    test_metrics.register_collector("response_cache", lambda: {"hits": 3, "hit_rate": 0.75, "state": "ok"})
+    test_metrics.register_collector("broken", lambda: 1 / 0)
+
+    text = test_metrics.prometheus()
+    assert 'querygenie_stage_seconds{stage="llm",quantile="0.95"} 0.250000' in text, text
+    assert 'querygenie_stage_seconds_count{stage="llm"} 1' in text, text
+    assert 'querygenie_llm_tokens_total{kind="prompt"} 120' in text, text
+    assert "querygenie_response_cache_hit_rate 0.75" in text and "state" not in text, text
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = start_metrics_server(port)
+    try:
+        assert server.server_address[0] == "127.0.0.1", f"Should bind to localhost by default: {server.server_address}"
+        body = urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5).read().decode()
+        assert body.startswith("# ") or body == "\n", f"Unexpected /metrics body: {body[:80]}"
+    finally:
+        server.shutdown()
+
+    print("Prometheus export tests passed!")
+
+def test_llm_instrumentation(use_registry):
+    """Tests that streamed responses record LLM latency and token counts."""
+
+    use_registry({"llm": lambda: StubLLM(reply=lambda prompt: "Refunds take five business days.")}, response_generator)
+    metrics.reset()
+    answer = "".join(response_generator._stream_cached(None, None, "Where is my refund?", "fallback"))
+
+    report = metrics.report()
+    assert answer == "Refunds take five business days.", f"Unexpected answer: {answer}"
+    assert report["stages"]["llm"]["count"] == 1 and report["stages"]["llm_first_token"]["count"] == 1, report["stages"]
+    assert report["counters"]["llm_tokens[kind=prompt]"] > 0, report["counters"]
+    assert report["counters"]["llm_tokens[kind=completion]"] > 0, report["counters"]
+
+    print("LLM instrumentation tests passed!")
+
+class BrokenStreamLLM:
+    """Streams one piece, then loses the connection."""
+
+    def stream(self, prompt):
+        yield SimpleNamespace(content="Refunds take")
+        raise ConnectionError("LLM connection lost")
+
+def test_llm_wait_timing(use_registry):
+    """Tests that the llm stage excludes the consumer's time and is recorded when the stream fails."""
+
+    test_registry = use_registry({"llm": lambda: StubLLM(reply=lambda prompt: "Refunds take five business days.")}, response_generator)
+    metrics.reset()
+    for _ in response_generator.stream_llm("Where is my refund?"):
+        time.sleep(0.05)  # A slow consumer, e.g. a UI rendering each piece
+    slow_consumer = metrics.report()["stages"]["llm"]
+
+    metrics.reset()
+    test_registry.register("llm", lambda: BrokenStreamLLM())
+    test_registry.unload("llm")
+    try:
+        list(response_generator.stream_llm("Where is my refund?"))
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("The stream error should propagate")
+    failed = metrics.report()["stages"]
+
+    assert slow_consumer["count"] == 1 and slow_consumer["mean_ms"] < 50, f"Consumer time counted as LLM time: {slow_consumer}"
+    assert failed["llm"]["count"] == 1 and failed["llm_first_token"]["count"] == 1, f"Failed stream not timed: {failed}"
+
+    print("LLM wait timing tests passed!")
+
+if __name__ == "__main__":
+    test_stage_percentiles()
+    test_disabled_metrics()
+    test_prometheus_export()
+    from conftest import run_test
+    run_test(test_llm_instrumentation)
+    run_test(test_llm_wait_timing)
@@ -0,0 +1,129 @@
+import sys
+import os
+import uuid
+
+import chromadb
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from model_registry import ModelRegistry, registry
+import classification
+import model_registry
+
+def test_lazy_shared_loading():
+    """Tests that artifacts load once, on first use, and record their load cost."""
+
+    loads = []
+    warmed = []
+    models = ModelRegistry()
+    models.register("model", lambda: loads.append("model") or {"weights": [1, 2, 3]}, warmup=warmed.append)
+
+    assert not models.is_loaded("model") and loads == [], "Registering must not load the artifact"
+
+    first = models.get("model")
+    second = models.get("model")
+    assert first is second and loads == ["model"], "Artifact should be loaded once and shared"
+
+    models.warm_up("model")
+    assert warmed == [first], "Warm-up hook should receive the loaded artifact"
+
+    stats = models.report()["model"]
+    assert stats["load_sec"] >= 0 and "warmup_sec" in stats, f"Unexpected load report {stats}"
+
+    print("Lazy registry loading tests passed!")
+
+def test_warm_up_swapped():
+    """Tests that warming up an artifact installed with swap(), without ever loading it, runs its hook."""
+
+    warmed = []
+    models = ModelRegistry()
+    models.register("model", lambda: {"weights": "from disk"}, warmup=warmed.append)
+
+    swapped = {"weights": "trained online"}
+    models.swap("model", swapped)
+    models.warm_up("model")
+
+    assert warmed == [swapped], "Warm-up hook should receive the swapped-in artifact"
+    assert "warmup_sec" in models.report()["model"], "Warm-up time should be reported"
+
+    print("Swapped artifact warm-up tests passed!")
+
+def test_snapshot_restore():
+    """Tests that restore() puts back the loaders and artifacts saved by snapshot()."""
+
+    models = ModelRegistry()
+    models.register("model", lambda: "real")
+    real = models.get("model")
+    saved = models.snapshot()
+
+    models.register("model", lambda: "offline")
+    models.register("extra", lambda: "extra")
+    models.unload("model")
+    assert models.get("model") == "offline" and models.get("extra") == "extra"
+
+    models.restore(saved)
+    assert models.get("model") is real, "The previously loaded artifact should be back"
+    models.unload("model")
+    assert models.get("model") == "real", "The previous loader should be back"
+    assert not models.is_loaded("extra"), "Artifacts registered after the snapshot should be gone"
+
+    print("Registry snapshot tests passed!")
+
+def test_load_errors():
+    """Tests that unknown and failing artifacts raise instead of exiting the process."""
+
+    models = ModelRegistry()
+    models.register("broken", lambda: open("/nonexistent/model.pkl", "rb"))
+
+    for name, error in [("missing", KeyError), ("broken", RuntimeError)]:
+        try:
+            models.get(name)
+        except error:
+            pass
+        else:
+            raise AssertionError(f"Expected {error.__name__} for '{name}'")
+
+    print("Registry error handling tests passed!")
+
+def test_policy_collection_paths():
+    """Tests that reading a policy index that was never built fails clearly, and only ingestion creates it."""
+
+    models = ModelRegistry()
+    models.register("chroma_client", chromadb.EphemeralClient)
+    models.register("policy_collection", model_registry._load_policy_collection)
+    models.register("indexing_collection", model_registry._load_indexing_collection)
+    original = model_registry.registry, model_registry.POLICY_COLLECTION
+    model_registry.registry, model_registry.POLICY_COLLECTION = models, f"policies_{uuid.uuid4().hex}"
+    try:
+        try:
+            models.get("policy_collection")
+        except RuntimeError as e:
+            assert "has not been built" in str(e) and "pdf_processor.py" in str(e), f"Unclear error: {e}"
+        else:
+            raise AssertionError("Reading a missing policy index should raise")
+        names = [collection.name for collection in models.get("chroma_client").list_collections()]
+        assert model_registry.POLICY_COLLECTION not in names, "The read path must not create the collection"
+
+        created = models.get("indexing_collection")
+        assert models.get("policy_collection").name == created.name, "The read path should find the ingested collection"
+    finally:
+        model_registry.registry, model_registry.POLICY_COLLECTION = original
+
+    print("Policy collection path tests passed!")
+
+def test_modules_use_registry():
+    """Tests that inference modules share the registry's artifacts."""
+
+    classification.classify_email("Where is my package?")
+
+    assert registry.is_loaded("email_classifier") and registry.is_loaded("email_vectorizer")
+    assert classification.get_vectorizer() is registry.get("email_vectorizer")
+
+    print("Registry sharing tests passed!")
+
+if __name__ == "__main__":
+    test_lazy_shared_loading()
+    test_warm_up_swapped()
+    test_snapshot_restore()
+    test_load_errors()
+    test_policy_collection_paths()
+    test_modules_use_registry()
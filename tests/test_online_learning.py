@@ -0,0 +1,136 @@
+import sys
+import os
+import tempfile
+
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import MultinomialNB
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from online_learning import (
+    HashingFeatures, OnlineLearner, FeedbackLog, CORRECTION_WEIGHT,
+    load_online_model, training_labels, replay,
+)
+from model_registry import ModelRegistry
+from triage import TriagePipeline
+import classification
+import sentiment_analysis
+
+EMAILS = [
+    ("I want a refund for my damaged product.", "REFUND"),
+    ("When will I get my refund?", "REFUND"),
+    ("My payment was deducted twice.", "PAYMENT"),
+    ("Which payment methods do you accept?", "PAYMENT"),
+]
+REVIEWS = [
+    ("This is terrible, I am very angry.", "negative"),
+    ("Great service, thank you so much!", "positive"),
+    ("My order number is 1234.", "neutral"),
+]
+
+def _online_registry(tmp_dir, batch_size=3):
+    """Registry serving small online models trained on the toy data above, with learners writing to tmp_dir."""
+    features = HashingFeatures()
+    email_model = MultinomialNB().partial_fit(
+        features.transform([text for text, _ in EMAILS]), [label for _, label in EMAILS], classes=["PAYMENT", "REFUND"]
+    )
+    sentiment_model = SGDClassifier(loss="log_loss", random_state=0)
+    for _ in range(20):
+        sentiment_model.partial_fit(
+            features.transform([text for text, _ in REVIEWS]), [label for _, label in REVIEWS], classes=["negative", "neutral", "positive"]
+        )
+
+    models = ModelRegistry()
+    models.register("email_classifier", lambda: email_model)
+    models.register("email_vectorizer", lambda: features)
+    models.register("sentiment_model", lambda: sentiment_model)
+    models.register("sentiment_vectorizer", lambda: features)
+    models.register("email_learner", lambda: OnlineLearner(
+        "email_classifier", os.path.join(tmp_dir, "email_classifier.pkl"), batch_size=batch_size, models=models
+    ))
+    models.register("sentiment_learner", lambda: OnlineLearner(
+        "sentiment_model", os.path.join(tmp_dir, "sentiment_analyzer.pkl"), batch_size=batch_size, models=models
+    ))
+    return models
+
+def test_hashing_features(use_registry):
+    """Tests that hashing pre-analyzed terms matches hashing raw text, so triage can share one analysis pass."""
+
+    features = HashingFeatures()
+    texts = ["I need a refund for my damaged product.", "Payment deducted twice!", ""]
+    analyzer = features.build_analyzer()
+
+    direct = features.transform(texts).toarray()
+    assert direct.shape == (3, features.n_features), "Unexpected feature shape"
+    assert np.allclose(direct, features.transform_analyzed([analyzer(text) for text in texts]).toarray()), "Analyzed features differ"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        use_registry(_online_registry(tmp_dir), classification, sentiment_analysis)
+        pipeline = TriagePipeline()
+        results = pipeline.triage_batch([text for text, _ in EMAILS])
+        assert pipeline.shared_analysis, "Both hashing vectorizers should share one analysis pass"
+        categories, _ = classification.classify_emails([text for text, _ in EMAILS])
+
+    assert [result["category"] for result in results] == list(categories) == [label for _, label in EMAILS], "Triage mismatch"
+
+    print("Hashing feature tests passed!")
+
+def test_mini_batch_hot_swap():
+    """Tests that examples are applied per mini-batch to a copy of the model, which is saved and swapped in."""
+
+    email = "Please send me the invoice for my purchase."
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        models = _online_registry(tmp_dir)
+        learner = models.get("email_learner")
+        serving = models.get("email_classifier")
+        before = serving.feature_count_.copy()
+
+        assert learner.add(email, "PAYMENT", CORRECTION_WEIGHT) == 0 and learner.add(email, "PAYMENT", CORRECTION_WEIGHT) == 0
+        assert models.get("email_classifier") is serving, "The model should not change before the batch is full"
+
+        assert learner.add(email, "PAYMENT", CORRECTION_WEIGHT) == 3, "A full batch should be applied"
+        updated = models.get("email_classifier")
+        assert updated is not serving, "The updated model should be swapped in"
+        assert np.array_equal(serving.feature_count_, before), "Callers holding the old model must not see it change"
+
+        features = HashingFeatures()
+        assert updated.predict(features.transform([email]))[0] == "PAYMENT", "Corrections should change the prediction"
+        saved = load_online_model(os.path.join(tmp_dir, "email_classifier.pkl"))
+        assert np.array_equal(saved.feature_count_, updated.feature_count_), "Saved model differs from the served one"
+        assert not os.path.exists(os.path.join(tmp_dir, "email_classifier.pkl.tmp")), "Temporary file left behind"
+
+        learner.add(email, "INVOICE")
+        assert learner.update() == 0 and models.get("email_classifier") is updated, "Unknown labels should be skipped"
+        assert learner.stats() == {"updates": 1, "examples": 3, "pending": 0}, f"Unexpected stats {learner.stats()}"
+
+    print("Mini-batch hot swap tests passed!")
+
+def test_feedback_labels_and_replay():
+    """Tests which labels feedback teaches, and that the feedback log replays into the models."""
+
+    helpful = {"email": "Refund please", "feedback": "helpful", "predicted_category": "REFUND", "predicted_sentiment": "neutral"}
+    assert training_labels(helpful) == [("email_learner", "REFUND", 1.0), ("sentiment_learner", "neutral", 1.0)]
+    corrected = {**helpful, "feedback": "not helpful", "category": "PAYMENT", "sentiment": "neutral"}
+    assert training_labels(corrected) == [("email_learner", "PAYMENT", CORRECTION_WEIGHT), ("sentiment_learner", "neutral", 1.0)]
+    assert training_labels({**helpful, "feedback": "not helpful"}) == [], "Bare negative feedback carries no label"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log = FeedbackLog(os.path.join(tmp_dir, "feedback_log.jsonl"))
+        for _ in range(4):
+            log.append({**corrected, "email": "I was charged twice for one order."})
+        log.append({**helpful, "feedback": "not helpful"})
+
+        models = _online_registry(tmp_dir)
+        assert replay(log, models) == 5, "Every record should be read"
+        email_learner, sentiment_learner = models.get("email_learner"), models.get("sentiment_learner")
+        assert email_learner.stats() == {"updates": 2, "examples": 4, "pending": 0}, f"Unexpected stats {email_learner.stats()}"
+        assert sentiment_learner.stats()["examples"] == 4, "Sentiment labels should be learned too"
+        assert os.path.exists(os.path.join(tmp_dir, "sentiment_analyzer.pkl")), "Updated sentiment model not saved"
+
+    print("Feedback replay tests passed!")
+
+if __name__ == "__main__":
+    from conftest import run_test
+    run_test(test_hashing_features)
+    test_mini_batch_hot_swap()
+    test_feedback_labels_and_replay()
@@ -0,0 +1,103 @@
+import sys
+import os
+import json
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from pdf_parser import SECTIONS, SectionDetector, load_section_tables, parse_pdf, parse_sections
+
+PDF_FOLDER = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data/company policies'))
+SECTION_TABLES_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), '../data/section_tables.json'))
+
+def test_parse_sections():
+    """Tests that policy headings are detected and section text is extracted."""
+
+    source, section_texts = parse_sections(os.path.join(PDF_FOLDER, "CancellationPolicy.pdf"))
+
+    assert source == "CancellationPolicy", f"Unexpected source {source}"
+    assert "Cancellation Overview" in section_texts, "Missing 'Cancellation Overview' section"
+    assert "User Cancellation" in section_texts, "Missing 'User Cancellation' section"
+    assert all(text.strip() for text in section_texts.values()), "Empty section text extracted"
+
+    print("Section parsing tests passed!")
+
+def test_section_detector():
+    """Tests that the compiled detector matches headings in table order, like the per-pattern loop."""
+
+    detector = SectionDetector(SECTIONS)
+
+    assert detector.match("REFUND QUERIES") == "Refund Queries"
+    assert detector.match("cancellation by the user") == "User Cancellation"
+    assert detector.match("14. GRIEVANCE OFFICER") == "Grievance Officer"
+    assert detector.match("Please contact us for help.") is None
+    assert detector.match("") is None
+
+    # Earlier entries win when several headings match the same line
+    assert SectionDetector({"First": r"REFUND", "Second": r"REFUND QUERIES"}).match("REFUND QUERIES") == "First"
+
+    print("Section detector tests passed!")
+
+def test_custom_section_table():
+    """Tests that a per-PDF heading table replaces the default one."""
+
+    _, section_texts = parse_sections(
+        os.path.join(PDF_FOLDER, "CancellationPolicy.pdf"),
+        sections={"User Cancellation": r"CANCELLATION BY THE USER"},
+    )
+
+    assert list(section_texts) == ["User Cancellation"], f"Unexpected sections {list(section_texts)}"
+
+    print("Custom section table tests passed!")
+
+def test_section_tables_file():
+    """Tests loading per-PDF heading tables from JSON, by SECTIONS name or as custom patterns."""
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "section_tables.json")
+        with open(path, "w") as f:
+            json.dump({"CancellationPolicy": ["User Cancellation"], "Welcome": {"Intro": r"WELCOME"}}, f)
+
+        tables = load_section_tables(path)
+        assert tables["CancellationPolicy"] == {"User Cancellation": SECTIONS["User Cancellation"]}, "Names should map to SECTIONS patterns"
+        assert tables["Welcome"] == {"Intro": r"WELCOME"}, "Custom patterns should be used as given"
+        assert load_section_tables(os.path.join(tmp_dir, "missing.json")) == {}, "A missing file means no per-PDF tables"
+
+    shipped = load_section_tables(SECTION_TABLES_FILE)
+    pdf_sources = {os.path.splitext(filename)[0] for filename in os.listdir(PDF_FOLDER) if filename.endswith(".pdf")}
+    assert set(shipped) == pdf_sources, f"Every policy PDF should have a table: {sorted(shipped)}"
+
+    for source, table in shipped.items():
+        _, section_texts = parse_sections(os.path.join(PDF_FOLDER, f"{source}.pdf"), sections=table)
+        _, full_texts = parse_sections(os.path.join(PDF_FOLDER, f"{source}.pdf"), sections=SECTIONS)
+        assert section_texts == full_texts, f"The {source} table should find the same sections as the full table"
+
+    print("Section table file tests passed!")
+
+def test_parallel_parsing():
+    """Tests that parsing PDFs in worker processes gives the same chunks as parsing serially."""
+
+    pdf_paths = sorted(
+        os.path.join(PDF_FOLDER, filename) for filename in os.listdir(PDF_FOLDER) if filename.endswith(".pdf")
+    )
+
+    serial = [parse_pdf(pdf_path) for pdf_path in pdf_paths]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        parallel = list(executor.map(parse_pdf, pdf_paths))
+
+    assert parallel == serial, "Parallel parsing differs from serial parsing"
+
+    for source, records in serial:
+        ids = [record[0] for record in records]
+        assert len(ids) == len(set(ids)), f"Duplicate chunk IDs for {source}"
+        for _, chunk, metadata in records:
+            assert chunk.strip() and metadata["source"] == source, f"Invalid chunk record for {source}"
+
+    print("Parallel parsing tests passed!")
+
+if __name__ == "__main__":
+    test_parse_sections()
+    test_section_detector()
+    test_custom_section_table()
+    test_section_tables_file()
+    test_parallel_parsing()
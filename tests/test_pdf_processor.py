@@ -0,0 +1,126 @@
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from pdf_processor import load_manifest, process_all_pdfs, store_chunks
+import pdf_processor
+
+class FakeCollection:
+    """In-memory stand-in for the ChromaDB policy collection that records every write."""
+
+    def __init__(self):
+        self.chunks = {}  # chunk ID -> (document, metadata)
+        self.upserts = []  # IDs of each upsert call
+        self.deleted = []
+
+    def upsert(self, ids, documents, embeddings, metadatas):
+        assert len(ids) == len(documents) == len(embeddings) == len(metadatas), "Mismatched upsert columns"
+        self.upserts.append(list(ids))
+        for chunk_id, document, metadata in zip(ids, documents, metadatas):
+            self.chunks[chunk_id] = (document, metadata)
+
+    def get(self, where=None, include=()):
+        ids = [
+            chunk_id for chunk_id, (_, metadata) in sorted(self.chunks.items())
+            if where is None or all(metadata.get(key) == value for key, value in where.items())
+        ]
+        return {
+            "ids": ids,
+            "documents": [self.chunks[chunk_id][0] for chunk_id in ids],
+            "metadatas": [self.chunks[chunk_id][1] for chunk_id in ids],
+        }
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+        for chunk_id in ids:
+            self.chunks.pop(chunk_id, None)
+
+class FakeEncoder:
+    """Stand-in for the embedding model that records the documents of each batch."""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, documents, batch_size=32):
+        self.batches.append(list(documents))
+        return np.zeros((len(documents), 4), dtype=np.float32)
+
+def fake_parse_pdf(pdf_path):
+    """Treats each line of a fake "PDF" as one chunk of its source document."""
+    source = os.path.splitext(os.path.basename(pdf_path))[0]
+    with open(pdf_path, "r") as f:
+        lines = f.read().splitlines()
+    return source, [(f"{source}_{i}", line, {"section": "Policy", "source": source}) for i, line in enumerate(lines)]
+
+def _use_fake_index(use_registry, monkeypatch):
+    """Indexes into a FakeCollection with a FakeEncoder, reading each fake PDF with fake_parse_pdf."""
+    collection, encoder = FakeCollection(), FakeEncoder()
+    use_registry({"indexing_collection": lambda: collection, "embedding_model": lambda: encoder}, pdf_processor)
+    monkeypatch.setattr(pdf_processor, "parse_pdf", fake_parse_pdf)
+    return collection, encoder
+
+def _write(folder, filename, lines):
+    with open(os.path.join(folder, filename), "w") as f:
+        f.write("\n".join(lines))
+
+def test_batched_storage(use_registry, monkeypatch):
+    """Tests that store_chunks embeds and upserts in batch_size batches, writing every record exactly once."""
+
+    records = [(f"Refunds_{i}", f"Refund rule {i}.", {"section": "Refunds", "source": "Refunds"}) for i in range(7)]
+
+    collection, encoder = _use_fake_index(use_registry, monkeypatch)
+    assert store_chunks(records, batch_size=3) == 7, "Every record should be counted"
+    assert [len(ids) for ids in collection.upserts] == [3, 3, 1], f"Unexpected upsert batches {collection.upserts}"
+    assert [len(batch) for batch in encoder.batches] == [3, 3, 1], "Each batch should be embedded in one call"
+    upserted = [chunk_id for ids in collection.upserts for chunk_id in ids]
+    assert upserted == [record[0] for record in records], "Every record should be upserted once, in order"
+    assert collection.chunks["Refunds_6"] == (records[6][1], records[6][2]), "Document or metadata mismatch"
+
+    collection.upserts.clear()
+    assert store_chunks([], batch_size=3) == 0 and collection.upserts == [], "No records means no writes"
+
+    print("Batched storage tests passed!")
+
+def test_incremental_indexing(use_registry, monkeypatch):
+    """Tests that incremental runs skip unchanged PDFs, re-embed only edited chunks and delete removed ones."""
+
+    collection, encoder = _use_fake_index(use_registry, monkeypatch)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manifest_path = os.path.join(tmp_dir, "index", "index_manifest.json")
+        lexical_index_path = os.path.join(tmp_dir, "index", "bm25_index.json")
+
+        def index():
+            return process_all_pdfs(tmp_dir, incremental=True, manifest_path=manifest_path, lexical_index_path=lexical_index_path)
+
+        _write(tmp_dir, "Refunds.pdf", ["Refunds take 7 days.", "Damaged items are replaced."])
+        _write(tmp_dir, "Shipping.pdf", ["Orders ship in 2 days."])
+
+        assert index() == 3, "The first run should index everything"
+        assert sorted(collection.chunks) == ["Refunds_0", "Refunds_1", "Shipping_0"], f"Unexpected chunks {sorted(collection.chunks)}"
+
+        collection.upserts.clear()
+        assert index() == 0 and collection.upserts == [] and collection.deleted == [], "Unchanged PDFs should be skipped"
+
+        _write(tmp_dir, "Refunds.pdf", ["Refunds take 7 days.", "Damaged items are refunded."])
+        assert index() == 1 and collection.upserts == [["Refunds_1"]], f"Only the edited chunk should be embedded: {collection.upserts}"
+        assert encoder.batches[-1] == ["Damaged items are refunded."], "Unexpected embedding batch"
+        assert collection.chunks["Refunds_1"][0] == "Damaged items are refunded.", "Edited chunk not updated"
+
+        _write(tmp_dir, "Refunds.pdf", ["Refunds take 7 days."])
+        os.remove(os.path.join(tmp_dir, "Shipping.pdf"))
+        assert index() == 0, "Removing content should not re-embed anything"
+        assert sorted(collection.deleted) == ["Refunds_1", "Shipping_0"], f"Unexpected deletions {collection.deleted}"
+        assert list(collection.chunks) == ["Refunds_0"], f"Stale chunks left behind: {sorted(collection.chunks)}"
+
+        manifest = load_manifest(manifest_path)
+        assert list(manifest["files"]) == ["Refunds.pdf"] and list(manifest["files"]["Refunds.pdf"]["chunks"]) == ["Refunds_0"]
+
+    print("Incremental indexing tests passed!")
+
+if __name__ == "__main__":
+    from conftest import run_test
+    run_test(test_batched_storage)
+    run_test(test_incremental_indexing)
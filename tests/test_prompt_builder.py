@@ -0,0 +1,141 @@
+import sys
+import os
+import asyncio
+from types import SimpleNamespace
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from prompt_builder import build_chat_context, build_chat_prompt, build_email_prompt, count_tokens, dedupe_policy
+from response_cache import SemanticResponseCache
+import response_generator
+
+class StubLLM:
+    """Local stand-in for the Groq LLM that streams a fixed reply word by word."""
+
+    def __init__(self, reply="Refunds are processed within 5-7 business days.", fail=False, delay=0.0, fail_after=None):
+        self.words = [f" {word}" for word in reply.split()]
+        self.fail = fail
+        self.delay = delay
+        self.fail_after = fail_after
+        self.prompts = []
+
+    def stream(self, prompt):
+        self.prompts.append(prompt)
+        if self.fail:
+            raise ConnectionError("LLM unavailable")
+        for index, word in enumerate(self.words):
+            if index == self.fail_after:
+                raise ConnectionError("LLM connection lost")
+            yield SimpleNamespace(content=word)
+
+    async def astream(self, prompt):
+        self.prompts.append(prompt)
+        for word in self.words:
+            await asyncio.sleep(self.delay)
+            yield SimpleNamespace(content=word)
+
+def test_prompt_budgets():
+    """Tests that long policies and emails are cut to the token budget and overlapping chunks are deduplicated."""
+
+    sentence = "Refunds are credited to the original payment method within seven business days."
+    first_chunk = " ".join([sentence, "Instant refunds go to the wallet."] * 3)
+    second_chunk = "Instant refunds go to the wallet. Exchanges are free of charge."
+    policy = dedupe_policy([first_chunk, second_chunk])
+    assert policy.count(sentence) == 1 and policy.count("Instant refunds go to the wallet.") == 1, "Repeated sentences kept"
+    assert "Exchanges are free of charge." in policy, "New sentence from the second chunk missing"
+
+    long_email = "My order arrived damaged and I want my money back. " * 400
+    prompt = build_email_prompt("REFUND", long_email, ["Refund policy text. " * 300])
+    assert count_tokens(prompt) <= 1024 + 20, f"Email prompt over budget: {count_tokens(prompt)} tokens"
+    assert "Policy:\nRefund policy text." in prompt, "Policy missing from prompt"
+
+    short_prompt = build_email_prompt("REFUND", "Where is my refund?", "NO_MATCH")
+    assert "Category: REFUND\nEmail: Where is my refund?" in short_prompt, "Short emails must be kept as is"
+
+    print("Prompt budget tests passed!")
+
+def test_chat_history_budget():
+    """Tests that recent turns are kept verbatim and older ones summarized within the history budget."""
+
+    history = [{"user": f"Question {i} about my order? More details here.", "ai": "Answer. " * 30} for i in range(8)]
+    context = build_chat_context(history, budget=200)
+    assert context.startswith("Earlier, the user asked: Question 0 about my order?"), f"Missing summary: {context[:80]}"
+    assert "User: Question 7 about my order?" in context, "Latest turn missing"
+    assert count_tokens(context) <= 200, f"History over budget: {count_tokens(context)} tokens"
+
+    prompt = build_chat_prompt(history[:1], "And the refund?", "NO_MATCH")
+    assert "User: Question 0 about my order? More details here.\nAI:" in prompt, "Short history should be kept verbatim"
+
+    print("Chat history budget tests passed!")
+
+def _with_llm(use_registry, monkeypatch, llm, run):
+    """Calls run() with responses generated by llm, starting from an empty response cache."""
+    use_registry({
+        "llm": lambda: llm,
+        "responses": lambda: {"REFUND": "Refunds are processed within 5-7 business days after approval."},
+    }, response_generator)
+    monkeypatch.setattr(response_generator, "response_cache", SemanticResponseCache())
+    return run()
+
+def test_streaming_responses(use_registry, monkeypatch):
+    """Tests token streaming, the joined response, and the fallback when the LLM fails before streaming."""
+
+    policy_match = (None, "NO_MATCH", [1.0, 0.0])
+    llm = StubLLM()
+    pieces = _with_llm(use_registry, monkeypatch, llm, lambda: list(response_generator.stream_response("REFUND", "Where is my refund?", policy_match)))
+    assert len(pieces) == len(llm.words) > 1, "Response should arrive in several pieces"
+    assert "".join(pieces) == "Refunds are processed within 5-7 business days.", "Unexpected streamed text"
+
+    failing = StubLLM(fail=True)
+    pieces = _with_llm(use_registry, monkeypatch, failing, lambda: list(response_generator.stream_response("REFUND", "Where is my refund?", policy_match)))
+    assert pieces == ["Refunds are processed within 5-7 business days after approval."], "Expected the fallback response"
+
+    async def collect(timeout):
+        return [text async for text in response_generator.astream_response("REFUND", "Refund?", policy_match, timeout)]
+
+    pieces = _with_llm(use_registry, monkeypatch, StubLLM(), lambda: asyncio.run(collect(5)))
+    assert "".join(pieces) == "Refunds are processed within 5-7 business days.", "Unexpected async streamed text"
+
+    slow = StubLLM(delay=0.5)
+    pieces = _with_llm(use_registry, monkeypatch, slow, lambda: asyncio.run(collect(0.1)))
+    assert pieces == ["Refunds are processed within 5-7 business days after approval."], "Expected the timeout fallback"
+
+    print("Streaming response tests passed!")
+
+def test_truncated_responses(use_registry, monkeypatch):
+    """Tests that a reply cut off mid-stream is completed with the fallback response, flagged and not cached."""
+
+    policy_match = (None, "NO_MATCH", [1.0, 0.0])
+    fallback = "\n\nRefunds are processed within 5-7 business days after approval."
+
+    def stream():
+        status = {}
+        pieces = list(response_generator.stream_response("REFUND", "Where is my refund?", policy_match, status))
+        return pieces, status, response_generator.response_cache.stats()["size"]
+
+    async def collect(timeout, status):
+        return [text async for text in response_generator.astream_response("REFUND", "Refund?", policy_match, timeout, status)]
+
+    broken = StubLLM(fail_after=2)
+    pieces, status, cached = _with_llm(use_registry, monkeypatch, broken, stream)
+    assert pieces == ["Refunds", " are", fallback], f"Unexpected pieces {pieces}"
+    assert status == {"truncated": True}, "A cut-off reply should be flagged"
+    assert cached == 0, "A cut-off reply must not be cached"
+
+    status = {}
+    slow = StubLLM(delay=0.05)
+    pieces = _with_llm(use_registry, monkeypatch, slow, lambda: asyncio.run(collect(0.12, status)))
+    assert 0 < len(pieces) - 1 < len(slow.words) and pieces[-1] == fallback, f"Unexpected pieces {pieces}"
+    assert status == {"truncated": True}, "A timed-out reply should be flagged"
+
+    status = {}
+    pieces = _with_llm(use_registry, monkeypatch, StubLLM(), lambda: asyncio.run(collect(5, status)))
+    assert "".join(pieces) == "Refunds are processed within 5-7 business days." and status == {}, "Complete replies are not truncated"
+
+    print("Truncated response tests passed!")
+
+if __name__ == "__main__":
+    test_prompt_budgets()
+    test_chat_history_budget()
+    from conftest import run_test
+    run_test(test_streaming_responses)
+    run_test(test_truncated_responses)
@@ -0,0 +1,134 @@
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from response_cache import SemanticResponseCache
+import llm_client
+import response_generator
+
+class StubLLM:
+    """Local stand-in for the Groq LLM that counts how often it is called."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def answer(self, query):
+        self.calls += 1
+        return f"Answer #{self.calls} to: {query}"
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+REFUND = np.array([1.0, 0.0, 0.0])
+REFUND_PARAPHRASE = np.array([0.99, 0.05, 0.0])
+CANCEL = np.array([0.0, 1.0, 0.0])
+
+def test_semantic_hits():
+    """Tests that similar queries under the same key reuse the stored answer and others do not."""
+
+    llm = StubLLM()
+    cache = SemanticResponseCache(threshold=0.95)
+    key = ("email", "REFUND", "ReturnsExchangeRefunds_Refund Queries_0")
+
+    first = cache.get_or_generate(key, REFUND, lambda: llm.answer("where is my refund"))
+    second = cache.get_or_generate(key, REFUND_PARAPHRASE, lambda: llm.answer("where's my refund?"))
+    assert first == second and llm.calls == 1, "Similar query should be served from the cache"
+
+    cache.get_or_generate(key, CANCEL, lambda: llm.answer("cancel my order"))
+    cache.get_or_generate(("email", "PAYMENT", key[2]), REFUND, lambda: llm.answer("where is my refund"))
+    assert llm.calls == 3, "Dissimilar query or different key must call the LLM"
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3, f"Unexpected stats {stats}"
+    assert abs(stats["hit_rate"] - 0.25) < 1e-9, f"Unexpected hit rate {stats['hit_rate']}"
+
+    print("Semantic cache hit tests passed!")
+
+def test_eviction_and_invalidation():
+    """Tests TTL expiry, LRU eviction and invalidation when the policy index changes."""
+
+    llm = StubLLM()
+    clock = FakeClock()
+    index = {"version": 1}
+    cache = SemanticResponseCache(threshold=0.95, max_entries=2, ttl=60, clock=clock, version_fn=lambda: index["version"])
+
+    cache.store("a", REFUND, llm.answer("a"))
+    clock.now = 61
+    assert cache.lookup("a", REFUND) is None, "Expired entry should not be served"
+
+    cache.store("a", REFUND, llm.answer("a"))
+    cache.store("b", REFUND, llm.answer("b"))
+    cache.lookup("a", REFUND)  # Refresh "a", so "b" is least recently used
+    cache.store("c", REFUND, llm.answer("c"))
+    assert cache.lookup("b", REFUND) is None, "Least recently used entry should be evicted"
+    assert cache.lookup("a", REFUND) is not None, "Recently used entry should be kept"
+
+    index["version"] = 2
+    assert cache.lookup("a", REFUND) is None, "Entries must be dropped after the policy index changes"
+    assert cache.stats()["invalidations"] == 1 and cache.stats()["size"] == 0
+
+    print("Semantic cache eviction tests passed!")
+
+def test_lazy_embedding():
+    """Tests that a callable embedding is only computed when the key has answers to compare against."""
+
+    llm = StubLLM()
+    cache = SemanticResponseCache(threshold=0.95)
+    key = ("chat", "PrivacyPolicy_Grievance Officer_0")
+    computed = []
+
+    def embed(vector):
+        def compute():
+            computed.append(vector)
+            return vector
+        return compute
+
+    assert cache.lookup(key, embed(REFUND)) is None and computed == [], "Empty key should not compute the embedding"
+    first = cache.get_or_generate(key, embed(REFUND), lambda: llm.answer("grievance officer"))
+    second = cache.get_or_generate(key, embed(REFUND_PARAPHRASE), lambda: llm.answer("grievance officer email"))
+    assert first == second and llm.calls == 1, "Lazily embedded similar query should hit the cache"
+    assert len(computed) == 2, f"Unexpected embedding computations {len(computed)}"
+
+    print("Lazy embedding cache tests passed!")
+
+def test_lexical_matches_skip_embedding(use_registry, monkeypatch):
+    """Tests that replies to lexically matched queries are cached by their text, without ever embedding them."""
+
+    cache = SemanticResponseCache(threshold=0.95)
+    key = ("email", "REFUND", "ReturnsExchangeRefunds_Refund Queries_0", "where is my refund?")
+    cache.store(key, None, "Refund answer")
+    assert cache.lookup(key, None) == "Refund answer", "Exact key should hit"
+    assert cache.lookup(key[:3] + ("cancel my order",), None) is None, "Different text should miss"
+    assert cache.lookup(key, REFUND) is None, "Text-keyed answers do not take part in similarity search"
+
+    def no_embedding():
+        raise AssertionError("Lexically matched queries must not be embedded")
+
+    llm = llm_client.StubLLM(reply=lambda prompt: "Refunds take five business days.")
+    use_registry({
+        "llm": lambda: llm,
+        "embedding_model": no_embedding,
+        "responses": lambda: {"REFUND": "Refunds are processed within 5-7 business days."},
+    }, response_generator)
+    monkeypatch.setattr(response_generator, "response_cache", SemanticResponseCache())
+    policy_match = ("ReturnsExchangeRefunds_Refund Queries_0", "Refunds are credited within 7 days.", None)
+    first = "".join(response_generator.stream_response("REFUND", "Where is my refund?", policy_match))
+    second = "".join(response_generator.stream_response("REFUND", "  where is my REFUND? ", policy_match))
+    other = "".join(response_generator.stream_response("REFUND", "Refund for order 42?", policy_match))
+
+    assert first == second == other == "Refunds take five business days.", "Unexpected replies"
+    assert llm.calls == 2, f"Same normalized text should hit the cache, other text should not ({llm.calls} calls)"
+
+    print("Lexical match cache tests passed!")
+
+if __name__ == "__main__":
+    test_semantic_hits()
+    test_eviction_and_invalidation()
+    test_lazy_embedding()
+    from conftest import run_test
+    run_test(test_lexical_matches_skip_embedding)
@@ -0,0 +1,81 @@
+import sys
+import os
+import asyncio
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+import response_tiers
+import email_pipeline
+import classification
+from model_registry import registry
+
+RESPONSES = {"REFUND": "Refunds are processed within 5-7 business days after approval.", "CONTACT": "You can contact our support team."}
+THRESHOLDS = {"default": 0.8, "REFUND": 0.95, "DELIVERY": None}
+POLICY_MATCH = ("chunk-1", "Refunds are credited to the original payment method. Instant refunds go to the wallet.", None)
+NO_MATCH = (None, "NO_MATCH", None)
+
+def _triage(category="CONTACT", confidence=0.9, sentiment="neutral", escalation=False, sentiment_confidence=0.9):
+    return {"category": category, "category_confidence": confidence, "sentiment": sentiment,
+            "sentiment_confidence": sentiment_confidence, "escalation": escalation}
+
+def _use_test_data(use_registry):
+    """Serves the fixed responses and thresholds above in place of the data files."""
+    use_registry({"responses": lambda: RESPONSES, "fast_path_thresholds": lambda: THRESHOLDS}, response_tiers)
+
+def test_select_tier(use_registry):
+    """Tests that only confident, calm, non-escalated emails with a template skip the LLM."""
+
+    _use_test_data(use_registry)
+
+    assert response_tiers.select_tier(_triage(), NO_MATCH) == "template", "Confident email without policy"
+    assert response_tiers.select_tier(_triage(), POLICY_MATCH) == "policy", "Confident email with policy"
+    assert response_tiers.select_tier(_triage(confidence=0.7), NO_MATCH) == "llm", "Below the default threshold"
+    assert response_tiers.select_tier(_triage("REFUND", 0.9), NO_MATCH) == "llm", "Below the REFUND threshold"
+    assert response_tiers.select_tier(_triage("REFUND", 0.97), NO_MATCH) == "template", "Above the REFUND threshold"
+    assert response_tiers.select_tier(_triage(sentiment="negative"), NO_MATCH) == "llm", "Negative emails need the LLM"
+    assert response_tiers.select_tier(_triage(escalation=True), NO_MATCH) == "llm", "Escalated emails need the LLM"
+    assert response_tiers.select_tier(_triage(sentiment_confidence=0.4), NO_MATCH) == "llm", "Uncertain sentiment needs the LLM"
+    assert response_tiers.select_tier(_triage("DELIVERY", 0.99), NO_MATCH) == "llm", "Disabled category"
+    assert response_tiers.select_tier(_triage("INVOICE", 0.99), NO_MATCH) == "llm", "Category without a template"
+
+    print("Tier selection tests passed!")
+
+def test_fast_responses(use_registry):
+    """Tests template and policy responses, and that the pipeline answers fast-path emails without the LLM."""
+
+    _use_test_data(use_registry)  # email_pipeline reads the thresholds through response_tiers, so one swap covers both
+
+    assert response_tiers.fast_response("template", "CONTACT", NO_MATCH) == RESPONSES["CONTACT"]
+    policy_response = response_tiers.fast_response("policy", "CONTACT", POLICY_MATCH)
+    assert policy_response.startswith(RESPONSES["CONTACT"]), "Template missing from policy response"
+    assert "According to our policy: Refunds are credited" in policy_response, "Policy excerpt missing"
+
+    response_tiers.tier_stats.reset()
+    tokens = []
+    result = asyncio.run(email_pipeline.process_email(
+        "How do I reach support?", policy_match=NO_MATCH, triage=_triage(), on_token=tokens.append
+    ))
+    assert result["tier"] == "template" and result["response"] == RESPONSES["CONTACT"], f"Unexpected result: {result}"
+    assert tokens == [RESPONSES["CONTACT"]], "Fast responses should still reach on_token"
+
+    report = response_tiers.tier_stats.report()
+    assert report["template"]["count"] == 1 and report["llm"]["count"] == 0, f"Unexpected tier counts: {report}"
+    assert report["template"]["share"] == 1.0, f"Unexpected tier share: {report}"
+
+    print("Fast path response tests passed!")
+
+def test_data_keys_match_categories():
+    """Tests that the shipped responses and fast path thresholds are keyed by categories the classifier emits."""
+
+    categories = {str(category) for category in classification.get_model().classes_}
+    responses = registry.get("responses")
+    thresholds = registry.get("fast_path_thresholds")
+    assert categories <= set(responses), f"Categories without a response: {sorted(categories - set(responses))}"
+    assert set(thresholds) - {"default"} <= categories, f"Thresholds for unknown categories: {sorted(set(thresholds) - {'default'} - categories)}"
+
+    print("Category key tests passed!")
+
+if __name__ == "__main__":
+    from conftest import run_test
+    run_test(test_select_tier)
+    run_test(test_fast_responses)
+    test_data_keys_match_categories()
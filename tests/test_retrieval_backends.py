@@ -0,0 +1,195 @@
+import sys
+import os
+import tempfile
+import numpy as np
+import chromadb
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from retrieval_backends import ChromaBackend, InMemoryBackend
+from embedding_cache import QueryEmbeddingCache
+from lexical_index import BM25Index, BM25Backend
+import policy_retriever
+
+def _collection(name, space, n_chunks=200, dim=32, seed=0):
+    """Builds an in-memory ChromaDB collection filled with random policy chunk embeddings."""
+    rng = np.random.default_rng(seed)
+    embeddings = rng.normal(size=(n_chunks, dim)).astype(np.float32)
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(name, metadata={"hnsw:space": space}, embedding_function=None)
+    collection.add(
+        ids=[f"chunk_{i}" for i in range(n_chunks)],
+        documents=[f"Policy text {i}" for i in range(n_chunks)],
+        embeddings=embeddings.tolist(),
+        metadatas=[{"section": f"Section {i % 5}", "source": f"Policy{i % 3}"} for i in range(n_chunks)],
+    )
+    return collection, embeddings, rng
+
+def test_in_memory_matches_chroma():
+    """Tests that the in-process backend returns the same ranked chunks and scores as ChromaDB."""
+
+    for space in ["l2", "cosine", "ip"]:
+        collection, embeddings, rng = _collection(f"policies_{space}", space)
+        queries = embeddings[:10] + rng.normal(scale=0.05, size=(10, embeddings.shape[1])).astype(np.float32)
+
+        expected = ChromaBackend(collection).query(queries, k=3)
+        results = InMemoryBackend(collection).query(queries, k=3)
+
+        assert len(results) == len(queries), "One result list per query expected"
+        for hits, expected_hits in zip(results, expected):
+            assert [hit["id"] for hit in hits] == [hit["id"] for hit in expected_hits], f"Ranking differs ({space})"
+            assert np.allclose([hit["score"] for hit in hits], [hit["score"] for hit in expected_hits], atol=1e-4)
+            assert hits[0]["metadata"] == expected_hits[0]["metadata"] and hits[0]["document"] == expected_hits[0]["document"]
+
+    print("In-memory backend tests passed!")
+
+def test_routed_search():
+    """Tests that routed searches only return chunks inside the route, on both backends and the lexical index."""
+
+    collection, embeddings, _ = _collection("policies_routed", "l2")
+    route = {"sources": ["Policy1"], "sections": ["Section 0"]}
+    queries = embeddings[:10]
+
+    expected = ChromaBackend(collection).query(queries, k=3, route=route)
+    results = InMemoryBackend(collection).query(queries, k=3, route=route)
+
+    for hits, expected_hits in zip(results, expected):
+        assert [hit["id"] for hit in hits] == [hit["id"] for hit in expected_hits], "Routed ranking differs"
+        assert all(
+            hit["metadata"]["source"] == "Policy1" or hit["metadata"]["section"] == "Section 0" for hit in hits
+        ), "Hit outside the route"
+
+    data = collection.get(include=["documents", "metadatas"])
+    lexical = BM25Index.build(zip(data["ids"], data["documents"], data["metadatas"]))
+    hits = lexical.query("policy text section", k=50, route={"sources": ["Policy2"]})
+    assert hits and all(hit["metadata"]["source"] == "Policy2" for hit in hits), "Lexical hit outside the route"
+
+    print("Routed search tests passed!")
+
+def test_in_memory_reloads_on_new_version():
+    """Tests that the in-process index is rebuilt when the policy index version changes."""
+
+    collection, embeddings, _ = _collection("policies_reload", "l2", n_chunks=20)
+    index = {"version": 1}
+    backend = InMemoryBackend(collection, version_fn=lambda: index["version"])
+
+    assert backend.query(embeddings[:1], k=1)[0][0]["id"] == "chunk_0"
+
+    collection.delete(ids=["chunk_0"])
+    assert backend.query(embeddings[:1], k=1)[0][0]["id"] == "chunk_0", "Index should not reload before a version change"
+
+    index["version"] = 2
+    assert backend.query(embeddings[:1], k=1)[0][0]["id"] != "chunk_0", "Deleted chunk should disappear after reload"
+
+    print("In-memory backend reload tests passed!")
+
+class LookupEncoder:
+    """Stand-in embedding model that maps known queries to fixed vectors and counts encode calls."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.calls = 0
+
+    def encode(self, texts):
+        self.calls += 1
+        return np.array([self.vectors[text] for text in texts]) if isinstance(texts, list) else self.vectors[texts]
+
+def _use_retriever(use_registry, encoder, collection, lexical_index_path=None, **loaders):
+    """Points policy_retriever at the encoder, an in-process copy of the collection and a BM25 index (none by default)."""
+    lexical_index_path = lexical_index_path or os.path.join(tempfile.gettempdir(), "missing_bm25.json")
+    use_registry({
+        "embedding_model": lambda: encoder,
+        "query_cache": lambda: QueryEmbeddingCache(max_size=16),
+        "retrieval_backend": lambda: InMemoryBackend(collection),
+        "lexical_backend": lambda: BM25Backend(lexical_index_path),
+        **loaders,
+    }, policy_retriever)
+
+def test_batched_retrieval(use_registry):
+    """Tests that retrieve_policies agrees with match_policy and encodes the whole batch at once."""
+
+    collection, embeddings, rng = _collection("policies_batch", "l2", n_chunks=50)
+    queries = ["where is my refund", "cancel my order", "reset my password"]
+    encoder = LookupEncoder({
+        queries[0]: embeddings[3],
+        queries[1]: embeddings[7] + rng.normal(scale=0.05, size=embeddings.shape[1]).astype(np.float32),
+        queries[2]: embeddings[11] * 3,  # Far from every unit-norm chunk, so the match is filtered out as weak
+    })
+
+    _use_retriever(use_registry, encoder, collection)
+    results = policy_retriever.retrieve_policies(queries, k=3)
+    assert encoder.calls == 1, "All queries should be encoded in one batch"
+    singles = [policy_retriever.match_policy(query) for query in queries]
+    batched = policy_retriever.match_policies(queries)
+
+    assert len(results) == len(queries), "One result list per query expected"
+    assert results[0][0]["id"] == "chunk_3" and results[1][0]["id"] == "chunk_7", "Unexpected top chunks"
+    assert results[0][0]["section"] == "Section 3" and results[0][0]["source"] == "Policy0", "Missing chunk metadata"
+    for hits in results:
+        assert all(a["score"] >= b["score"] for a, b in zip(hits, hits[1:])), "Hits are not ranked best first"
+        assert all(hit["score"] >= hits[0]["score"] * 0.8 for hit in hits), "Weak hit kept"
+    assert results[2] == [], "Weak match should be filtered out"
+
+    for (chunk_id, document, _), (batch_id, batch_document, _), hits in zip(singles, batched, results):
+        assert (chunk_id, document) == (batch_id, batch_document), "Batched and single matches differ"
+        assert chunk_id == (hits[0]["id"] if hits else None)
+
+    print("Batched retrieval tests passed!")
+
+def test_category_routing(use_registry):
+    """Tests that only confident categories are routed and that empty routes fall back to all policies."""
+
+    collection, embeddings, _ = _collection("policies_category", "l2", n_chunks=30)
+    query = "where is my refund"
+    # Closest to chunk_4 (Policy1), but also near chunk_3 (Policy0)
+    encoder = LookupEncoder({query: 0.8 * embeddings[4] + 0.6 * embeddings[3]})
+
+    _use_retriever(use_registry, encoder, collection, policy_routes=lambda: {
+        "REFUND": {"sources": ["Policy0"]},
+        "CANCEL": {"sections": ["Missing Section"]},
+    })
+    routed = policy_retriever.retrieve_policies([query] * 4, k=3, categories=["REFUND", "REFUND", "CANCEL", "ORDER"],
+                                                category_confidences=[0.9, 0.3, 0.9, 0.9])
+
+    assert routed[0][0]["id"] == "chunk_3", "Confident REFUND should search its route only"
+    assert all(hit["source"] == "Policy0" for hit in routed[0]), "Hit outside the route"
+    assert routed[1][0]["id"] == "chunk_4", "Low-confidence category should search all policies"
+    assert routed[2][0]["id"] == "chunk_4", "Empty route should fall back to all policies"
+    assert routed[3][0]["id"] == "chunk_4", "Unrouted category should search all policies"
+
+    print("Category routing tests passed!")
+
+def test_hybrid_retrieval(use_registry):
+    """Tests that confident keyword queries skip the embedding model and weak ones are fused with dense hits."""
+
+    collection, embeddings, _ = _collection("policies_hybrid", "l2", n_chunks=20)
+    data = collection.get(include=["documents", "metadatas"])
+    documents = list(data["documents"])
+    documents[data["ids"].index("chunk_5")] = "Grievance officer contact."
+    queries = ["grievance officer", "policy text question"]
+    encoder = LookupEncoder({queries[1]: embeddings[9]})
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bm25_index.json")
+        BM25Index.build(zip(data["ids"], documents, data["metadatas"])).save(path)
+
+        _use_retriever(use_registry, encoder, collection, lexical_index_path=path)
+        lexical_match = policy_retriever.match_policy(queries[0])
+        assert encoder.calls == 0, "Confident lexical query should not be embedded"
+        dense_match = policy_retriever.match_policy(queries[1])
+
+    assert lexical_match[0] == "chunk_5" and lexical_match[2] is None, f"Unexpected lexical match {lexical_match[:2]}"
+    assert dense_match[0] == "chunk_9" and dense_match[2] is not None, f"Unexpected fused match {dense_match[:2]}"
+    assert encoder.calls == 1, "Weak lexical query should be embedded"
+
+    print("Hybrid retrieval tests passed!")
+
+if __name__ == "__main__":
+    test_in_memory_matches_chroma()
+    test_routed_search()
+    test_in_memory_reloads_on_new_version()
+    from conftest import run_test
+    run_test(test_batched_retrieval)
+    run_test(test_category_routing)
+    run_test(test_hybrid_retrieval)
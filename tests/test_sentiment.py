@@ -3,7 +3,7 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
 
-from sentiment_analysis import analyze_sentiment
+from sentiment_analysis import analyze_sentiment, analyze_sentiments
 
 def test_analyze_sentiment():
     """Tests sentiment analysis for different types of input."""
@@ -22,5 +22,26 @@ def test_analyze_sentiment():
 
     print("Sentiment analysis tests passed!")
 
+def test_analyze_sentiments_batch():
+    """Tests that batch sentiment analysis matches single-text analysis, including empty input."""
+
+    texts = [
+        "I love this service!",
+        "",
+        "This is the worst experience ever.",
+        "The product is okay, nothing special.",
+    ]
+
+    sentiments, confidences = analyze_sentiments(texts)
+
+    assert len(sentiments) == len(texts) and len(confidences) == len(texts), "Batch size mismatch"
+    for text, sentiment, confidence in zip(texts, sentiments, confidences):
+        expected_sentiment, expected_confidence = analyze_sentiment(text)
+        assert sentiment == expected_sentiment, f"Batch sentiment {sentiment} differs for input: {text}"
+        assert confidence == expected_confidence, f"Batch confidence differs for input: {text}"
+
+    print("Batch sentiment analysis tests passed!")
+
 if __name__ == "__main__":
     test_analyze_sentiment()
+    test_analyze_sentiments_batch()
@@ -0,0 +1,61 @@
+import sys
+import os
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import classification
+import sentiment_analysis
+from classification import classify_email
+from sentiment_analysis import analyze_sentiment
+from escalation import escalate_to_human
+from triage import TriagePipeline
+
+def test_shared_vectorization():
+    """Tests that the shared analysis pass produces the same features as both vectorizers."""
+
+    pipeline = TriagePipeline()
+    texts = [
+        "I need a refund for my damaged product.",
+        "My payment was deducted twice. Please help!",
+        "",
+    ]
+
+    email_vecs, sentiment_vecs = pipeline.vectorize(texts)
+
+    assert np.allclose(email_vecs.toarray(), classification.get_vectorizer().transform(texts).toarray()), "Email features differ"
+    assert np.allclose(sentiment_vecs.toarray(), sentiment_analysis.get_vectorizer().transform(texts).toarray()), "Sentiment features differ"
+
+    print("Shared vectorization tests passed!")
+
+def test_triage_pipeline():
+    """Tests that the fused pipeline matches the separate classify, sentiment and escalation calls."""
+
+    pipeline = TriagePipeline()
+    emails = [
+        "I want to cancel my subscription.",
+        "This is the worst experience ever. I want my money back!",
+        "I love this service!",
+        "",
+    ]
+
+    results = pipeline.triage_batch(emails)
+    assert len(results) == len(emails), "Batch size mismatch"
+
+    for email_text, result in zip(emails, results):
+        category, category_confidence = classify_email(email_text)
+        sentiment, sentiment_confidence = analyze_sentiment(email_text)
+
+        assert result["category"] == category, f"Category differs for input: {email_text}"
+        assert abs(result["category_confidence"] - category_confidence) < 1e-9, f"Category confidence differs for input: {email_text}"
+        assert result["sentiment"] == sentiment, f"Sentiment differs for input: {email_text}"
+        assert result["sentiment_confidence"] == sentiment_confidence, f"Sentiment confidence differs for input: {email_text}"
+        assert result["escalation"] == escalate_to_human(category, category_confidence, sentiment, sentiment_confidence)
+
+    assert pipeline.triage(emails[0]) == results[0], "Single triage differs from batch triage"
+
+    print("Triage pipeline tests passed!")
+
+if __name__ == "__main__":
+    test_shared_vectorization()
+    test_triage_pipeline()